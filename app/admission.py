@@ -0,0 +1,81 @@
+import threading
+
+from metrics import registry, Counter
+
+
+admission_rejections = registry.register(Counter(
+    "http_admission_rejections_total",
+    "Requests turned away by admission control before touching the database.",
+    ("route", "reason")
+))
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason      = reason
+
+
+class RateLimiter:
+    # Token bucket kept in the shared store, so every worker draws from the
+    # same budget when the store is Redis. A rate of 0 disables the limiter.
+
+    def __init__(self, store, name: str, rate: float, burst: int):
+        self.store = store
+        self.name  = name
+        self.rate  = rate
+        self.burst = max(1, burst)
+
+    def acquire(self, key: str, cost: int = 1) -> float:
+        if self.rate <= 0:
+            return 0.0
+        return self.store.take_token(f"{self.name}:{key}", self.rate, self.burst, cost)
+
+
+class ConcurrencyLimiter:
+    # Caps requests in progress in this worker. Sized from the connection
+    # pool, so excess requests are refused up front instead of queueing for
+    # a connection and starving the other routes. A limit of 0 disables it.
+
+    def __init__(self, limit: int):
+        self.limit   = limit
+        self._lock   = threading.Lock()
+        self._in_use = 0
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.limit > 0 and self._in_use >= self.limit:
+                return False
+            self._in_use += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+
+
+class AdmissionControl:
+    def __init__(self, user_limiter: RateLimiter, route_limiter: RateLimiter, concurrency: ConcurrencyLimiter):
+        self.user_limiter  = user_limiter
+        self.route_limiter = route_limiter
+        self.concurrency   = concurrency
+
+    def enter(self, route: str, user_id, concurrency: ConcurrencyLimiter = None):
+        retry_after = self.user_limiter.acquire(f"{route}:{user_id}")
+        if retry_after:
+            admission_rejections.inc((route, "user_rate"))
+            raise AdmissionRejected(429, retry_after, "user_rate")
+
+        retry_after = self.route_limiter.acquire(route)
+        if retry_after:
+            admission_rejections.inc((route, "route_rate"))
+            raise AdmissionRejected(429, retry_after, "route_rate")
+
+        if not (concurrency or self.concurrency).try_acquire():
+            admission_rejections.inc((route, "concurrency"))
+            raise AdmissionRejected(503, 1, "concurrency")
+
+    def exit(self, concurrency: ConcurrencyLimiter = None):
+        (concurrency or self.concurrency).release()
@@ -0,0 +1,67 @@
+import json
+import time
+import unicodedata
+
+from collections import namedtuple
+
+from caching import Snapshot, snapshot
+
+
+CatalogEntry = namedtuple("CatalogEntry", ["id", "category", "featured", "search_text", "summary", "detail"])
+
+
+def parse_how_to_use(raw) -> list:
+    # Stored as a JSON list, but older rows hold a single JSON string and
+    # some hold the instructions as plain text.
+    if not raw:
+        return []
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return [raw]
+    return value if isinstance(value, list) else [value]
+
+def normalize_search_text(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+class BenefitsCatalog:
+    # One immutable copy of the partners table. Every partner's summary and
+    # detail are serialized once, when the catalog is built; the unfiltered
+    # list is joined up front and filtered lists are joined per request from
+    # the same bytes, so no request touches the database or pydantic.
+
+    def __init__(self, entries, version=None):
+        self.version  = version
+        self.entries  = list(entries)
+        self.built_at = time.monotonic()
+
+        self._by_id = {entry.id: entry.detail for entry in self.entries}
+        self._all   = self._render(self.entries)
+
+    def list(self, category: str = None, search: str = None) -> Snapshot:
+        if not category and not search:
+            return self._all
+
+        category = normalize_search_text(category) if category else None
+        terms    = normalize_search_text(search).split() if search else ()
+        return self._render([
+            entry for entry in self.entries
+            if (category is None or normalize_search_text(entry.category) == category)
+            and all(term in entry.search_text for term in terms)
+        ])
+
+    def detail(self, benefit_id: str):
+        return self._by_id.get(benefit_id)
+
+    def _render(self, entries) -> Snapshot:
+        body = b"".join((
+            b'{"featured_partners":[',
+            b",".join(entry.summary for entry in entries if entry.featured),
+            b'],"all_partners":[',
+            b",".join(entry.summary for entry in entries),
+            b"]}",
+        ))
+        return snapshot(body, self.version)
+
@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import secrets
+import threading
+import time
+
+from collections import OrderedDict, namedtuple
+
+
+Snapshot = namedtuple("Snapshot", ["body", "etag", "version", "built_at"])
+
+
+class DataVersions:
+    # Per-table write counters kept in the shared store. Bumped after every
+    # commit that touched a table, so caches in any worker can tell their
+    # copy is stale without querying the database. Every read is also kept
+    # locally for `local_ttl` seconds and served by peek(), which never
+    # touches the store: async code checks that first and only goes to the
+    # store (a network round trip with Redis) from a thread.
+    EPOCH = "_epoch"
+
+    def __init__(self, store, name: str = "data_versions", local_ttl: float = 0.5):
+        self.store     = store
+        self.name      = name
+        self.local_ttl = local_ttl
+
+        self._local = {}
+
+    def bump(self, *tables):
+        for table in tables:
+            self.store.hincrby(self.name, table, 1)
+        self._local.clear()
+
+    def get(self, *tables) -> tuple:
+        values = tuple(value or 0 for value in self.store.hmget(self.name, tables))
+        self._local[tables] = (values, time.monotonic())
+        return values
+
+    def peek(self, *tables):
+        entry = self._local.get(tables)
+        if entry is None or time.monotonic() - entry[1] >= self.local_ttl:
+            return None
+        return entry[0]
+
+    def stamp(self, *tables) -> tuple:
+        # The versions of `tables` plus a random epoch kept next to them.
+        # Counters restart from zero in a new process with memory:// or after
+        # the store is flushed; the epoch changes with them, so a stamp from
+        # before the restart is never handed out again.
+        values = self.get(self.EPOCH, *tables)
+        if not values[0]:
+            self.store.hsetnx(self.name, self.EPOCH, secrets.randbits(52))
+            values = self.get(self.EPOCH, *tables)
+        return values
+
+    def peek_stamp(self, *tables):
+        values = self.peek(self.EPOCH, *tables)
+        return values if values and values[0] else None
+
+
+class SnapshotCache:
+    # Holds one pre-serialized response body. It is rebuilt when any of the
+    # watched tables changes version or when it is older than `ttl` seconds;
+    # concurrent misses share a single rebuild. `serialize(built, version)`
+    # turns what `build` returns into the cached value; by default a
+    # Snapshot of the body, but anything with `version` and `built_at` will
+    # do.
+
+    def __init__(self, build, ttl: float, versions: DataVersions = None, tables=(), serialize=None):
+        self.build     = build
+        self.ttl       = ttl
+        self.versions  = versions
+        self.tables    = tuple(tables)
+        self.serialize = serialize or snapshot
+
+        self._lock     = threading.Lock()
+        self._snapshot = None
+        self._pending  = None
+
+    def peek(self):
+        # Never touches the shared store: without a recent local copy of the
+        # versions it reports a miss and get() settles it from a thread.
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        version = None
+        if self.versions is not None and self.tables:
+            version = self.versions.peek(*self.tables)
+            if version is None:
+                return None
+        return snapshot if self._is_fresh(snapshot, version) else None
+
+    def get(self) -> Snapshot:
+        snapshot = self.peek()
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            version  = self._current_version()
+            snapshot = self._snapshot
+            if snapshot is not None and self._is_fresh(snapshot, version):
+                return snapshot
+            return self.store(self.build(), version)
+
+    async def aget(self, build_async) -> Snapshot:
+        snapshot = self.peek()
+        if snapshot is not None:
+            return snapshot
+
+        # Misses on the loop wait for one shared rebuild instead of each
+        # running build_async; shield keeps a cancelled request from
+        # cancelling it for the others.
+        pending = self._pending
+        if pending is None or pending.get_loop() is not asyncio.get_running_loop():
+            pending = self._pending = asyncio.ensure_future(self._rebuild(build_async))
+        return await asyncio.shield(pending)
+
+    async def _rebuild(self, build_async) -> Snapshot:
+        try:
+            version = await asyncio.to_thread(self._current_version)
+            snapshot = self._snapshot
+            if snapshot is not None and self._is_fresh(snapshot, version):
+                return snapshot
+            return self.store(await build_async(), version)
+        finally:
+            if self._pending is asyncio.current_task():
+                self._pending = None
+
+    def store(self, built, version=None) -> Snapshot:
+        self._snapshot = self.serialize(built, version)
+        return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _current_version(self):
+        if self.versions is None or not self.tables:
+            return None
+        return self.versions.get(*self.tables)
+
+    def _is_fresh(self, snapshot: Snapshot, version) -> bool:
+        return snapshot.version == version and time.monotonic() - snapshot.built_at < self.ttl
+
+
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._lock   = threading.Lock()
+        self._items  = OrderedDict()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._items.move_to_end(key)
+            except KeyError:
+                return default
+            return self._items[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+def snapshot(body: bytes, version=None) -> Snapshot:
+    return Snapshot(body, body_etag(body), version, time.monotonic())
+
+def body_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
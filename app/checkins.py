@@ -0,0 +1,170 @@
+import threading
+import time
+
+from sqlalchemy                     import select, insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite     import insert as sqlite_insert
+from sqlalchemy.exc                 import IntegrityError
+
+from pipeline import GroupCommitQueue
+
+
+class CheckinRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail      = detail
+
+
+class MatchCheckins:
+    __slots__ = ("version", "status", "users", "pending", "loaded_at")
+
+    def __init__(self, version, status: str, users: set):
+        self.version   = version
+        self.status    = status
+        self.users     = users
+        self.pending   = set()
+        self.loaded_at = time.monotonic()
+
+
+class CheckinEngine:
+    # Keeps, per match, the status and the set of user ids already checked in,
+    # loaded with one query the first time the match is seen and reloaded when
+    # the matches table version changes or after `state_ttl` seconds (other
+    # workers' writes with memory://, status changes made outside the app).
+    # A scan refused because of the status re-reads it first, so opening
+    # check-in takes effect on the next scan. Repeated scans are rejected
+    # from memory; new check-ins are written in micro-batches that ignore
+    # conflicts, so the unique index on (user_id, match_id) settles races
+    # between workers.
+
+    def __init__(self, checkin_table, match_table, session_factory, versions, batch_size: int = 256, max_wait: float = 0.005, state_ttl: float = 5.0):
+        self.checkins        = checkin_table
+        self.matches         = match_table
+        self.session_factory = session_factory
+        self.versions        = versions
+        self.state_ttl       = state_ttl
+
+        self._lock   = threading.Lock()
+        self._states = {}
+        self.queue   = GroupCommitQueue("checkins", self._write_batch, batch_size=batch_size, max_wait=max_wait)
+
+    def start(self):
+        self.queue.start()
+
+    def stop(self):
+        self.queue.stop()
+
+    def load(self, match_id: int) -> MatchCheckins:
+        version = self.versions.get("matches")
+        db = self.session_factory()
+        try:
+            status = db.execute(select(self.matches.c.status).where(self.matches.c.id == match_id)).scalar()
+            users  = set(db.execute(
+                select(self.checkins.c.user_id).where(self.checkins.c.match_id == match_id)
+            ).scalars())
+        finally:
+            db.close()
+
+        state = MatchCheckins(version, status, users)
+        with self._lock:
+            # Check-ins still waiting for their batch are not in the table
+            # yet; everything else comes from the fresh read.
+            previous = self._states.get(match_id)
+            if previous is not None:
+                state.pending  = previous.pending
+                state.users   |= previous.pending
+            self._states[match_id] = state
+        return state
+
+    def check_in(self, match_id: int, user_id: int, qr_code_url: str):
+        # Returns a Future resolving to qr_code_url once the row is committed.
+        # Duplicates already known to this worker are raised right away.
+        state = self._current_state(match_id)
+        if state is None:
+            state = self.load(match_id)
+        elif state.status != "CHECKIN_OPEN":
+            state.status = self._read_status(match_id)
+
+        if state.status is None:
+            raise CheckinRejected(404, "Match not found")
+        if state.status != "CHECKIN_OPEN":
+            raise CheckinRejected(400, "Check-in is not open for this match")
+
+        with self._lock:
+            if user_id in state.users:
+                raise CheckinRejected(400, "User already checked in for this match")
+            state.users.add(user_id)
+            state.pending.add(user_id)
+
+        future = self.queue.submit((match_id, user_id, qr_code_url))
+        future.add_done_callback(lambda f: self._settle(match_id, user_id, f))
+        return future
+
+    def _current_state(self, match_id: int):
+        with self._lock:
+            state = self._states.get(match_id)
+        if state is None or time.monotonic() - state.loaded_at >= self.state_ttl:
+            return None
+        if state.version != self.versions.get("matches"):
+            return None
+        return state
+
+    def _read_status(self, match_id: int):
+        db = self.session_factory()
+        try:
+            return db.execute(select(self.matches.c.status).where(self.matches.c.id == match_id)).scalar()
+        finally:
+            db.close()
+
+    def _settle(self, match_id: int, user_id: int, future):
+        # A check-in that could not be written (other than a duplicate) must
+        # not block the fan's next scan.
+        error = future.exception()
+        with self._lock:
+            state = self._states.get(match_id)
+            if state is None:
+                return
+            state.pending.discard(user_id)
+            if error is not None and not isinstance(error, CheckinRejected):
+                state.users.discard(user_id)
+
+    def _write_batch(self, items):
+        rows = [
+            {"match_id": match_id, "user_id": user_id, "qr_code_url": qr_code_url}
+            for match_id, user_id, qr_code_url in items
+        ]
+        db = self.session_factory()
+        try:
+            inserted = self._insert_ignoring_duplicates(db, rows)
+            db.commit()
+        finally:
+            db.close()
+
+        return [
+            qr_code_url if (match_id, user_id) in inserted
+            else CheckinRejected(400, "User already checked in for this match")
+            for match_id, user_id, qr_code_url in items
+        ]
+
+    def _insert_ignoring_duplicates(self, db, rows) -> set:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+            result = db.execute(
+                dialect_insert(self.checkins)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=["user_id", "match_id"])
+                .returning(self.checkins.c.match_id, self.checkins.c.user_id)
+            )
+            return {(row.match_id, row.user_id) for row in result}
+
+        inserted = set()
+        for row in rows:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(self.checkins).values(row))
+                inserted.add((row["match_id"], row["user_id"]))
+            except IntegrityError:
+                pass
+        return inserted
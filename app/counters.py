@@ -0,0 +1,21 @@
+class WriteBehindCounter:
+    # Accumulates increments in the shared store and hands them out in bulk
+    # through drain(), so the database sees one write per key per flush
+    # instead of one per event.
+
+    def __init__(self, store, name: str):
+        self.store = store
+        self.name  = name
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        return self.store.hincrby(self.name, key, amount)
+
+    def pending(self, key: str) -> int:
+        return self.store.hget(self.name, key) or 0
+
+    def drain(self) -> dict:
+        return {key: delta for key, delta in self.store.hpopall(self.name).items() if delta}
+
+    def restore(self, deltas: dict):
+        for key, delta in deltas.items():
+            self.store.hincrby(self.name, key, delta)
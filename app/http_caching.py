@@ -0,0 +1,240 @@
+import hashlib
+import time
+import zlib
+
+from collections import namedtuple
+
+from starlette.concurrency    import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+from caching import etag_matches
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+
+# `tables` are the data versions the response is built from, `max_age` goes
+# into Cache-Control and bounds how long an ETag stays valid, and `vary`
+# names the request headers (besides Accept-Encoding) that select a
+# different body for the same URL.
+CachePolicy = namedtuple("CachePolicy", ["tables", "max_age", "vary"], defaults=((),))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/plain", "text/html", "text/csv")
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        return self._compressor.process(data) + (self._compressor.finish() if final else self._compressor.flush())
+
+
+def accepted_codings(accept_encoding: str) -> set:
+    codings = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        codings.add(coding.strip().lower())
+    return codings
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in COMPRESSIBLE_TYPES
+
+
+class HTTPCacheMiddleware:
+    # Validators and compression for the read-mostly routes the mobile app
+    # polls. Routes with a policy get a strong ETag built from the request
+    # (path, query, `vary` headers) and the data versions of their tables,
+    # read before the handler runs. A matching If-None-Match is answered with
+    # 304 here, without routing, database or serialization. The stamp is only
+    # as good as the versions: writes that bypass the ORM session must bump
+    # them, and with memory:// a worker does not see the others' writes. So
+    # the ETag also carries the current `max_age` window: whatever a worker
+    # missed, it stops confirming a body after at most two windows.
+    #
+    # Any JSON or text response of at least `minimum_size` bytes is sent with
+    # br (when the brotli package is installed) or gzip, whichever the client
+    # prefers; streamed bodies are compressed chunk by chunk with a sync
+    # flush, so NDJSON lines still reach the client as they are written.
+    # Compressed bodies carry the ETag with a -br/-gzip suffix, so each coding
+    # is its own strong validator; ETags set by handlers become weak.
+
+    def __init__(self, app, versions, policies: dict, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app            = app
+        self.versions       = versions
+        self.policies       = policies
+        self.minimum_size   = minimum_size
+        self.gzip_level     = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        policy  = self.policies.get(scope["path"]) if scope["method"] in ("GET", "HEAD") else None
+        coding  = self.negotiate(headers.get("accept-encoding")) if scope["method"] != "HEAD" else None
+
+        etag = None
+        if policy is not None:
+            stamp = self.versions.peek_stamp(*policy.tables) or await run_in_threadpool(self.versions.stamp, *policy.tables)
+            etag  = self.etag(scope, headers, policy, stamp)
+            matched = self.matched_etag(headers.get("if-none-match"), etag, coding)
+            if matched is not None:
+                scope["cached_route"] = scope["path"]
+                await self.not_modified(send, policy, matched)
+                return
+
+        if etag is None and coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CachingResponder(self, send, policy, etag, coding)
+        await self.app(scope, receive, responder)
+
+    def negotiate(self, accept_encoding: str):
+        codings = accepted_codings(accept_encoding)
+        if brotli is not None and "br" in codings:
+            return "br"
+        if "gzip" in codings or "*" in codings:
+            return "gzip"
+        return None
+
+    def encoder(self, coding: str):
+        if coding == "br":
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+    def etag(self, scope, headers: Headers, policy: CachePolicy, stamp: tuple) -> str:
+        key = [scope["path"], scope.get("query_string", b"").decode("latin-1")]
+        key.extend(headers.get(name, "") for name in policy.vary)
+        key.extend(str(version) for version in stamp)
+        key.append(str(int(time.time() // max(policy.max_age, 1))))
+        return '"' + hashlib.blake2b("\n".join(key).encode(), digest_size=12).hexdigest() + '"'
+
+    def matched_etag(self, if_none_match: str, etag: str, coding: str):
+        if not if_none_match:
+            return None
+        variants = [etag] if coding is None else [coding_etag(etag, coding), etag]
+        return next((variant for variant in variants if etag_matches(if_none_match, variant)), None)
+
+    async def not_modified(self, send, policy: CachePolicy, etag: str):
+        headers = MutableHeaders()
+        headers["ETag"]          = etag
+        headers["Cache-Control"] = cache_control(policy)
+        headers["Vary"]          = vary_header(policy.vary, True)
+        await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": b""})
+
+
+def cache_control(policy: CachePolicy) -> str:
+    return f"public, max-age={policy.max_age}"
+
+def coding_etag(etag: str, coding: str) -> str:
+    return etag[:-1] + "-" + coding + '"'
+
+def vary_header(names, accept_encoding: bool) -> str:
+    values = [name.title() for name in names]
+    if accept_encoding:
+        values.append("Accept-Encoding")
+    return ", ".join(values)
+
+def add_vary(headers: MutableHeaders, value: str):
+    present = {name.strip().lower() for name in headers.get("vary", "").split(",")}
+    for name in value.split(", "):
+        if name.lower() not in present:
+            headers.add_vary_header(name)
+
+
+class CachingResponder:
+    # The `send` the app sees: stamps policy headers on the start message and
+    # holds it back until the first body chunk shows whether to compress.
+
+    def __init__(self, middleware: HTTPCacheMiddleware, send, policy, etag, coding):
+        self.middleware = middleware
+        self.send       = send
+        self.policy     = policy
+        self.etag       = etag
+        self.coding     = coding
+
+        self.start   = None
+        self.encoder = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = MutableHeaders(scope=message)
+            if self.policy is not None and message["status"] == 200:
+                headers["ETag"]          = self.etag
+                headers["Cache-Control"] = cache_control(self.policy)
+                add_vary(headers, vary_header(self.policy.vary, True))
+            if (
+                self.coding is None
+                or message["status"] < 200 or message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+            ):
+                self.coding = None
+                await self.send(message)
+            return
+
+        body      = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is not None and message["type"] == "http.response.body":
+            await self.send({"type": "http.response.body", "body": self.encoder.encode(body, not more_body), "more_body": more_body})
+            return
+
+        if message["type"] != "http.response.body" or self.start is None:
+            await self.send(message)
+            return
+
+        start, self.start = self.start, None
+        if self.coding is None:
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(scope=start)
+        if not more_body and len(body) < self.middleware.minimum_size:
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.encoder = self.middleware.encoder(self.coding)
+        data = self.encoder.encode(body, not more_body)
+        headers["Content-Encoding"] = self.coding
+        add_vary(headers, "Accept-Encoding")
+        etag = headers.get("etag")
+        if etag is not None and etag == self.etag:
+            headers["ETag"] = coding_etag(etag, self.coding)
+        elif etag is not None and not etag.startswith("W/"):
+            # A handler's own body hash; weak, as it no longer describes
+            # these bytes. etag_matches accepts it back.
+            headers["ETag"] = "W/" + etag
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(data))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
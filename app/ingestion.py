@@ -0,0 +1,229 @@
+import orjson
+
+from typing import List
+
+from pydantic                       import TypeAdapter, ValidationError
+from sqlalchemy                     import insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite     import insert as sqlite_insert
+from sqlalchemy.exc                 import IntegrityError
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+class MalformedRow:
+    __slots__ = ("detail",)
+
+    def __init__(self, detail: str):
+        self.detail = detail
+
+
+def parse_ndjson_line(line: bytes):
+    try:
+        return orjson.loads(line)
+    except orjson.JSONDecodeError:
+        return MalformedRow("Invalid JSON")
+
+async def json_array_batches(body: bytes, size: int):
+    try:
+        items = orjson.loads(body)
+    except orjson.JSONDecodeError as e:
+        raise InvalidPayload("Body is not valid JSON") from e
+    if not isinstance(items, list):
+        raise InvalidPayload("Expected a JSON array")
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+async def ndjson_batches(chunks, size: int):
+    # Yields batches as soon as `size` lines have arrived, so a large upload
+    # is validated and written while the client is still sending it. Blank
+    # lines are skipped and do not count as rows.
+    batch, start, pending = [], 0, b""
+    async for chunk in chunks:
+        lines   = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line.strip():
+                batch.append(parse_ndjson_line(line))
+            if len(batch) >= size:
+                yield start, batch
+                start += len(batch)
+                batch  = []
+    if pending.strip():
+        batch.append(parse_ndjson_line(pending))
+    if batch:
+        yield start, batch
+
+
+def outcome(index: int, status: str, row_id: int = None, detail: str = None) -> dict:
+    return {"index": index, "status": status, "id": row_id, "detail": detail}
+
+def describe_errors(errors) -> str:
+    return "; ".join(
+        (".".join(str(part) for part in error["loc"]) + ": " if error["loc"] else "") + error["msg"]
+        for error in errors
+    )
+
+
+class BulkLoader:
+    # Loads one batch of client rows per transaction. The batch is validated
+    # with a single TypeAdapter pass (a second pass over the valid rows only
+    # when some fail), rows pointing at missing `references` are rejected
+    # with one lookup, and the rest go in as one multi-row INSERT. Rows with a
+    # value in the unique `key` column use ON CONFLICT DO NOTHING and are
+    # matched back by that value, so a duplicate is reported on its row
+    # instead of failing the batch; repeats inside the batch are caught
+    # before the database. If the statement still fails (a constraint the
+    # loader does not know about), the batch is retried row by row under
+    # savepoints to find the offending rows; only a row whose key is taken
+    # is reported with `conflict_detail`.
+
+    def __init__(self, table, model, session_factory, key: str = None, conflict_detail: str = None, references=None):
+        self.table           = table
+        self.adapter         = TypeAdapter(List[model])
+        self.session_factory = session_factory
+        self.key             = key
+        self.conflict_detail = conflict_detail
+        self.references      = references or {}
+
+    def load(self, start: int, items: list) -> list:
+        outcomes = {}
+        rows     = self._validate(items, outcomes)
+
+        db = self.session_factory()
+        try:
+            rows = self._check_references(db, rows, outcomes)
+            rows = self._drop_repeated_keys(rows, outcomes)
+            try:
+                ids = self._insert(db, rows, outcomes)
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                ids = self._insert_row_by_row(db, rows, outcomes)
+                db.commit()
+        finally:
+            db.close()
+
+        for position, _ in rows:
+            row_id = ids.get(position)
+            if row_id is not None:
+                outcomes[position] = outcome(position, "created", row_id)
+            elif position not in outcomes:
+                outcomes[position] = self._key_conflict(position)
+        for position, result in outcomes.items():
+            result["index"] = start + position
+        return [outcomes[position] for position in range(len(items))]
+
+    def _validate(self, items: list, outcomes: dict) -> list:
+        candidates = []
+        for position, item in enumerate(items):
+            if isinstance(item, MalformedRow):
+                outcomes[position] = outcome(position, "invalid", detail=item.detail)
+            else:
+                candidates.append(position)
+
+        try:
+            values = self.adapter.validate_python([items[position] for position in candidates])
+        except ValidationError as e:
+            errors = {}
+            for error in e.errors(include_url=False):
+                errors.setdefault(error["loc"][0], []).append({**error, "loc": error["loc"][1:]})
+            for index, row_errors in errors.items():
+                outcomes[candidates[index]] = outcome(candidates[index], "invalid", detail=describe_errors(row_errors))
+            candidates = [position for index, position in enumerate(candidates) if index not in errors]
+            values     = self.adapter.validate_python([items[position] for position in candidates])
+
+        return list(zip(candidates, self.adapter.dump_python(values)))
+
+    def _check_references(self, db, rows: list, outcomes: dict) -> list:
+        for column, target in self.references.items():
+            wanted = {values[column] for _, values in rows if values[column] is not None}
+            if not wanted:
+                continue
+            found = set(db.execute(select(target).where(target.in_(wanted))).scalars())
+            missing = [(position, values) for position, values in rows if values[column] is not None and values[column] not in found]
+            for position, values in missing:
+                outcomes[position] = outcome(position, "invalid", detail=f"{column}: {values[column]} does not exist")
+            if missing:
+                rows = [(position, values) for position, values in rows if position not in outcomes]
+        return rows
+
+    def _drop_repeated_keys(self, rows: list, outcomes: dict) -> list:
+        if self.key is None:
+            return rows
+        seen, kept = set(), []
+        for position, values in rows:
+            value = values[self.key]
+            if value is not None and value in seen:
+                outcomes[position] = outcome(position, "conflict", detail=f"{self.conflict_detail} (repeated in this batch)")
+                continue
+            seen.add(value)
+            kept.append((position, values))
+        return kept
+
+    def _insert(self, db, rows: list, outcomes: dict) -> dict:
+        dialect = db.get_bind().dialect.name
+        if dialect not in ("postgresql", "sqlite"):
+            return self._insert_row_by_row(db, rows, outcomes)
+
+        ids   = {}
+        keyed = [(position, values) for position, values in rows if self.key is not None and values[self.key] is not None]
+        plain = [(position, values) for position, values in rows if self.key is None or values[self.key] is None]
+
+        if keyed:
+            dialect_insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+            key_column     = self.table.c[self.key]
+            result = db.execute(
+                dialect_insert(self.table)
+                .on_conflict_do_nothing(index_elements=[key_column])
+                .returning(self.table.c.id, key_column),
+                [values for _, values in keyed]
+            )
+            inserted = {key: row_id for row_id, key in result}
+            for position, values in keyed:
+                ids[position] = inserted.get(values[self.key])
+
+        if plain and dialect == "postgresql":
+            result = db.execute(
+                insert(self.table).returning(self.table.c.id, sort_by_parameter_order=True),
+                [values for _, values in plain]
+            )
+            for (position, _), row_id in zip(plain, result.scalars()):
+                ids[position] = row_id
+        elif plain:
+            # SQLAlchemy cannot order RETURNING rows on SQLite and would send
+            # one INSERT per row; unordered, it sends multi-row INSERTs in
+            # parameter order. SQLite hands out rowids in VALUES order and
+            # serializes writers, so the sorted ids line up with the rows.
+            result = db.execute(insert(self.table).returning(self.table.c.id), [values for _, values in plain])
+            for (position, _), row_id in zip(plain, sorted(result.scalars())):
+                ids[position] = row_id
+
+        return ids
+
+    def _insert_row_by_row(self, db, rows: list, outcomes: dict) -> dict:
+        ids = {}
+        for position, values in rows:
+            try:
+                with db.begin_nested():
+                    ids[position] = db.execute(insert(self.table).values(values)).inserted_primary_key[0]
+            except IntegrityError:
+                ids[position] = None
+                if self._key_taken(db, values):
+                    outcomes[position] = self._key_conflict(position)
+                else:
+                    # Some other constraint; which one depends on the driver,
+                    # and its message would show the schema to the client.
+                    outcomes[position] = outcome(position, "invalid", detail="Row violates a database constraint")
+        return ids
+
+    def _key_taken(self, db, values: dict) -> bool:
+        if self.key is None or values[self.key] is None:
+            return False
+        key_column = self.table.c[self.key]
+        return db.execute(select(key_column).where(key_column == values[self.key]).limit(1)).first() is not None
+
+    def _key_conflict(self, position: int) -> dict:
+        return outcome(position, "conflict", detail=self.conflict_detail or "Row conflicts with existing data")
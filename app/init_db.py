@@ -0,0 +1,31 @@
+import os
+
+from sqlalchemy import delete, func, select
+
+from main import Base, Checkin, engine, wait_for_database
+
+# Schema setup runs once per deploy, before the gunicorn workers start, so
+# the workers never race each other on DDL.
+
+if __name__ == "__main__":
+    max_attempts = int(os.getenv("DB_CONNECT_MAX_ATTEMPTS", "10"))
+    if not wait_for_database(max_attempts=max_attempts):
+        raise SystemExit("Não foi possível conectar ao banco de dados após várias tentativas.")
+
+    Base.metadata.create_all(bind=engine)
+
+    # create_all does not touch tables that already exist: drop duplicate
+    # check-ins left from before the unique index, then create every index
+    # the models declare that the database does not have yet.
+    checkins = Checkin.__table__
+    with engine.begin() as connection:
+        connection.execute(
+            delete(checkins).where(
+                checkins.c.id.not_in(select(func.min(checkins.c.id)).group_by(checkins.c.user_id, checkins.c.match_id))
+            )
+        )
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+    print("Esquema do banco de dados criado/atualizado.")
@@ -0,0 +1,139 @@
+import contextvars
+import logging
+import time
+
+from sqlalchemy        import event
+from sqlalchemy.engine import Engine
+
+from metrics import registry, Gauge, Histogram
+
+
+SIZE_BUCKETS  = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving the request to sending the last body chunk.",
+    ("method", "route", "status")
+))
+
+response_size = registry.register(Histogram(
+    "http_response_size_bytes",
+    "Response body size.",
+    ("method", "route"),
+    buckets=SIZE_BUCKETS
+))
+
+request_queries = registry.register(Histogram(
+    "http_request_db_queries",
+    "Database statements executed while serving one request.",
+    ("method", "route"),
+    buckets=QUERY_BUCKETS
+))
+
+request_db_seconds = registry.register(Histogram(
+    "http_request_db_seconds",
+    "Time spent in database statements while serving one request.",
+    ("method", "route")
+))
+
+slow_query_log = logging.getLogger("slow_query")
+
+current_request = contextvars.ContextVar("current_request", default=None)
+
+_in_flight = set()
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # 304s answered by HTTPCacheMiddleware never reach the router; their
+    # routes have no path parameters, so the path is the label.
+    return scope.get("cached_route", "unmatched")
+
+def _count_in_flight():
+    counts = {}
+    for request in list(_in_flight):
+        labels = (request.scope["method"], route_label(request.scope))
+        counts[labels] = counts.get(labels, 0) + 1
+    return counts
+
+registry.register(Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served by this worker.",
+    ("method", "route"),
+    collect=_count_in_flight
+))
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope      = scope
+        self.queries    = 0
+        self.db_seconds = 0.0
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats   = RequestStats(scope)
+        token   = current_request.set(stats)
+        started = time.perf_counter()
+        result  = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                result["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                result["size"] += len(message.get("body", b""))
+            await send(message)
+
+        _in_flight.add(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _in_flight.discard(stats)
+            current_request.reset(token)
+
+            method = scope["method"]
+            route  = route_label(scope)
+            request_duration.observe(time.perf_counter() - started, (method, route, str(result["status"])))
+            response_size.observe(result["size"], (method, route))
+            request_queries.observe(stats.queries, (method, route))
+            request_db_seconds.observe(stats.db_seconds, (method, route))
+
+
+def install_query_hooks(slow_query_ms: float = 0):
+    slow_query_seconds = slow_query_ms / 1000.0
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def record_query_time(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries    += 1
+            stats.db_seconds += elapsed
+
+        if slow_query_seconds and elapsed >= slow_query_seconds:
+            route = route_label(stats.scope) if stats is not None else "background"
+            slow_query_log.warning("%.1f ms em %s: %s", elapsed * 1000, route, " ".join(statement.split()))
+
+    @event.listens_for(Engine, "handle_error")
+    def discard_query_timer(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
@@ -0,0 +1,328 @@
+import random
+import threading
+import time
+
+from sqlalchemy     import select, update, insert
+from sqlalchemy.exc import IntegrityError
+
+
+class TicketInventory:
+    # Stock of each ticket category is split across `shard_count` rows so
+    # concurrent buyers decrement different rows instead of queueing on the
+    # single ticket_categories row. ticket_categories.available_quantity is
+    # kept as a read mirror, refreshed by reconcile(); `mirror_table` holds
+    # the value reconcile() last wrote there, so a restock written straight
+    # to the category is told apart from sales and moved into the shards.
+    #
+    # Shards this worker saw empty are skipped for `sold_out_ttl` seconds,
+    # after which the database is asked again: stock released or restocked
+    # by another worker is seen within that time.
+
+    def __init__(self, shard_table, category_table, mirror_table, shard_count: int = 8, sold_out_ttl: float = 5.0):
+        self.shards       = shard_table
+        self.categories   = category_table
+        self.mirrors      = mirror_table
+        self.shard_count  = max(1, shard_count)
+        self.sold_out_ttl = sold_out_ttl
+
+        self._lock            = threading.Lock()
+        self._provisioned     = set()
+        self._exhausted       = {}
+        self._exhausted_since = {}
+        self._dirty           = set()
+
+    def reserve(self, db, category_id: str, quantity: int) -> bool:
+        if quantity <= 0:
+            return False
+
+        self._ensure_provisioned(db, category_id)
+
+        with self._lock:
+            exhausted = set(self._current_exhausted(category_id))
+
+        if len(exhausted) >= self.shard_count:
+            return False
+
+        start = random.randrange(self.shard_count)
+        for offset in range(self.shard_count):
+            shard = (start + offset) % self.shard_count
+            if shard in exhausted:
+                continue
+
+            result = db.execute(
+                update(self.shards)
+                .where(
+                    self.shards.c.category_id == category_id,
+                    self.shards.c.shard == shard,
+                    self.shards.c.available_quantity >= quantity,
+                )
+                .values(available_quantity=self.shards.c.available_quantity - quantity)
+            )
+            if result.rowcount == 1:
+                self._mark_dirty(category_id)
+                return True
+
+            if quantity == 1:
+                self._mark_exhausted(category_id, shard)
+
+        return self._reserve_across_shards(db, category_id, quantity)
+
+    def reserve_batch(self, db, requests) -> list:
+        # Reserves (category_id, quantity) pairs for a whole group commit in
+        # one transaction. Picking a random shard per request would lock rows
+        # in a different order in each concurrent batch, and two batches
+        # waiting on each other's shards deadlock. Instead each category's
+        # shards are locked in one statement, categories in sorted order and
+        # shards in shard order, and the requests are served from the locked
+        # rows. Returns one bool per request.
+        results     = [False] * len(requests)
+        by_category = {}
+        for index, (category_id, quantity) in enumerate(requests):
+            if quantity > 0:
+                by_category.setdefault(category_id, []).append(index)
+
+        for category_id in sorted(by_category):
+            self._ensure_provisioned(db, category_id)
+            rows = db.execute(
+                select(self.shards.c.shard, self.shards.c.available_quantity)
+                .where(self.shards.c.category_id == category_id)
+                .order_by(self.shards.c.shard)
+                .with_for_update()
+            ).all()
+
+            available = {row.shard: row.available_quantity for row in rows}
+            taken     = dict.fromkeys(available, 0)
+            for index in by_category[category_id]:
+                missing = requests[index][1]
+                if sum(available.values()) < missing:
+                    continue
+                # Fullest shard first, so the shards stay even for buyers
+                # outside the batch.
+                for shard in sorted(available, key=available.get, reverse=True):
+                    part = min(available[shard], missing)
+                    available[shard] -= part
+                    taken[shard]     += part
+                    missing          -= part
+                    if missing == 0:
+                        break
+                results[index] = True
+
+            for shard, quantity in taken.items():
+                if quantity:
+                    db.execute(
+                        update(self.shards)
+                        .where(self.shards.c.category_id == category_id, self.shards.c.shard == shard)
+                        .values(available_quantity=self.shards.c.available_quantity - quantity)
+                    )
+            if any(taken.values()):
+                self._mark_dirty(category_id)
+            if available and not any(available.values()):
+                for shard in available:
+                    self._mark_exhausted(category_id, shard)
+
+        return results
+
+    def is_sold_out(self, category_id: str) -> bool:
+        # Every shard was seen empty by this worker less than `sold_out_ttl`
+        # ago and nothing was released here since, so there is no need to
+        # ask the database again.
+        with self._lock:
+            return len(self._current_exhausted(category_id)) >= self.shard_count
+
+    def release(self, db, category_id: str, quantity: int):
+        shard = random.randrange(self.shard_count)
+        db.execute(
+            update(self.shards)
+            .where(self.shards.c.category_id == category_id, self.shards.c.shard == shard)
+            .values(available_quantity=self.shards.c.available_quantity + quantity)
+        )
+        self._forget_exhausted(category_id)
+        self._mark_dirty(category_id)
+
+    def reconcile(self, bind, category_ids=None) -> int:
+        # Without `category_ids`, reconciles the categories this worker sold
+        # from plus any whose listed quantity was changed since the last
+        # reconcile. Returns how many categories were written.
+        with self._lock:
+            if category_ids is None:
+                category_ids, self._dirty = self._dirty, set()
+                scan = True
+            else:
+                scan = False
+            category_ids = set(category_ids)
+
+        restocked  = []
+        reconciled = 0
+        with bind.begin() as connection:
+            if scan:
+                category_ids.update(connection.execute(
+                    select(self.mirrors.c.category_id)
+                    .join(self.categories, self.categories.c.id == self.mirrors.c.category_id)
+                    .where(self.categories.c.available_quantity != self.mirrors.c.available_quantity)
+                ).scalars())
+
+            for category_id in sorted(category_ids):
+                moved = self._reconcile_category(connection, category_id)
+                if moved is None:
+                    continue
+                reconciled += 1
+                if moved > 0:
+                    restocked.append(category_id)
+
+        for category_id in restocked:
+            self._forget_exhausted(category_id)
+        return reconciled
+
+    def _reconcile_category(self, connection, category_id: str):
+        # Moves whatever the category row was changed by since the last
+        # reconcile into the shards, then writes the shard total to both the
+        # category and the mirror. Returns the quantity moved, or None when
+        # the category has no shards yet.
+        shards = dict(connection.execute(
+            select(self.shards.c.shard, self.shards.c.available_quantity)
+            .where(self.shards.c.category_id == category_id)
+            .order_by(self.shards.c.shard)
+            .with_for_update()
+        ).all())
+        if not shards:
+            return None
+
+        listed = connection.execute(
+            select(self.categories.c.available_quantity)
+            .where(self.categories.c.id == category_id)
+            .with_for_update()
+        ).scalar()
+        mirrored = connection.execute(
+            select(self.mirrors.c.available_quantity).where(self.mirrors.c.category_id == category_id)
+        ).scalar()
+        if mirrored is None:
+            # Provisioned before mirrors were kept: nothing to carry over.
+            connection.execute(insert(self.mirrors).values(category_id=category_id, available_quantity=listed or 0))
+            mirrored = listed
+
+        moved = spread_change(shards, (listed or 0) - (mirrored or 0))
+        for shard, available in shards.items():
+            connection.execute(
+                update(self.shards)
+                .where(self.shards.c.category_id == category_id, self.shards.c.shard == shard, self.shards.c.available_quantity != available)
+                .values(available_quantity=available)
+            )
+
+        total = sum(shards.values())
+        connection.execute(update(self.categories).where(self.categories.c.id == category_id).values(available_quantity=total))
+        connection.execute(update(self.mirrors).where(self.mirrors.c.category_id == category_id).values(available_quantity=total))
+        return moved
+
+    def _reserve_across_shards(self, db, category_id: str, quantity: int) -> bool:
+        # Slow path for orders larger than any single shard holds: lock all
+        # shards of the category in a fixed order and take from each in turn.
+        rows = db.execute(
+            select(self.shards.c.shard, self.shards.c.available_quantity)
+            .where(self.shards.c.category_id == category_id)
+            .order_by(self.shards.c.shard)
+            .with_for_update()
+        ).all()
+
+        if sum(row.available_quantity for row in rows) < quantity:
+            return False
+
+        missing = quantity
+        for row in rows:
+            if missing == 0:
+                break
+            taken = min(row.available_quantity, missing)
+            if taken == 0:
+                continue
+            db.execute(
+                update(self.shards)
+                .where(self.shards.c.category_id == category_id, self.shards.c.shard == row.shard)
+                .values(available_quantity=self.shards.c.available_quantity - taken)
+            )
+            missing -= taken
+
+        self._mark_dirty(category_id)
+        return True
+
+    def _ensure_provisioned(self, db, category_id: str):
+        with self._lock:
+            if category_id in self._provisioned:
+                return
+
+        has_shards = db.execute(
+            select(self.shards.c.shard).where(self.shards.c.category_id == category_id).limit(1)
+        ).first()
+
+        if has_shards is None:
+            available = db.execute(
+                select(self.categories.c.available_quantity).where(self.categories.c.id == category_id)
+            ).scalar()
+            if available is None:
+                return
+            # Only remembered once another call sees the committed rows, so a
+            # rolled back first purchase does not leave the cache lying.
+            self._create_shards(db, category_id, available)
+            return
+
+        with self._lock:
+            self._provisioned.add(category_id)
+
+    def _create_shards(self, db, category_id: str, available: int):
+        base, extra = divmod(available, self.shard_count)
+        rows = [
+            {
+                "category_id"       : category_id,
+                "shard"             : shard,
+                "available_quantity": base + (1 if shard < extra else 0),
+            }
+            for shard in range(self.shard_count)
+        ]
+        try:
+            with db.begin_nested():
+                db.execute(insert(self.shards), rows)
+                db.execute(insert(self.mirrors).values(category_id=category_id, available_quantity=available))
+        except IntegrityError:
+            # Another worker provisioned the same category first.
+            pass
+
+    def _mark_dirty(self, category_id: str):
+        with self._lock:
+            self._dirty.add(category_id)
+
+    def _mark_exhausted(self, category_id: str, shard: int):
+        with self._lock:
+            self._current_exhausted(category_id)
+            self._exhausted.setdefault(category_id, set()).add(shard)
+            self._exhausted_since.setdefault(category_id, time.monotonic())
+
+    def _forget_exhausted(self, category_id: str):
+        with self._lock:
+            self._exhausted.pop(category_id, None)
+            self._exhausted_since.pop(category_id, None)
+
+    def _current_exhausted(self, category_id: str) -> set:
+        # Called with the lock held. The shards seen empty, counted from the
+        # first one, are forgotten together once `sold_out_ttl` has passed.
+        since = self._exhausted_since.get(category_id)
+        if since is not None and time.monotonic() - since >= self.sold_out_ttl:
+            del self._exhausted[category_id]
+            del self._exhausted_since[category_id]
+        return self._exhausted.get(category_id, ())
+
+
+def spread_change(shards: dict, change: int) -> int:
+    # Applies `change` to the shard quantities in place. Stock added goes to
+    # the emptiest shards first and is spread evenly; stock removed comes
+    # from the fullest ones and never below zero, since sold tickets cannot
+    # be taken back. Returns the change actually applied.
+    if change > 0:
+        base, extra = divmod(change, len(shards))
+        for index, shard in enumerate(sorted(shards, key=shards.get)):
+            shards[shard] += base + (1 if index < extra else 0)
+        return change
+
+    missing = -change
+    for shard in sorted(shards, key=shards.get, reverse=True):
+        taken = min(shards[shard], missing)
+        shards[shard] -= taken
+        missing       -= taken
+    return change + missing
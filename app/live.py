@@ -0,0 +1,137 @@
+import asyncio
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryBus:
+    # Local stand-in for the cross-worker bus: messages only reach
+    # subscribers in this process.
+
+    def __init__(self):
+        self._handlers = []
+
+    def subscribe(self, handler):
+        self._handlers.append(handler)
+
+    def publish(self, message: str):
+        for handler in list(self._handlers):
+            handler(message)
+
+    def close(self):
+        self._handlers.clear()
+
+
+class RedisBus:
+    def __init__(self, url: str, channel: str = "live:matches"):
+        self.client  = redis.Redis.from_url(url, decode_responses=True)
+        self.channel = channel
+        self._thread = None
+
+    def subscribe(self, handler):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda message: handler(message["data"])})
+        self._thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+    def publish(self, message: str):
+        self.client.publish(self.channel, message)
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread = None
+
+
+def create_live_bus(url: str = None):
+    if not url or url.startswith("memory://"):
+        return MemoryBus()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is None:
+            raise RuntimeError("LIVE_BUS_URL aponta para o Redis, mas o pacote 'redis' não está instalado.")
+        return RedisBus(url)
+
+    raise ValueError(f"LIVE_BUS_URL não suportada: {url}")
+
+
+class Subscription:
+    # Single-slot mailbox: updates carry the full match state, so a slow
+    # subscriber only ever needs the newest one, and an idle one costs a
+    # small object instead of a queue.
+    __slots__ = ("body", "_waiter")
+
+    def __init__(self):
+        self.body    = None
+        self._waiter = None
+
+    def deliver(self, body: str):
+        self.body = body
+        if self._waiter is not None and not self._waiter.done():
+            self._waiter.set_result(None)
+
+    async def get(self) -> str:
+        while self.body is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        body, self.body = self.body, None
+        return body
+
+
+class LiveBroadcaster:
+    # Every update is published once on the bus as "<match id>\n<json>". Each
+    # worker runs a single fan-out task that hands the same pre-serialized
+    # string to every local subscription of that match.
+
+    def __init__(self, bus):
+        self.bus = bus
+
+        self._subscribers = {}
+        self._loop        = None
+        self._inbox       = None
+        self._task        = None
+
+    def start(self):
+        self._loop  = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+        self._task  = self._loop.create_task(self._fan_out())
+        self.bus.subscribe(self._receive)
+
+    async def stop(self):
+        self.bus.close()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, match_id: int, body: str):
+        self.bus.publish(f"{match_id}\n{body}")
+
+    def subscribe(self, match_id: int) -> Subscription:
+        subscription = Subscription()
+        self._subscribers.setdefault(match_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, match_id: int, subscription: Subscription):
+        subscribers = self._subscribers.get(match_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[match_id]
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def _receive(self, message: str):
+        # Called from whatever thread the bus delivers on.
+        match_id, body = message.split("\n", 1)
+        self._loop.call_soon_threadsafe(self._inbox.put_nowait, (int(match_id), body))
+
+    async def _fan_out(self):
+        while True:
+            match_id, body = await self._inbox.get()
+            for subscription in list(self._subscribers.get(match_id, ())):
+                subscription.deliver(body)
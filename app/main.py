@@ -1,46 +1,213 @@
 import os
 import time
-import json 
+import asyncio
+import itertools
+import logging
+import math
 
+from contextlib     import asynccontextmanager
 from dotenv         import load_dotenv
 from typing         import Optional, List
-from fastapi        import FastAPI, Depends, HTTPException, status 
-from pydantic       import BaseModel, ConfigDict 
+from fastapi        import FastAPI, APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status 
+from fastapi.concurrency import run_in_threadpool
+from fastapi.datastructures import Default
+from fastapi.responses   import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.security    import HTTPBearer, HTTPAuthorizationCredentials
+from pydantic       import BaseModel, ConfigDict, ValidationError
 from datetime       import datetime
-from sqlalchemy     import create_engine, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, text
-from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship
+from sqlalchemy     import create_engine, event, select, insert, update, delete, func, and_, bindparam, inspect, Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, text
+from sqlalchemy.orm import sessionmaker, declarative_base, Session, relationship, joinedload
 from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from admission      import AdmissionControl, AdmissionRejected, ConcurrencyLimiter, RateLimiter
+from benefits       import BenefitsCatalog, CatalogEntry, normalize_search_text, parse_how_to_use
+from caching        import DataVersions, LRUCache, Snapshot, SnapshotCache, body_etag, etag_matches
+from checkins       import CheckinEngine, CheckinRejected
+from counters       import WriteBehindCounter
+from http_caching   import CachePolicy, HTTPCacheMiddleware
+from ingestion      import BulkLoader, InvalidPayload, json_array_batches, ndjson_batches
+from instrumentation import InstrumentationMiddleware, install_query_hooks
+from inventory      import TicketInventory
+from live           import LiveBroadcaster, create_live_bus
+from metrics        import registry, Gauge
+from pagination     import InvalidCursor, Keyset, ndjson_lines
+from pipeline       import GroupCommitQueue
+from pool_telemetry import InstrumentedQueuePool, InstrumentedAsyncQueuePool
+from qr_images      import MEDIA_TYPES, QRImageCache
+from responses      import FastJSONResponse
+from search         import SearchSource, create_search_backend
+from security       import InvalidTicket, InvalidToken, PasswordHasher, PasswordHasherBusy, Principal, TicketClaims, TicketSigner, decode_access_token, derive_key, encode_access_token
+from shared_store   import create_shared_store
+from tasks          import PeriodicTask
+from waiting_room   import QueueRejected, QueueStatus, WaitingRoom
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.database_ready = False
+    app.state.database_slots = asyncio.Semaphore(DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    database_waiter = asyncio.create_task(wait_for_database_async(app))
+    inventory_reconciler.start()
+    news_view_flusher.start()
+    if TICKET_PURCHASE_MODE == "batched":
+        ticket_purchase_queue.start()
+    checkin_engine.start()
+    live_updates.start()
+    yield
+    await live_updates.stop()
+    checkin_engine.stop()
+    ticket_purchase_queue.stop()
+    news_view_flusher.stop()
+    inventory_reconciler.stop()
+    database_waiter.cancel()
+    password_hasher.shutdown()
+    qr_images.shutdown()
+    if async_engine is not None:
+        await async_engine.dispose()
+
 app = FastAPI(
-    title       = "API de Sócio Torcedor Ferroviário",
-    version     = "0.2.0",
-    description = "Backend para aplicação mobile de sócio torcedor."
+    title                  = "API de Sócio Torcedor Ferroviário",
+    version                = "0.2.0",
+    description            = "Backend para aplicação mobile de sócio torcedor.",
+    lifespan               = lifespan,
+    default_response_class = Default(FastJSONResponse)
 )
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = None
-retry_count = 0
-max_retries = 10
-while engine is None and retry_count < max_retries:
+def async_database_url(url: str) -> str:
+    for sync_scheme, async_scheme in (
+        ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+        ("postgresql://",          "postgresql+asyncpg://"),
+        ("sqlite://",              "sqlite+aiosqlite://"),
+    ):
+        if url.startswith(sync_scheme):
+            return async_scheme + url[len(sync_scheme):]
+    return url
+
+DATABASE_MODE      = os.getenv("DATABASE_MODE", "sync")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+TICKET_STOCK_SHARDS          = int(os.getenv("TICKET_STOCK_SHARDS", "8"))
+INVENTORY_RECONCILE_INTERVAL = float(os.getenv("INVENTORY_RECONCILE_INTERVAL", "2"))
+TICKET_SOLD_OUT_TTL          = float(os.getenv("TICKET_SOLD_OUT_TTL", "5"))
+TICKET_PURCHASE_MODE         = os.getenv("TICKET_PURCHASE_MODE", "direct")
+PURCHASE_BATCH_SIZE          = int(os.getenv("PURCHASE_BATCH_SIZE", "64"))
+PURCHASE_BATCH_MAX_WAIT_MS   = float(os.getenv("PURCHASE_BATCH_MAX_WAIT_MS", "5"))
+SHARED_STORE_URL             = os.getenv("SHARED_STORE_URL", "memory://")
+LIVE_BUS_URL                 = os.getenv("LIVE_BUS_URL", SHARED_STORE_URL)
+LIVE_SSE_HEARTBEAT           = float(os.getenv("LIVE_SSE_HEARTBEAT", "15"))
+NEWS_VIEW_FLUSH_INTERVAL     = float(os.getenv("NEWS_VIEW_FLUSH_INTERVAL", "5"))
+DASHBOARD_CACHE_TTL          = float(os.getenv("DASHBOARD_CACHE_TTL", "30"))
+BENEFITS_CACHE_TTL           = float(os.getenv("BENEFITS_CACHE_TTL", "3600"))
+COMPRESSION_MIN_SIZE         = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL       = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY   = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+BULK_INSERT_CHUNK_SIZE       = int(os.getenv("BULK_INSERT_CHUNK_SIZE", "1000"))
+SEARCH_RANK_WINDOW           = int(os.getenv("SEARCH_RANK_WINDOW", "0"))
+
+DB_POOL_SIZE                 = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW              = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT              = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE              = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING             = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS      = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+DB_CONNECT_INITIAL_BACKOFF   = float(os.getenv("DB_CONNECT_INITIAL_BACKOFF", "0.5"))
+DB_CONNECT_MAX_BACKOFF       = float(os.getenv("DB_CONNECT_MAX_BACKOFF", "10"))
+METRICS_ENABLED              = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+SLOW_QUERY_LOG_MS            = float(os.getenv("SLOW_QUERY_LOG_MS", "0"))
+AUTH_SECRET_KEY              = os.getenv("AUTH_SECRET_KEY")
+ACCESS_TOKEN_TTL             = int(os.getenv("ACCESS_TOKEN_TTL", "86400"))
+PRINCIPAL_CACHE_SIZE         = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PASSWORD_HASH_WORKERS        = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING    = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+PASSWORD_HASH_SCRYPT_N       = int(os.getenv("PASSWORD_HASH_SCRYPT_N", "16384"))
+PASSWORD_HASH_NICE           = int(os.getenv("PASSWORD_HASH_NICE", "10"))
+RATE_LIMIT_USER_RATE         = float(os.getenv("RATE_LIMIT_USER_RATE", "1"))
+RATE_LIMIT_USER_BURST        = int(os.getenv("RATE_LIMIT_USER_BURST", "5"))
+RATE_LIMIT_ROUTE_RATE        = float(os.getenv("RATE_LIMIT_ROUTE_RATE", "500"))
+RATE_LIMIT_ROUTE_BURST       = int(os.getenv("RATE_LIMIT_ROUTE_BURST", "1000"))
+WAITING_ROOM_ENABLED         = os.getenv("WAITING_ROOM_ENABLED", "false").lower() in ("1", "true", "yes")
+WAITING_ROOM_ADMIT_RATE      = float(os.getenv("WAITING_ROOM_ADMIT_RATE", "50"))
+WAITING_ROOM_BURST           = int(os.getenv("WAITING_ROOM_BURST", "100"))
+WAITING_ROOM_WINDOW          = float(os.getenv("WAITING_ROOM_WINDOW", "300"))
+WAITING_ROOM_PASS_USES       = int(os.getenv("WAITING_ROOM_PASS_USES", "1"))
+TICKET_SIGNING_SECRET        = os.getenv("TICKET_SIGNING_SECRET")
+TICKET_SIGNING_ED25519_KEY   = os.getenv("TICKET_SIGNING_ED25519_KEY")
+TICKET_CODE_GRACE_HOURS      = float(os.getenv("TICKET_CODE_GRACE_HOURS", "6"))
+TICKET_VERIFY_BATCH_MAX      = int(os.getenv("TICKET_VERIFY_BATCH_MAX", "1000"))
+QR_CACHE_DIR                 = os.getenv("QR_CACHE_DIR", "qr_cache")
+QR_RENDER_WORKERS            = int(os.getenv("QR_RENDER_WORKERS", "2"))
+CHECKIN_BATCH_SIZE           = int(os.getenv("CHECKIN_BATCH_SIZE", "256"))
+CHECKIN_BATCH_MAX_WAIT_MS    = float(os.getenv("CHECKIN_BATCH_MAX_WAIT_MS", "5"))
+CHECKIN_STATE_TTL            = float(os.getenv("CHECKIN_STATE_TTL", "5"))
+ADMISSION_MAX_CONCURRENCY    = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+
+if not AUTH_SECRET_KEY:
+    raise RuntimeError("AUTH_SECRET_KEY não configurada.")
+
+def engine_options(url: str, async_mode: bool = False) -> dict:
+    options = {
+        "poolclass"    : InstrumentedAsyncQueuePool if async_mode else InstrumentedQueuePool,
+        "pool_size"    : DB_POOL_SIZE,
+        "max_overflow" : DB_MAX_OVERFLOW,
+        "pool_timeout" : DB_POOL_TIMEOUT,
+        "pool_recycle" : DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+    if DB_STATEMENT_TIMEOUT_MS > 0 and url.startswith("postgresql"):
+        if async_mode:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+if METRICS_ENABLED:
+    install_query_hooks(slow_query_ms=SLOW_QUERY_LOG_MS)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+def check_database() -> bool:
     try:
-        engine = create_engine(DATABASE_URL)
         with engine.connect() as connection:
-            print("Conexão com o banco de dados estabelecida com sucesso!")
-        break
-
+            return connection.execute(text("SELECT 1")).scalar() == 1
     except OperationalError:
-        retry_count += 1
-        print(f"Banco de dados não está pronto, aguardando... Tentativa {retry_count}/{max_retries}")
-        time.sleep(5)
-
-if engine is None:
-    raise RuntimeError("Não foi possível conectar ao banco de dados após várias tentativas.")
+        return False
+
+def wait_for_database(max_attempts: Optional[int] = None) -> bool:
+    attempt = 0
+    delay   = DB_CONNECT_INITIAL_BACKOFF
+    while not check_database():
+        attempt += 1
+        if max_attempts is not None and attempt >= max_attempts:
+            return False
+        print(f"Banco de dados não está pronto, aguardando {delay:.1f}s... Tentativa {attempt}")
+        time.sleep(delay)
+        delay = min(delay * 2, DB_CONNECT_MAX_BACKOFF)
+    print("Conexão com o banco de dados estabelecida com sucesso!")
+    return True
+
+async def wait_for_database_async(app: FastAPI):
+    attempt = 0
+    delay   = DB_CONNECT_INITIAL_BACKOFF
+    while not await run_in_threadpool(check_database):
+        attempt += 1
+        print(f"Banco de dados não está pronto, aguardando {delay:.1f}s... Tentativa {attempt}")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, DB_CONNECT_MAX_BACKOFF)
+    print("Conexão com o banco de dados estabelecida com sucesso!")
+    app.state.database_ready = True
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine      = None
+AsyncSessionLocal = None
+if DATABASE_MODE == "async":
+    async_engine      = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, async_mode=True))
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 class Player(Base):
@@ -78,6 +245,24 @@ class Match(Base):
     competition = relationship("Competition", backref="matches")
     ticket_categories = relationship("TicketCategory", back_populates="match") 
 
+def match_status_in(*statuses):
+    # The statuses are rendered inline rather than bound: a planner only uses
+    # a partial index when it can see the query implies the index predicate.
+    return Match.status.in_(bindparam("statuses", statuses, expanding=True, literal_execute=True))
+
+ACTIVE_MATCH  = match_status_in("upcoming", "live")
+ON_SALE_MATCH = match_status_in("SALE_OPEN", "CHECKIN_OPEN")
+HOME_MATCH    = Match.is_home_game == True
+
+# Partial indexes whose predicates are the match list filters above, so each
+# list is a range scan in (match_datetime, id) order with no sort.
+def match_schedule_index(name: str, predicate) -> Index:
+    return Index(name, Match.match_datetime, Match.id, postgresql_where=predicate, sqlite_where=predicate)
+
+match_schedule_index("ix_matches_active_schedule",      ACTIVE_MATCH)
+match_schedule_index("ix_matches_active_home_schedule", and_(HOME_MATCH, ACTIVE_MATCH))
+match_schedule_index("ix_matches_on_sale",              ON_SALE_MATCH)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -106,6 +291,9 @@ class Card(Base):
 
 class News(Base):
     __tablename__ = "news"
+    __table_args__ = (
+        Index("ix_news_published_at", "published_at"),
+    )
     id            = Column(String, primary_key=True, index=True)
     category      = Column(String)
     title         = Column(String)
@@ -118,6 +306,9 @@ class News(Base):
 
 class PressConference(Base):
     __tablename__ = "press_conferences"
+    __table_args__ = (
+        Index("ix_press_conferences_published_at", "published_at"),
+    )
     id            = Column(String, primary_key=True, index=True)
     title         = Column(String)
     video_thumbnail_url = Column(String, nullable=True)
@@ -126,6 +317,9 @@ class PressConference(Base):
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_published_at", "published_at"),
+    )
     id            = Column(String, primary_key=True, index=True)
     title         = Column(String)
     video_thumbnail_url = Column(String, nullable=True)
@@ -139,6 +333,9 @@ class UserNewsLike(Base):
 
 class TicketCategory(Base):
     __tablename__ = "ticket_categories"
+    __table_args__ = (
+        Index("ix_ticket_categories_match", "match_id", "id"),
+    )
     id                 = Column(String, primary_key=True, index=True) 
     match_id           = Column(Integer, ForeignKey("matches.id"))
     name               = Column(String)
@@ -147,6 +344,19 @@ class TicketCategory(Base):
 
     match = relationship("Match", back_populates="ticket_categories")
 
+class TicketStockShard(Base):
+    __tablename__ = "ticket_stock_shards"
+    category_id        = Column(String, ForeignKey("ticket_categories.id"), primary_key=True)
+    shard              = Column(Integer, primary_key=True)
+    available_quantity = Column(Integer, nullable=False)
+
+class TicketStockMirror(Base):
+    # ticket_categories.available_quantity as the inventory reconciler last
+    # wrote it; see TicketInventory.
+    __tablename__ = "ticket_stock_mirrors"
+    category_id        = Column(String, ForeignKey("ticket_categories.id"), primary_key=True)
+    available_quantity = Column(Integer, nullable=False)
+
 class Order(Base):
     __tablename__ = "orders"
     id             = Column(String, primary_key=True, index=True) 
@@ -166,6 +376,9 @@ class Order(Base):
 
 class Checkin(Base):
     __tablename__ = "checkins"
+    __table_args__ = (
+        Index("uq_checkins_user_match", "user_id", "match_id", unique=True),
+    )
     id             = Column(Integer, primary_key=True, index=True)
     user_id        = Column(Integer, ForeignKey("users.id"))
     match_id       = Column(Integer, ForeignKey("matches.id"))
@@ -187,8 +400,145 @@ class Partner(Base):
     how_to_use      = Column(Text, nullable=True) 
     description     = Column(Text, nullable=True)
 
+FEATURED_PARTNER = Partner.is_featured == True
+
+Index("ix_partners_featured", Partner.id, postgresql_where=FEATURED_PARTNER, sqlite_where=FEATURED_PARTNER)
+
+SEARCH_SOURCES = (
+    SearchSource("news",              News.__table__),
+    SearchSource("videos",            Video.__table__),
+    SearchSource("press_conferences", PressConference.__table__),
+)
+
+search_backend = create_search_backend(engine.dialect.name, SEARCH_SOURCES, SEARCH_RANK_WINDOW)
+
+# Postgres gets a generated tsvector column with a GIN index, SQLite an FTS5
+# table; both are created with the schema and backfilled once.
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    if search_backend is not None:
+        search_backend.create(connection)
 
-Base.metadata.create_all(bind=engine)
+
+ticket_inventory = TicketInventory(
+    shard_table    = TicketStockShard.__table__,
+    category_table = TicketCategory.__table__,
+    mirror_table   = TicketStockMirror.__table__,
+    shard_count    = TICKET_STOCK_SHARDS,
+    sold_out_ttl   = TICKET_SOLD_OUT_TTL
+)
+
+def reconcile_inventory():
+    # Writes ticket_categories outside the ORM session, so it bumps the
+    # version itself for the caches that show availability.
+    if ticket_inventory.reconcile(engine):
+        data_versions.bump(TicketCategory.__tablename__)
+
+inventory_reconciler = PeriodicTask(
+    "inventory-reconciler",
+    INVENTORY_RECONCILE_INTERVAL,
+    reconcile_inventory
+)
+
+shared_store = create_shared_store(SHARED_STORE_URL)
+
+data_versions = DataVersions(shared_store)
+
+HTTP_CACHE_POLICIES = {
+    "/api/v1/matches":         CachePolicy(("matches", "competitions", "ticket_categories"), 10),
+    "/api/v1/games_schedule/": CachePolicy(("matches",), 60, vary=("accept",)),
+    "/api/v1/home_games/":     CachePolicy(("matches",), 60, vary=("accept",)),
+    "/api/v1/players/":        CachePolicy(("players",), 300, vary=("accept",)),
+    "/api/v1/competitions/":   CachePolicy(("competitions",), 300, vary=("accept",)),
+    "/api/v1/benefits":        CachePolicy(("partners",), 300),
+}
+
+app.add_middleware(
+    HTTPCacheMiddleware,
+    versions       = data_versions,
+    policies       = HTTP_CACHE_POLICIES,
+    minimum_size   = COMPRESSION_MIN_SIZE,
+    gzip_level     = COMPRESSION_GZIP_LEVEL,
+    brotli_quality = COMPRESSION_BROTLI_QUALITY
+)
+if METRICS_ENABLED:
+    # Outermost, so response sizes are bytes on the wire and 304s count.
+    app.add_middleware(InstrumentationMiddleware)
+
+# Counters no cached response shows (like toggles, flushed views). An UPDATE
+# that only touches them does not bump the table's version, so fans liking a
+# story do not keep throwing away the dashboard snapshot.
+COUNTER_COLUMNS = {
+    "news": frozenset({"like_count", "view_count"}),
+}
+
+def only_counters_updated(table, columns) -> bool:
+    counters = COUNTER_COLUMNS.get(table.name)
+    if not counters or not columns:
+        return False
+    return set(columns) - set(table.primary_key.columns.keys()) <= counters
+
+def updated_columns(orm_execute_state) -> set:
+    values = getattr(orm_execute_state.statement, "_values", None)
+    if values:
+        return {getattr(column, "key", column) for column in values}
+    parameters = orm_execute_state.parameters
+    if isinstance(parameters, dict):
+        parameters = [parameters]
+    return {key for row in parameters or () for key in row}
+
+@event.listens_for(Session, "do_orm_execute")
+def track_written_tables_on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is None:
+            return
+        if orm_execute_state.is_update and only_counters_updated(table, updated_columns(orm_execute_state)):
+            return
+        orm_execute_state.session.info.setdefault("written_tables", set()).add(table.name)
+
+@event.listens_for(Session, "after_flush")
+def track_written_tables_on_flush(session, flush_context):
+    written_tables = session.info.setdefault("written_tables", set())
+    for instance in itertools.chain(session.new, session.deleted):
+        written_tables.add(instance.__table__.name)
+    for instance in session.dirty:
+        state   = inspect(instance)
+        changed = [attr.key for attr in state.attrs if attr.history.has_changes()]
+        if not only_counters_updated(instance.__table__, changed):
+            written_tables.add(instance.__table__.name)
+
+@event.listens_for(Session, "after_commit")
+def bump_written_tables(session):
+    written_tables = session.info.pop("written_tables", None)
+    if written_tables:
+        data_versions.bump(*written_tables)
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_written_tables(session, previous_transaction):
+    session.info.pop("written_tables", None)
+
+news_view_counter = WriteBehindCounter(shared_store, "news:view_count")
+
+def flush_news_views():
+    deltas = news_view_counter.drain()
+    if not deltas:
+        return
+
+    news_table = News.__table__
+    try:
+        with engine.begin() as connection:
+            connection.execute(
+                update(news_table)
+                .where(news_table.c.id == bindparam("news_id"))
+                .values(view_count=func.coalesce(news_table.c.view_count, 0) + bindparam("delta")),
+                [{"news_id": news_id, "delta": delta} for news_id, delta in deltas.items()]
+            )
+    except Exception:
+        news_view_counter.restore(deltas)
+        raise
+
+news_view_flusher = PeriodicTask("news-view-flusher", NEWS_VIEW_FLUSH_INTERVAL, flush_news_views)
 
 class PlayerBase(BaseModel):
     name: str
@@ -234,6 +584,23 @@ class MatchResponse(MatchBase):
     id: int
     model_config = ConfigDict(from_attributes=True)
 
+class BulkRowResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+class BulkIngestResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkRowResult]
+
+class MatchUpdate(BaseModel):
+    status: Optional[str] = None
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+    highlights_url: Optional[str] = None
+
 class UserLogin(BaseModel):
     email: str
     password: str
@@ -319,6 +686,18 @@ class NewsDetailResponse(BaseModel):
     like_count: int
     user_has_liked: bool
 
+class SearchResult(BaseModel):
+    type: str
+    id: str
+    title: str
+    title_highlight: str
+    snippet: Optional[str] = None
+    published_at: Optional[datetime] = None
+
+class SearchResponse(BaseModel):
+    query: str
+    results: List[SearchResult]
+
 class LikeNewsResponse(BaseModel):
     like_count: int
     user_has_liked: bool
@@ -356,6 +735,43 @@ class TicketPurchaseResponse(BaseModel):
     order_id: str
     status: str
     qr_code_url: Optional[str] = None
+    ticket_code: Optional[str] = None
+
+class TicketVerifyRequest(BaseModel):
+    code: str
+    match_id: Optional[int] = None
+
+class TicketBatchVerifyRequest(BaseModel):
+    codes: List[str]
+    match_id: Optional[int] = None
+
+class TicketVerifyResponse(BaseModel):
+    valid: bool
+    reason: Optional[str] = None
+    order_id: Optional[str] = None
+    match_id: Optional[int] = None
+    category_id: Optional[str] = None
+    user_id: Optional[int] = None
+    quantity: Optional[int] = None
+    expires_at: Optional[int] = None
+
+class TicketBatchVerifyResponse(BaseModel):
+    results: List[TicketVerifyResponse]
+
+class TicketSigningKeyResponse(BaseModel):
+    algorithm: str
+    public_key: str
+
+class QueueStatusResponse(BaseModel):
+    match_id: int
+    position: int
+    ahead: int
+    admitted: bool
+    eta_seconds: int
+    expires_at: int
+
+class QueueJoinResponse(QueueStatusResponse):
+    queue_token: str
 
 class CheckinResponse(BaseModel):
     message: str
@@ -383,31 +799,162 @@ class BenefitDetailResponse(BaseModel):
     how_to_use: List[str]
     description: str
 
-def get_db():
+async def database_slot(request: Request):
+    # Requests wait for a connection here, on the event loop and in arrival
+    # order, instead of in the pool. A sync route keeps its connection until
+    # FastAPI has validated the response, which takes a second threadpool
+    # thread: with more threads than connections, threads blocked on the
+    # pool could starve the ones holding it until pool_timeout. Async routes
+    # would pile up in the pool's queue past pool_timeout the same way.
+    async with request.app.state.database_slots:
+        yield
+
+def get_db(slot: None = Depends(database_slot)):
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-def get_current_user_mock(db: Session = Depends(get_db)):
-     
-    user_id = 1 
-    user = db.query(User).filter(User.id == user_id).first()
+async def get_async_db(slot: None = Depends(database_slot)):
+    async with AsyncSessionLocal() as db:
+        yield db
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+password_hasher = PasswordHasher(
+    workers     = PASSWORD_HASH_WORKERS,
+    max_pending = PASSWORD_HASH_MAX_PENDING,
+    n           = PASSWORD_HASH_SCRYPT_N,
+    nice        = PASSWORD_HASH_NICE
+)
+
+# Verified against when the e-mail is unknown, so both cases cost the same.
+DUMMY_PASSWORD_HASH = password_hasher.hash("")
+
+principal_cache = LRUCache(PRINCIPAL_CACHE_SIZE)
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[Principal]:
+    if credentials is None:
+        return None
+    try:
+        claims = decode_access_token(credentials.credentials, AUTH_SECRET_KEY)
+        return Principal(id=int(claims["sub"]), username=claims.get("name"), email=claims.get("email"))
+    except (InvalidToken, KeyError, ValueError):
+        raise credentials_exception()
+
+async def get_current_user(principal: Optional[Principal] = Depends(get_optional_user)) -> Principal:
+    if principal is None:
+        raise credentials_exception()
+    return principal
+
+def get_current_member(principal: Principal = Depends(get_current_user), db: Session = Depends(get_db)) -> Principal:
+    users_version = data_versions.get("users")
+    cached = principal_cache.get(principal.id)
+    if cached is not None and cached[0] == users_version:
+        return cached[1]
+
+    user = db.get(User, principal.id)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    return user
+        raise credentials_exception()
+
+    member = Principal(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        tubarao_id=user.tubarao_id,
+        full_name=user.full_name,
+        cpf=user.cpf,
+        birth_date=user.birth_date,
+        gender=user.gender,
+        phone_number=user.phone_number
+    )
+    principal_cache.put(principal.id, (users_version, member))
+    return member
+
+admission_control = AdmissionControl(
+    user_limiter  = RateLimiter(shared_store, "ratelimit:user", RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST),
+    route_limiter = RateLimiter(shared_store, "ratelimit:route", RATE_LIMIT_ROUTE_RATE, RATE_LIMIT_ROUTE_BURST),
+    concurrency   = ConcurrencyLimiter(ADMISSION_MAX_CONCURRENCY)
+)
+
+def queued_concurrency(batch_size: int) -> ConcurrencyLimiter:
+    # Requests handed to a GroupCommitQueue wait without a connection, and
+    # the pool-sized cap would also cap every batch at the pool size. They
+    # get their own cap instead: one batch committing and one filling.
+    return ConcurrencyLimiter(2 * batch_size if ADMISSION_MAX_CONCURRENCY > 0 else 0)
+
+purchase_queue_concurrency = queued_concurrency(PURCHASE_BATCH_SIZE)
+checkin_queue_concurrency  = queued_concurrency(CHECKIN_BATCH_SIZE)
+
+def admitted_user(route: str, concurrency=None):
+    # Rate limits and the concurrency cap are checked right after the token,
+    # before the route opens a database connection. `concurrency` returns
+    # the cap for this request; None means the pool-sized one.
+    def dependency(current_user: Principal = Depends(get_current_user)):
+        limiter = concurrency() if concurrency is not None else None
+        try:
+            admission_control.enter(route, current_user.id, limiter)
+        except AdmissionRejected as e:
+            detail = "Service overloaded, try again shortly" if e.status_code == 503 else "Too many requests"
+            raise HTTPException(
+                status_code=e.status_code,
+                detail=detail,
+                headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))}
+            )
+        try:
+            yield current_user
+        finally:
+            admission_control.exit(limiter)
+    return dependency
+
+admit_ticket_purchase = admitted_user(
+    "tickets_orders",
+    lambda: purchase_queue_concurrency if TICKET_PURCHASE_MODE == "batched" else None
+)
+admit_checkin         = admitted_user("checkin", lambda: checkin_queue_concurrency)
+admit_queue_join      = admitted_user("queue_join")
+
+waiting_room = WaitingRoom(
+    shared_store,
+    derive_key(AUTH_SECRET_KEY, "queue"),
+    rate   = WAITING_ROOM_ADMIT_RATE,
+    burst  = WAITING_ROOM_BURST,
+    window = WAITING_ROOM_WINDOW,
+    uses   = WAITING_ROOM_PASS_USES
+)
+
+def use_queue_pass(queue_token: Optional[str], user_id: int, match_id: int):
+    # Returns the spent use for refund_queue_pass, or None without a waiting
+    # room.
+    if not WAITING_ROOM_ENABLED:
+        return None
+    try:
+        return waiting_room.use(queue_token, user_id, match_id)
+    except QueueRejected as e:
+        if e.retry_after:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+        raise HTTPException(status_code=403, detail=str(e))
+
+def refund_queue_pass(used):
+    if used is not None:
+        waiting_room.refund(used)
+
+sync_routes  = APIRouter()
+async_routes = APIRouter()
 
 @app.get("/")
 async def read_root():
     return {"message": "Bem-vindo à API de Sócio Torcedor! Módulo Esportivo Operante."}
 
-@app.get("/status")
-async def get_status():
+def database_status() -> dict:
     try:
         with engine.connect() as connection:
             result = connection.execute(text("SELECT 1")).scalar()
@@ -418,6 +965,56 @@ async def get_status():
     except Exception as e:
         return {"status": "error", "database": f"connection failed: {str(e)}"}
 
+@app.get("/status")
+async def get_status():
+    return await run_in_threadpool(database_status)
+
+@app.get("/status/live")
+async def get_liveness():
+    return {"status": "ok"}
+
+@app.get("/status/ready")
+async def get_readiness():
+    if app.state.database_ready and await run_in_threadpool(check_database):
+        return {"status": "ok", "database": "connected"}
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"status": "starting", "database": "not connected"})
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def list_response(request: Request, response: Response, db: Session, stmt, keyset: Keyset, model, cursor: Optional[str], limit: Optional[int], skip: int = 0):
+    # Plain JSON list, one page at a time; the next page's cursor goes in
+    # X-Next-Cursor and a Link header. Without a limit every row from
+    # `cursor` on is returned in one list. With "Accept: application/x-ndjson"
+    # the whole result from `cursor` on is streamed instead.
+    try:
+        stmt = keyset.apply(stmt, cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        return StreamingResponse(ndjson_lines(SessionLocal, stmt, model), media_type=NDJSON_MEDIA_TYPE)
+
+    if skip:
+        stmt = stmt.offset(skip)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    rows = db.scalars(stmt).all()
+
+    if limit is not None and len(rows) == limit:
+        next_cursor = keyset.encode(rows[-1])
+        next_url    = request.url.remove_query_params("skip").include_query_params(cursor=next_cursor)
+        response.headers["X-Next-Cursor"] = next_cursor
+        response.headers["Link"]          = f'<{next_url}>; rel="next"'
+    return rows
+
+player_keyset      = Keyset(Player.id)
+competition_keyset = Keyset(Competition.id)
+match_keyset       = Keyset(Match.match_datetime, Match.id)
+
 @app.post("/api/v1/players/", response_model=PlayerResponse)
 def create_player(player: PlayerCreate, db: Session = Depends(get_db)):
     db_player = Player(**player.model_dump())
@@ -427,9 +1024,8 @@ def create_player(player: PlayerCreate, db: Session = Depends(get_db)):
     return db_player
 
 @app.get("/api/v1/players/", response_model=List[PlayerResponse])
-def read_players(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    players = db.query(Player).offset(skip).limit(limit).all()
-    return players
+def read_players(request: Request, response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    return list_response(request, response, db, select(Player), player_keyset, PlayerResponse, cursor, limit, skip)
 
 @app.get("/api/v1/players/{player_id}", response_model=PlayerResponse)
 def read_player(player_id: int, db: Session = Depends(get_db)):
@@ -447,9 +1043,8 @@ def create_competition(competition: CompetitionCreate, db: Session = Depends(get
     return db_competition
 
 @app.get("/api/v1/competitions/", response_model=List[CompetitionResponse])
-def read_competitions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    competitions = db.query(Competition).offset(skip).limit(limit).all()
-    return competitions
+def read_competitions(request: Request, response: Response, cursor: Optional[str] = None, skip: int = 0, limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    return list_response(request, response, db, select(Competition), competition_keyset, CompetitionResponse, cursor, limit, skip)
 
 @app.get("/api/v1/competitions/{competition_id}", response_model=CompetitionResponse)
 def read_competition(competition_id: int, db: Session = Depends(get_db)):
@@ -466,6 +1061,55 @@ def create_match(match: MatchCreate, db: Session = Depends(get_db)):
     db.refresh(db_match)
     return db_match
 
+player_loader = BulkLoader(
+    Player.__table__, PlayerCreate, SessionLocal,
+    key             = "number",
+    conflict_detail = "Player number already taken"
+)
+
+competition_loader = BulkLoader(
+    Competition.__table__, CompetitionCreate, SessionLocal,
+    key             = "name",
+    conflict_detail = "Competition name already exists"
+)
+
+match_loader = BulkLoader(
+    Match.__table__, MatchCreate, SessionLocal,
+    references = {"competition_id": Competition.__table__.c.id}
+)
+
+async def bulk_ingest(request: Request, loader: BulkLoader) -> Response:
+    # Accepts a JSON array or, with Content-Type application/x-ndjson, one
+    # object per line; NDJSON batches are written while the body streams in.
+    # Each batch of BULK_INSERT_CHUNK_SIZE rows commits on its own, so rows
+    # already reported as created stay created if a later batch fails.
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        batches = ndjson_batches(request.stream(), BULK_INSERT_CHUNK_SIZE)
+    else:
+        batches = json_array_batches(await request.body(), BULK_INSERT_CHUNK_SIZE)
+
+    results = []
+    try:
+        async for start, items in batches:
+            results += await run_in_threadpool(loader.load, start, items)
+    except InvalidPayload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    created = sum(1 for result in results if result["status"] == "created")
+    return FastJSONResponse({"created": created, "failed": len(results) - created, "results": results})
+
+@app.post("/api/v1/players/bulk", response_model=BulkIngestResponse)
+async def create_players_bulk(request: Request):
+    return await bulk_ingest(request, player_loader)
+
+@app.post("/api/v1/competitions/bulk", response_model=BulkIngestResponse)
+async def create_competitions_bulk(request: Request):
+    return await bulk_ingest(request, competition_loader)
+
+@app.post("/api/v1/matches/bulk", response_model=BulkIngestResponse)
+async def create_matches_bulk(request: Request):
+    return await bulk_ingest(request, match_loader)
+
 @app.get("/api/v1/matches/{match_id}", response_model=MatchResponse)
 def read_match(match_id: int, db: Session = Depends(get_db)):
     match = db.query(Match).filter(Match.id == match_id).first()
@@ -473,29 +1117,151 @@ def read_match(match_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Match not found")
     return match
 
+live_updates = LiveBroadcaster(create_live_bus(LIVE_BUS_URL))
+
+registry.register(Gauge(
+    "live_match_subscribers",
+    "WebSocket and SSE clients following a match on this worker.",
+    collect=lambda: {(): live_updates.subscriber_count()}
+))
+
+def match_snapshot(match_id: int) -> Optional[str]:
+    db = SessionLocal()
+    try:
+        match = db.get(Match, match_id)
+        return MatchResponse.model_validate(match).model_dump_json() if match else None
+    finally:
+        db.close()
+
+@app.patch("/api/v1/matches/{match_id}", response_model=MatchResponse)
+def update_match(match_id: int, changes: MatchUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    match = db.get(Match, match_id)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    was_on_sale = match.status == "SALE_OPEN"
+    for field, value in changes.model_dump(exclude_unset=True).items():
+        setattr(match, field, value)
+    db.commit()
+    db.refresh(match)
+
+    if was_on_sale and match.status != "SALE_OPEN":
+        background_tasks.add_task(prerender_match_tickets, match_id)
+
+    body = MatchResponse.model_validate(match).model_dump_json()
+    live_updates.publish(match_id, body)
+    return Response(content=body, media_type="application/json")
+
+@app.websocket("/api/v1/matches/{match_id}/live")
+async def follow_match_websocket(websocket: WebSocket, match_id: int):
+    snapshot = await run_in_threadpool(match_snapshot, match_id)
+    if snapshot is None:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    subscription = live_updates.subscribe(match_id)
+
+    async def send_updates():
+        await websocket.send_text(snapshot)
+        while True:
+            await websocket.send_text(await subscription.get())
+
+    async def wait_for_disconnect():
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    tasks = [asyncio.create_task(send_updates()), asyncio.create_task(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        live_updates.unsubscribe(match_id, subscription)
+
+@app.get("/api/v1/matches/{match_id}/events")
+async def follow_match_events(match_id: int):
+    snapshot = await run_in_threadpool(match_snapshot, match_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    async def event_stream():
+        subscription = live_updates.subscribe(match_id)
+        try:
+            yield f"event: match\ndata: {snapshot}\n\n"
+            while True:
+                try:
+                    body = await asyncio.wait_for(subscription.get(), LIVE_SSE_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: match\ndata: {body}\n\n"
+        finally:
+            live_updates.unsubscribe(match_id, subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/api/v1/games_schedule/", response_model=List[MatchResponse])
-def get_games_schedule(db: Session = Depends(get_db)):
-    upcoming_matches = db.query(Match).filter(
-        (Match.status == "upcoming") | (Match.status == "live")
-    ).order_by(Match.match_datetime).all()
-    return upcoming_matches
+def get_games_schedule(request: Request, response: Response, cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=1000), db: Session = Depends(get_db)):
+    upcoming_matches = select(Match).where(ACTIVE_MATCH)
+    return list_response(request, response, db, upcoming_matches, match_keyset, MatchResponse, cursor, limit)
 
 @app.get("/api/v1/home_games/", response_model=List[MatchResponse])
-def get_home_games(db: Session = Depends(get_db)):
-    home_games = db.query(Match).filter(
-        Match.is_home_game == True,
-        (Match.status == "upcoming") | (Match.status == "live")
-    ).order_by(Match.match_datetime).all()
-    return home_games
+def get_home_games(request: Request, response: Response, cursor: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=1000), db: Session = Depends(get_db)):
+    home_games = select(Match).where(HOME_MATCH, ACTIVE_MATCH)
+    return list_response(request, response, db, home_games, match_keyset, MatchResponse, cursor, limit)
+
+# Login opens a session per query instead of taking one from get_db: a
+# request waiting on the password hasher must not hold a database slot, or a
+# login storm queues every other route behind the hashes.
+def find_login_user(email: str):
+    db = SessionLocal()
+    try:
+        return db.execute(
+            select(User.id, User.username, User.email, User.password).where(User.email == email)
+        ).first()
+    finally:
+        db.close()
+
+def upgrade_password_hash(user_id: int, old_password: str, new_password: str):
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == user_id, User.__table__.c.password == old_password)
+            .values(password=new_password)
+        )
+        db.commit()
+    finally:
+        db.close()
 
 @app.post("/api/v1/auth/login", response_model=LoginSuccessResponse)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)): 
-    user = db.query(User).filter(User.email == user_credentials.email).first()
-    if not user or user.password != user_credentials.password: 
+async def login(user_credentials: UserLogin): 
+    user = await run_in_threadpool(find_login_user, user_credentials.email)
+    try:
+        valid, new_password = await password_hasher.verify(
+            user_credentials.password, user.password if user else DUMMY_PASSWORD_HASH
+        )
+    except PasswordHasherBusy:
+        raise HTTPException(status_code=503, detail="Too many login attempts, try again shortly", headers={"Retry-After": "1"})
+
+    if not user or not valid: 
         raise HTTPException(status_code=400, detail="Invalid credentials") 
 
-    
-    access_token = "eyJhbGci0iJIUzI1NiIsInR5cCI6IkpXVCJ9..." 
+    if new_password:
+        await run_in_threadpool(upgrade_password_hash, user.id, user.password, new_password)
+
+    access_token = encode_access_token(
+        {"sub": str(user.id), "name": user.username, "email": user.email},
+        AUTH_SECRET_KEY,
+        ACCESS_TOKEN_TTL
+    )
 
     return LoginSuccessResponse(
         access_token=access_token,
@@ -504,7 +1270,7 @@ def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
     )
 
 @app.get("/api/v1/member/profile", response_model=MemberProfileResponse)
-def get_member_profile(current_user: User = Depends(get_current_user_mock)): 
+def get_member_profile(current_user: Principal = Depends(get_current_member)): 
     
     return MemberProfileResponse(
         tubarao_id=current_user.tubarao_id, 
@@ -517,12 +1283,12 @@ def get_member_profile(current_user: User = Depends(get_current_user_mock)):
     )
 
 @app.get("/api/v1/member/cards", response_model=CardListResponse)
-def list_saved_cards(current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
+def list_saved_cards(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)): 
     cards = db.query(Card).filter(Card.user_id == current_user.id).all() 
     return {"cards": cards} 
 
 @app.post("/api/v1/member/cards", status_code=status.HTTP_201_CREATED, response_model=CardResponse)
-def add_new_card(card_data: CardAddRequest, current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
+def add_new_card(card_data: CardAddRequest, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)): 
      
     new_card_id = f"card_{datetime.now().strftime('%Y%m%d%H%M%S')}_{current_user.id}"
     mock_card_details = {
@@ -541,7 +1307,7 @@ def add_new_card(card_data: CardAddRequest, current_user: User = Depends(get_cur
     return db_card 
 
 @app.delete("/api/v1/member/cards/{cardId}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_card(cardId: str, current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
+def remove_card(cardId: str, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)): 
     card = db.query(Card).filter(Card.id == cardId, Card.user_id == current_user.id).first() 
     if not card:
         raise HTTPException(status_code=404, detail="Card not found or not owned by user") 
@@ -550,12 +1316,12 @@ def remove_card(cardId: str, current_user: User = Depends(get_current_user_mock)
     return 
 
 
-@app.get("/api/v1/dashboard", response_model=DashboardResponse)
-def get_dashboard_data(db: Session = Depends(get_db)): 
-    
-    next_match_db = db.query(Match).filter(
-        (Match.status == "upcoming") | (Match.status == "live")
-    ).order_by(Match.match_datetime).first() 
+DASHBOARD_TABLES = ("matches", "competitions", "news", "press_conferences", "videos")
+
+def build_dashboard_snapshot(db: Session) -> bytes: 
+    next_match_db = db.query(Match).options(joinedload(Match.competition)).filter(
+        ACTIVE_MATCH
+    ).order_by(Match.match_datetime, Match.id).first() 
 
     next_match_data = None
     if next_match_db:
@@ -583,18 +1349,41 @@ def get_dashboard_data(db: Session = Depends(get_db)):
         news=news_summaries, 
         press_conferences=press_conferences_summaries, 
         videos=video_summaries 
-    )
+    ).model_dump_json().encode()
+
+def rebuild_dashboard_snapshot() -> bytes:
+    db = SessionLocal()
+    try:
+        return build_dashboard_snapshot(db)
+    finally:
+        db.close()
+
+dashboard_cache = SnapshotCache(
+    rebuild_dashboard_snapshot,
+    ttl      = DASHBOARD_CACHE_TTL,
+    versions = data_versions,
+    tables   = DASHBOARD_TABLES
+)
+
+def snapshot_response(snapshot: Snapshot, request: Request, max_age: int = 0) -> Response:
+    headers = {"ETag": snapshot.etag, "Cache-Control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+@sync_routes.get("/api/v1/dashboard", response_model=DashboardResponse)
+async def get_dashboard_data(request: Request): 
+    snapshot = dashboard_cache.peek() or await run_in_threadpool(dashboard_cache.get)
+    return snapshot_response(snapshot, request)
 
-@app.get("/api/v1/news/{newsId}", response_model=NewsDetailResponse)
-def get_news_details(newsId: str, db: Session = Depends(get_db), current_user: Optional[User] = Depends(get_current_user_mock)): 
+
+@sync_routes.get("/api/v1/news/{newsId}", response_model=NewsDetailResponse)
+def get_news_details(newsId: str, db: Session = Depends(get_db), current_user: Optional[Principal] = Depends(get_optional_user)): 
     news = db.query(News).filter(News.id == newsId).first() 
     if not news:
         raise HTTPException(status_code=404, detail="News not found") 
     
-    news.view_count += 1 
-    db.add(news) 
-    db.commit() 
-    db.refresh(news) 
+    pending_views = news_view_counter.increment(newsId)
 
     user_has_liked = False 
     if current_user:
@@ -611,73 +1400,237 @@ def get_news_details(newsId: str, db: Session = Depends(get_db), current_user: O
         title=news.title, 
         published_at=news.published_at, 
         author=news.author, 
-        view_count=news.view_count, 
+        view_count=(news.view_count or 0) + pending_views, 
         image_url=news.image_url, 
         content=news.content, 
         like_count=news.like_count, 
         user_has_liked=user_has_liked 
     )
 
+TOGGLE_NEWS_LIKE_SQL = text("""
+    WITH target AS (
+        SELECT id FROM news WHERE id = :news_id
+    ),
+    removed AS (
+        DELETE FROM user_news_likes
+        WHERE user_id = :user_id AND news_id IN (SELECT id FROM target)
+        RETURNING news_id
+    ),
+    added AS (
+        INSERT INTO user_news_likes (user_id, news_id)
+        SELECT :user_id, id FROM target
+        WHERE NOT EXISTS (SELECT 1 FROM removed)
+        ON CONFLICT DO NOTHING
+        RETURNING news_id
+    ),
+    counted AS (
+        UPDATE news
+        SET like_count = COALESCE(like_count, 0) + (SELECT count(*) FROM added) - (SELECT count(*) FROM removed)
+        WHERE id IN (SELECT id FROM target)
+        RETURNING like_count
+    )
+    SELECT (SELECT like_count FROM counted)  AS like_count,
+           EXISTS (SELECT 1 FROM added)      AS user_has_liked,
+           EXISTS (SELECT 1 FROM target)     AS news_exists
+""")
+
+def toggle_news_like(db: Session, user_id: int, news_id: str):
+    if db.get_bind().dialect.name == "postgresql":
+        row = db.execute(TOGGLE_NEWS_LIKE_SQL, {"user_id": user_id, "news_id": news_id}).one()
+        db.commit()
+        if not row.news_exists:
+            return None
+        return row.like_count, row.user_has_liked
+
+    news_table  = News.__table__
+    likes_table = UserNewsLike.__table__
+
+    if db.execute(select(news_table.c.id).where(news_table.c.id == news_id)).first() is None:
+        return None
+
+    removed = db.execute(
+        delete(likes_table).where(likes_table.c.user_id == user_id, likes_table.c.news_id == news_id)
+    ).rowcount
+    if not removed:
+        db.execute(insert(likes_table).values(user_id=user_id, news_id=news_id))
+
+    like_count = db.execute(
+        update(news_table)
+        .where(news_table.c.id == news_id)
+        .values(like_count=func.coalesce(news_table.c.like_count, 0) + (-1 if removed else 1))
+        .returning(news_table.c.like_count)
+    ).scalar()
+    db.commit()
+    return like_count, not removed
+
 @app.post("/api/v1/news/{newsId}/like", response_model=LikeNewsResponse)
-def like_news(newsId: str, current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
-    news = db.query(News).filter(News.id == newsId).first() 
-    if not news:
+def like_news(newsId: str, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)): 
+    result = toggle_news_like(db, current_user.id, newsId)
+    if result is None:
         raise HTTPException(status_code=404, detail="News not found") 
 
-    user_like = db.query(UserNewsLike).filter(
-        UserNewsLike.user_id == current_user.id,
-        UserNewsLike.news_id == newsId
-    ).first() 
+    like_count, user_has_liked = result
+    return LikeNewsResponse(like_count=like_count, user_has_liked=user_has_liked) 
+
+
+UPCOMING_GAMES_QUERY = (
+    select(
+        Match.id,
+        Match.match_datetime,
+        Match.location,
+        Match.status,
+        Competition.name.label("championship"),
+        TicketCategory.id.label("category_id"),
+        TicketCategory.name.label("category_name"),
+        TicketCategory.available_quantity,
+        TicketCategory.price
+    )
+    .outerjoin(Competition, Competition.id == Match.competition_id)
+    .outerjoin(TicketCategory, TicketCategory.match_id == Match.id)
+    .where(ON_SALE_MATCH)
+    .order_by(Match.match_datetime, Match.id, TicketCategory.id)
+)
 
-    if user_like:
-        
-        db.delete(user_like) 
-        news.like_count -= 1 
-        user_has_liked = False 
-    else:
-        
-        new_like = UserNewsLike(user_id=current_user.id, news_id=newsId) 
-        db.add(new_like) 
-        news.like_count += 1 
-        user_has_liked = True 
+def build_upcoming_games(rows) -> dict:
+    matches_response = {}
+    for row in rows:
+        match = matches_response.get(row.id)
+        if match is None:
+            match = matches_response[row.id] = {
+                "id": str(row.id),
+                "championship": row.championship if row.championship is not None else "N/A",
+                "date": row.match_datetime.strftime("%Y-%m-%d"),
+                "time": row.match_datetime.strftime("%H:%M"),
+                "stadium": row.location,
+                "status": row.status,
+                "ticket_categories": []
+            }
+        if row.category_id is not None:
+            match["ticket_categories"].append({
+                "id": row.category_id,
+                "name": row.category_name,
+                "available_quantity": row.available_quantity,
+                "price": row.price / 100.0
+            })
+    return {"matches": list(matches_response.values())}
+
+@sync_routes.get("/api/v1/matches", response_model=MatchListResponse)
+def list_upcoming_games(db: Session = Depends(get_db)): 
+    return FastJSONResponse(build_upcoming_games(db.execute(UPCOMING_GAMES_QUERY)))
 
-    db.add(news) 
-    db.commit() 
-    db.refresh(news) 
+def new_ticket_order(user_id: int, order_details: TicketPurchaseRequest, payment_successful: bool) -> Order:
+    new_order_id = f"order_{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{user_id}" 
+    qr_code_url = f"/api/v1/tickets/orders/{new_order_id}/qr.png" 
+
+    order_status = "CONFIRMED" if payment_successful else "FAILED" 
+
+    return Order(
+        id=new_order_id, 
+        user_id=user_id, 
+        match_id=order_details.match_id, 
+        category_id=order_details.category_id, 
+        quantity=order_details.quantity, 
+        payment_method=order_details.payment.method, 
+        card_id=order_details.payment.card_id, 
+        status=order_status, 
+        qr_code_url=qr_code_url 
+    )
+
+ticket_signer = TicketSigner(
+    secret              = TICKET_SIGNING_SECRET or derive_key(AUTH_SECRET_KEY, "ticket-codes"),
+    ed25519_private_key = TICKET_SIGNING_ED25519_KEY
+)
 
-    return LikeNewsResponse(like_count=news.like_count, user_has_liked=user_has_liked) 
+# Check-in codes prove a check-in, not a purchase: they are signed with their
+# own key so a gate never accepts one as a ticket.
+checkin_signer = TicketSigner(secret=derive_key(AUTH_SECRET_KEY, "checkin-codes"))
 
+CHECKIN_ORDER_PREFIX = "checkin_"
+
+qr_images = QRImageCache(QR_CACHE_DIR, workers=QR_RENDER_WORKERS)
+
+def ticket_code(order: Order, match_datetime: Optional[datetime]) -> Optional[str]:
+    if order.status != "CONFIRMED":
+        return None
+    valid_from = match_datetime or datetime.now()
+    return ticket_signer.sign(TicketClaims(
+        order_id    = order.id,
+        match_id    = order.match_id,
+        category_id = order.category_id,
+        user_id     = order.user_id,
+        quantity    = order.quantity,
+        expires_at  = int(valid_from.timestamp() + TICKET_CODE_GRACE_HOURS * 3600)
+    ))
+
+def process_ticket_purchase_batch(purchases):
+    db = SessionLocal()
+    try:
+        match_ids    = {order_details.match_id for _, order_details in purchases}
+        category_ids = {order_details.category_id for _, order_details in purchases}
+
+        existing_matches = dict(db.execute(select(Match.id, Match.match_datetime).where(Match.id.in_(match_ids))).all())
+        category_matches = dict(db.execute(
+            select(TicketCategory.id, TicketCategory.match_id).where(TicketCategory.id.in_(category_ids))
+        ).all())
+
+        results = []
+        for user_id, order_details in purchases:
+            if order_details.match_id not in existing_matches:
+                results.append(HTTPException(status_code=404, detail="Match not found"))
+            elif category_matches.get(order_details.category_id) != order_details.match_id:
+                results.append(HTTPException(status_code=404, detail="Ticket category not found for this match"))
+            else:
+                results.append(None)
+
+        pending  = [index for index, result in enumerate(results) if result is None]
+        reserved = ticket_inventory.reserve_batch(db, [
+            (purchases[index][1].category_id, purchases[index][1].quantity) for index in pending
+        ])
+
+        orders    = []
+        order_ids = set()
+        for index, is_reserved in zip(pending, reserved):
+            user_id, order_details = purchases[index]
+            if not is_reserved:
+                results[index] = HTTPException(status_code=400, detail="Not enough tickets available")
+                continue
+
+            payment_successful = True 
+            db_order = new_ticket_order(user_id, order_details, payment_successful)
+            while db_order.id in order_ids:
+                db_order = new_ticket_order(user_id, order_details, payment_successful)
+            if not payment_successful:
+                ticket_inventory.release(db, order_details.category_id, order_details.quantity)
+
+            order_ids.add(db_order.id)
+            orders.append(db_order)
+            results[index] = TicketPurchaseResponse(
+                order_id=db_order.id, 
+                status=db_order.status, 
+                qr_code_url=db_order.qr_code_url, 
+                ticket_code=ticket_code(db_order, existing_matches[order_details.match_id])
+            )
+
+        db.add_all(orders)
+        db.commit()
+        for result in results:
+            if isinstance(result, TicketPurchaseResponse) and result.ticket_code:
+                qr_images.schedule(result.ticket_code)
+        return results
+    finally:
+        db.close()
+
+ticket_purchase_queue = GroupCommitQueue(
+    "ticket-purchases",
+    process_ticket_purchase_batch,
+    batch_size = PURCHASE_BATCH_SIZE,
+    max_wait   = PURCHASE_BATCH_MAX_WAIT_MS / 1000.0
+)
+
+def purchase_tickets(db: Session, user_id: int, order_details: TicketPurchaseRequest) -> TicketPurchaseResponse:
+    if ticket_inventory.is_sold_out(order_details.category_id):
+        raise HTTPException(status_code=400, detail="Not enough tickets available")
 
-@app.get("/api/v1/matches", response_model=MatchListResponse)
-def list_upcoming_games(db: Session = Depends(get_db)): 
-    
-    matches_db = db.query(Match).filter(
-        (Match.status == "SALE_OPEN") | (Match.status == "CHECKIN_OPEN")
-    ).order_by(Match.match_datetime).all() 
-
-    matches_response = []
-    for match in matches_db:
-        ticket_categories = [
-            TicketCategoryResponse(
-                id=tc.id,
-                name=tc.name,
-                available_quantity=tc.available_quantity,
-                price=tc.price / 100.0 
-            ) for tc in match.ticket_categories
-        ] 
-        matches_response.append(MatchListResponseItem(
-            id=str(match.id), 
-            championship=match.competition.name if match.competition else "N/A", 
-            date=match.match_datetime.strftime("%Y-%m-%d"), 
-            time=match.match_datetime.strftime("%H:%M"), 
-            stadium=match.location, 
-            status=match.status, 
-            ticket_categories=ticket_categories 
-        ))
-    return {"matches": matches_response} 
-
-@app.post("/api/v1/tickets/orders", status_code=status.HTTP_201_CREATED, response_model=TicketPurchaseResponse)
-def finalize_ticket_purchase(order_details: TicketPurchaseRequest, current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
     match = db.query(Match).filter(Match.id == order_details.match_id).first() 
     if not match:
         raise HTTPException(status_code=404, detail="Match not found") 
@@ -689,68 +1642,193 @@ def finalize_ticket_purchase(order_details: TicketPurchaseRequest, current_user:
     if not category:
         raise HTTPException(status_code=404, detail="Ticket category not found for this match") 
 
-    if category.available_quantity < order_details.quantity:
+    if not ticket_inventory.reserve(db, category.id, order_details.quantity):
+        db.rollback()
         raise HTTPException(status_code=400, detail="Not enough tickets available") 
 
     payment_successful = True 
-
-    new_order_id = f"order_{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{current_user.id}" 
-    qr_code_url = f"url/para/qrcode_ingresso_{new_order_id}.png" 
-
-    order_status = "CONFIRMED" if payment_successful else "FAILED" 
-
-    db_order = Order(
-        id=new_order_id, 
-        user_id=current_user.id, 
-        match_id=order_details.match_id, 
-        category_id=order_details.category_id, 
-        quantity=order_details.quantity, 
-        payment_method=order_details.payment.method, 
-        card_id=order_details.payment.card_id, 
-        status=order_status, 
-        qr_code_url=qr_code_url 
-    )
-
-    if payment_successful:
-        category.available_quantity -= order_details.quantity
-        db.add(category)
+    db_order = new_ticket_order(user_id, order_details, payment_successful)
+    if not payment_successful:
+        ticket_inventory.release(db, category.id, order_details.quantity)
 
     db.add(db_order) 
     db.commit() 
     db.refresh(db_order) 
 
+    code = ticket_code(db_order, match.match_datetime)
+    if code:
+        qr_images.schedule(code)
+
     return TicketPurchaseResponse(
         order_id=db_order.id, 
         status=db_order.status, 
-        qr_code_url=db_order.qr_code_url 
+        qr_code_url=db_order.qr_code_url, 
+        ticket_code=code
     )
 
-@app.post("/api/v1/matches/{matchId}/checkin", response_model=CheckinResponse)
-def perform_checkin(matchId: int, current_user: User = Depends(get_current_user_mock), db: Session = Depends(get_db)): 
-    match = db.query(Match).filter(Match.id == matchId).first() 
-    if not match:
-        raise HTTPException(status_code=404, detail="Match not found") 
+def queue_status_response(queue_status: QueueStatus, model=QueueStatusResponse, status_code: int = 200, **extra):
+    # Nothing changes for a waiting fan until their turn, so tell clients
+    # (and any cache in front of them) how long to wait before polling again.
+    body = model(
+        match_id=queue_status.match_id,
+        position=queue_status.position,
+        ahead=queue_status.ahead,
+        admitted=queue_status.admitted,
+        eta_seconds=math.ceil(queue_status.eta),
+        expires_at=queue_status.expires_at,
+        **extra
+    )
+    poll_after = min(30, max(1, math.ceil(queue_status.eta / 2)))
+    return FastJSONResponse(body, status_code=status_code, headers={"Cache-Control": f"private, max-age={poll_after}"})
 
-    if match.status != "CHECKIN_OPEN": 
-        raise HTTPException(status_code=400, detail="Check-in is not open for this match")
+@app.post("/api/v1/matches/{matchId}/queue", status_code=status.HTTP_201_CREATED, response_model=QueueJoinResponse)
+def join_ticket_queue(matchId: int, current_user: Principal = Depends(admit_queue_join), db: Session = Depends(get_db)):
+    match_status = db.execute(select(Match.status).where(Match.id == matchId)).scalar()
+    if match_status is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+    if match_status not in ("SALE_OPEN", "CHECKIN_OPEN"):
+        raise HTTPException(status_code=400, detail="Ticket sales are not open for this match")
+    queue_token, queue_status = waiting_room.join(matchId, current_user.id)
+    return queue_status_response(queue_status, QueueJoinResponse, status.HTTP_201_CREATED, queue_token=queue_token)
 
-    existing_checkin = db.query(Checkin).filter(
-        Checkin.user_id == current_user.id,
-        Checkin.match_id == matchId
+@app.get("/api/v1/matches/{matchId}/queue", response_model=QueueStatusResponse)
+async def get_ticket_queue_status(matchId: int, current_user: Principal = Depends(get_current_user), queue_token: str = Header(..., alias="X-Queue-Token")):
+    try:
+        queue_status = waiting_room.status(queue_token, current_user.id)
+    except QueueRejected as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    if queue_status.match_id != matchId:
+        raise HTTPException(status_code=403, detail="Queue pass is for another match")
+    return queue_status_response(queue_status)
+
+@sync_routes.post("/api/v1/tickets/orders", status_code=status.HTTP_201_CREATED, response_model=TicketPurchaseResponse)
+def finalize_ticket_purchase(order_details: TicketPurchaseRequest, current_user: Principal = Depends(admit_ticket_purchase), queue_token: Optional[str] = Header(None, alias="X-Queue-Token")): 
+    used = use_queue_pass(queue_token, current_user.id, order_details.match_id)
+    try:
+        if TICKET_PURCHASE_MODE == "batched":
+            return ticket_purchase_queue.submit((current_user.id, order_details)).result()
+
+        # No get_db: a queued buyer holds no connection, so it must not wait
+        # for a database slot either. Direct buyers are already capped at the
+        # pool size by admission.
+        db = SessionLocal()
+        try:
+            return purchase_tickets(db, current_user.id, order_details)
+        finally:
+            db.close()
+    except Exception:
+        refund_queue_pass(used)
+        raise
+
+def find_order_ticket(db: Session, order_id: str):
+    return db.execute(
+        select(Order.id, Order.user_id, Order.match_id, Order.category_id, Order.quantity, Order.status, Match.match_datetime)
+        .join(Match, Match.id == Order.match_id)
+        .where(Order.id == order_id)
     ).first()
-    if existing_checkin:
-        raise HTTPException(status_code=400, detail="User already checked in for this match")
 
-    new_checkin_qr_url = f"url/para/qrcode_checkin_{current_user.id}_{matchId}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}.png" 
+def prerender_match_tickets(match_id: int) -> int:
+    # Runs once a match's sale closes: every confirmed ticket is rendered up
+    # front, so the pre-match rush for QR images is served from disk.
+    db = SessionLocal()
+    try:
+        orders = db.execute(
+            select(Order.id, Order.user_id, Order.match_id, Order.category_id, Order.quantity, Order.status, Match.match_datetime)
+            .join(Match, Match.id == Order.match_id)
+            .where(Order.match_id == match_id, Order.status == "CONFIRMED")
+        ).all()
+    finally:
+        db.close()
+    return qr_images.prerender([ticket_code(order, order.match_datetime) for order in orders])
+
+def find_checkin_ticket(db: Session, user_id: int, match_id: int):
+    return db.execute(
+        select(Checkin.id, Match.match_datetime)
+        .join(Match, Match.id == Checkin.match_id)
+        .where(Checkin.user_id == user_id, Checkin.match_id == match_id)
+    ).first()
 
-    db_checkin = Checkin(
-        user_id=current_user.id, 
-        match_id=matchId, 
-        qr_code_url=new_checkin_qr_url 
+async def qr_image_response(content: str, kind: str) -> FileResponse:
+    # The image for a given ticket never changes, so clients may keep it for
+    # good; FileResponse lets the server send it with sendfile when it can.
+    path = await qr_images.get(content, kind)
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[kind],
+        headers={"Cache-Control": "private, max-age=31536000, immutable"}
     )
-    db.add(db_checkin) 
-    db.commit() 
-    db.refresh(db_checkin) 
+
+@app.get("/api/v1/tickets/orders/{orderId}/qr.{kind}", response_class=FileResponse)
+async def get_order_qr_code(orderId: str, kind: str, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    order = await run_in_threadpool(find_order_ticket, db, orderId)
+    if kind not in MEDIA_TYPES or not order or order.user_id != current_user.id or order.status != "CONFIRMED":
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return await qr_image_response(ticket_code(order, order.match_datetime), kind)
+
+@app.get("/api/v1/matches/{matchId}/checkin/qr.{kind}", response_class=FileResponse)
+async def get_checkin_qr_code(matchId: int, kind: str, current_user: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    checkin = await run_in_threadpool(find_checkin_ticket, db, current_user.id, matchId)
+    if kind not in MEDIA_TYPES or not checkin:
+        raise HTTPException(status_code=404, detail="Check-in not found")
+    valid_from = checkin.match_datetime or datetime.now()
+    code = checkin_signer.sign(TicketClaims(
+        order_id    = f"{CHECKIN_ORDER_PREFIX}{checkin.id}",
+        match_id    = matchId,
+        category_id = None,
+        user_id     = current_user.id,
+        quantity    = 1,
+        expires_at  = int(valid_from.timestamp() + TICKET_CODE_GRACE_HOURS * 3600)
+    ))
+    return await qr_image_response(code, kind)
+
+def verify_ticket_code(code: str, match_id: Optional[int], now: float) -> TicketVerifyResponse:
+    try:
+        claims = ticket_signer.verify(code, now)
+    except InvalidTicket as e:
+        return TicketVerifyResponse(valid=False, reason=str(e))
+    if match_id is not None and claims.match_id != match_id:
+        return TicketVerifyResponse(valid=False, reason="Ticket is for another match", **claims._asdict())
+    return TicketVerifyResponse(valid=True, **claims._asdict())
+
+@app.post("/api/v1/tickets/verify", response_model=TicketVerifyResponse)
+async def verify_ticket(request: TicketVerifyRequest):
+    return verify_ticket_code(request.code, request.match_id, time.time())
+
+@app.post("/api/v1/tickets/verify/batch", response_model=TicketBatchVerifyResponse)
+def verify_tickets_batch(request: TicketBatchVerifyRequest):
+    if len(request.codes) > TICKET_VERIFY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {TICKET_VERIFY_BATCH_MAX} codes per request")
+    now = time.time()
+    return FastJSONResponse(TicketBatchVerifyResponse(results=[verify_ticket_code(code, request.match_id, now) for code in request.codes]))
+
+@app.get("/api/v1/tickets/signing-key", response_model=TicketSigningKeyResponse)
+async def get_ticket_signing_key():
+    public_key = ticket_signer.public_key()
+    if public_key is None:
+        raise HTTPException(status_code=404, detail="Ticket codes are signed with a shared secret")
+    return TicketSigningKeyResponse(algorithm=ticket_signer.algorithm, public_key=public_key)
+
+checkin_engine = CheckinEngine(
+    Checkin.__table__,
+    Match.__table__,
+    SessionLocal,
+    data_versions,
+    batch_size = CHECKIN_BATCH_SIZE,
+    max_wait   = CHECKIN_BATCH_MAX_WAIT_MS / 1000.0,
+    state_ttl  = CHECKIN_STATE_TTL
+)
+
+def checkin_qr_code_url(match_id: int) -> str:
+    return f"/api/v1/matches/{match_id}/checkin/qr.png"
+
+@sync_routes.post("/api/v1/matches/{matchId}/checkin", response_model=CheckinResponse)
+def perform_checkin(matchId: int, current_user: Principal = Depends(admit_checkin)): 
+    try:
+        new_checkin_qr_url = checkin_engine.check_in(
+            matchId, current_user.id, checkin_qr_code_url(matchId)
+        ).result()
+    except CheckinRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
     return CheckinResponse(
         message="Check-in realizado com sucesso!", 
@@ -758,44 +1836,172 @@ def perform_checkin(matchId: int, current_user: User = Depends(get_current_user_
     )
 
 
-@app.get("/api/v1/benefits", response_model=BenefitsListResponse)
-def list_benefits(db: Session = Depends(get_db)): 
-    featured = db.query(Partner).filter(Partner.is_featured == True).all() 
-    all_partners = db.query(Partner).all() 
-
-    featured_summaries = [
-        PartnerSummary(
-            id=p.id, name=p.name, category=p.category, logo_url=p.logo_url, discount=p.discount
-        ) for p in featured
-    ] 
-    all_partners_summaries = [
-        PartnerSummary(
-            id=p.id, name=p.name, category=p.category, logo_url=p.logo_url, discount=p.discount
-        ) for p in all_partners
-    ] 
-
-    return BenefitsListResponse(
-        featured_partners=featured_summaries, 
-        all_partners=all_partners_summaries 
-    )
-
-@app.get("/api/v1/benefits/{benefitId}", response_model=BenefitDetailResponse)
-def get_benefit_details(benefitId: str, db: Session = Depends(get_db)): 
-    partner = db.query(Partner).filter(Partner.id == benefitId).first() 
-    if not partner:
-        raise HTTPException(status_code=404, detail="Benefit not found") 
+benefits_log = logging.getLogger("benefits")
 
-    how_to_use_list = json.loads(partner.how_to_use) if partner.how_to_use else [] 
-    if not isinstance(how_to_use_list, list):
-        how_to_use_list = [how_to_use_list] 
+def benefit_summary(partner: Partner) -> bytes:
+    return PartnerSummary(
+        id=partner.id, name=partner.name, category=partner.category, logo_url=partner.logo_url, discount=partner.discount
+    ).model_dump_json().encode()
 
-    return BenefitDetailResponse(
+def benefit_detail(partner: Partner, version) -> Snapshot:
+    detail = BenefitDetailResponse(
         id=partner.id, 
         name=partner.name, 
         category=partner.category, 
         discount=partner.discount, 
         logo_url=partner.logo_url, 
         about_establishment=partner.about_establishment, 
-        how_to_use=how_to_use_list, 
+        how_to_use=parse_how_to_use(partner.how_to_use), 
         description=partner.description 
-    )
\ No newline at end of file
+    ).model_dump_json().encode()
+    return Snapshot(detail, body_etag(detail), version, time.monotonic())
+
+def benefit_catalog_entry(partner: Partner, version) -> CatalogEntry:
+    # The summary and the detail are built separately: a partner whose
+    # detail fields are incomplete is still listed, only its detail page is
+    # missing. A partner without a summary cannot be listed at all.
+    summary = benefit_summary(partner)
+    try:
+        detail = benefit_detail(partner, version)
+    except ValidationError:
+        benefits_log.warning("Detalhe do parceiro %s indisponível no catálogo de benefícios: cadastro incompleto.", partner.id)
+        detail = None
+
+    return CatalogEntry(
+        id          = partner.id,
+        category    = partner.category,
+        featured    = bool(partner.is_featured),
+        search_text = normalize_search_text(" ".join(filter(None, (partner.name, partner.category, partner.discount, partner.description)))),
+        summary     = summary,
+        detail      = detail
+    )
+
+def load_partners() -> list:
+    db = SessionLocal()
+    try:
+        return db.scalars(select(Partner).order_by(Partner.id)).all()
+    finally:
+        db.close()
+
+def build_benefits_catalog(partners, version) -> BenefitsCatalog:
+    entries = []
+    for partner in partners:
+        try:
+            entries.append(benefit_catalog_entry(partner, version))
+        except ValidationError:
+            # A partner without the fields of the list entry is left out
+            # instead of failing the whole catalog.
+            benefits_log.warning("Parceiro %s ignorado no catálogo de benefícios: cadastro incompleto.", partner.id)
+    return BenefitsCatalog(entries, version)
+
+benefits_catalog = SnapshotCache(
+    load_partners,
+    ttl       = BENEFITS_CACHE_TTL,
+    versions  = data_versions,
+    tables    = ("partners",),
+    serialize = build_benefits_catalog
+)
+
+@app.get("/api/v1/benefits", response_model=BenefitsListResponse)
+async def list_benefits(request: Request, category: Optional[str] = None, q: Optional[str] = None): 
+    catalog = benefits_catalog.peek() or await run_in_threadpool(benefits_catalog.get)
+    return snapshot_response(catalog.list(category, q), request)
+
+@app.get("/api/v1/benefits/{benefitId}", response_model=BenefitDetailResponse)
+async def get_benefit_details(benefitId: str, request: Request): 
+    catalog = benefits_catalog.peek() or await run_in_threadpool(benefits_catalog.get)
+    detail  = catalog.detail(benefitId)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Benefit not found") 
+    return snapshot_response(detail, request)
+
+
+@app.get("/api/v1/search", response_model=SearchResponse)
+def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[List[str]] = Query(None),
+    prefix: bool = False,
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    if search_backend is None:
+        raise HTTPException(status_code=501, detail="Search is not available for this database")
+
+    hits = search_backend.search(db, q, kinds=type, limit=limit, prefix=prefix)
+    return FastJSONResponse(SearchResponse(query=q, results=[
+        SearchResult(
+            type=hit.kind, id=hit.id, title=hit.title, title_highlight=hit.title_highlight,
+            snippet=hit.snippet, published_at=hit.published_at
+        ) for hit in hits
+    ]))
+
+
+@async_routes.get("/api/v1/dashboard", response_model=DashboardResponse)
+async def get_dashboard_data_async(request: Request):
+    snapshot = await dashboard_cache.aget(build_dashboard_snapshot_async)
+    return snapshot_response(snapshot, request)
+
+async def build_dashboard_snapshot_async() -> bytes:
+    async with AsyncSessionLocal() as db:
+        return await db.run_sync(build_dashboard_snapshot)
+
+@async_routes.get("/api/v1/news/{newsId}", response_model=NewsDetailResponse)
+async def get_news_details_async(newsId: str, db: AsyncSession = Depends(get_async_db), current_user: Optional[Principal] = Depends(get_optional_user)):
+    news = await db.get(News, newsId)
+    if not news:
+        raise HTTPException(status_code=404, detail="News not found")
+
+    pending_views = await run_in_threadpool(news_view_counter.increment, newsId)
+
+    user_has_liked = False
+    if current_user:
+        user_has_liked = await db.get(UserNewsLike, (current_user.id, newsId)) is not None
+
+    return NewsDetailResponse(
+        id=news.id,
+        category=news.category,
+        title=news.title,
+        published_at=news.published_at,
+        author=news.author,
+        view_count=(news.view_count or 0) + pending_views,
+        image_url=news.image_url,
+        content=news.content,
+        like_count=news.like_count,
+        user_has_liked=user_has_liked
+    )
+
+@async_routes.get("/api/v1/matches", response_model=MatchListResponse)
+async def list_upcoming_games_async(db: AsyncSession = Depends(get_async_db)):
+    return FastJSONResponse(build_upcoming_games(await db.execute(UPCOMING_GAMES_QUERY)))
+
+@async_routes.post("/api/v1/tickets/orders", status_code=status.HTTP_201_CREATED, response_model=TicketPurchaseResponse)
+async def finalize_ticket_purchase_async(order_details: TicketPurchaseRequest, current_user: Principal = Depends(admit_ticket_purchase), queue_token: Optional[str] = Header(None, alias="X-Queue-Token")):
+    used = await run_in_threadpool(use_queue_pass, queue_token, current_user.id, order_details.match_id)
+    try:
+        if TICKET_PURCHASE_MODE == "batched":
+            return await asyncio.wrap_future(ticket_purchase_queue.submit((current_user.id, order_details)))
+
+        async with AsyncSessionLocal() as db:
+            return await db.run_sync(purchase_tickets, current_user.id, order_details)
+    except Exception:
+        await run_in_threadpool(refund_queue_pass, used)
+        raise
+
+@async_routes.post("/api/v1/matches/{matchId}/checkin", response_model=CheckinResponse)
+async def perform_checkin_async(matchId: int, current_user: Principal = Depends(admit_checkin)):
+    # check_in reads the data version from the shared store and may load the
+    # match, so it runs off the event loop; only the wait for the batch
+    # stays on it.
+    try:
+        pending = await run_in_threadpool(checkin_engine.check_in, matchId, current_user.id, checkin_qr_code_url(matchId))
+        new_checkin_qr_url = await asyncio.wrap_future(pending)
+    except CheckinRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return CheckinResponse(
+        message="Check-in realizado com sucesso!",
+        qr_code_url=new_checkin_qr_url
+    )
+
+
+app.include_router(async_routes if DATABASE_MODE == "async" else sync_routes)
@@ -0,0 +1,73 @@
+import base64
+import json
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Keyset:
+    # Pages through `stmt` ordered by `columns` (which must end with a unique
+    # column) by filtering on the last row seen instead of OFFSET, so every
+    # page costs the same index range scan however deep it is. Cursors are
+    # the last row's key, base64-encoded; clients treat them as opaque.
+
+    def __init__(self, *columns):
+        self.columns = columns
+
+    def apply(self, stmt, cursor=None):
+        stmt = stmt.order_by(*self.columns)
+        if cursor:
+            stmt = stmt.where(tuple_(*self.columns) > tuple_(*self.decode(cursor)))
+        return stmt
+
+    def encode(self, row) -> str:
+        values = [getattr(row, column.key) for column in self.columns]
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        return base64.urlsafe_b64encode(json.dumps(values, separators=(",", ":")).encode()).rstrip(b"=").decode("ascii")
+
+    def decode(self, cursor: str) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if not isinstance(values, list) or len(values) != len(self.columns):
+                raise InvalidCursor("Invalid cursor")
+            return [self._coerce(column, value) for column, value in zip(self.columns, values)]
+        except InvalidCursor:
+            raise
+        except (ValueError, TypeError) as e:
+            raise InvalidCursor("Invalid cursor") from e
+
+    @staticmethod
+    def _coerce(column, value):
+        # A cursor is client input: each value must have its column's type,
+        # or Postgres rejects the comparison and the request fails with 500.
+        if isinstance(column.type, DateTime):
+            return datetime.fromisoformat(value)
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        if isinstance(value, bool) and python_type is not bool:
+            raise InvalidCursor("Invalid cursor")
+        if python_type is float and isinstance(value, int):
+            return float(value)
+        if not isinstance(value, python_type):
+            raise InvalidCursor("Invalid cursor")
+        return value
+
+
+def ndjson_lines(session_factory, stmt, model, batch_size: int = 1000):
+    # Streams ORM rows as newline-delimited JSON. yield_per makes the driver
+    # use a server-side cursor where it can, so memory holds one batch at a
+    # time. Uses its own session because the response outlives the request's.
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+        for partition in result.scalars().partitions():
+            yield "".join(model.model_validate(row).model_dump_json() + "\n" for row in partition)
+    finally:
+        db.close()
@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+
+from concurrent.futures import Future
+
+
+class GroupCommitQueue:
+    # Collects submitted items and hands them to `handler` in micro-batches
+    # (up to `batch_size` items or `max_wait` seconds after the first one),
+    # so a whole batch shares a single database transaction. The handler
+    # returns one result per item; a result that is an exception is raised
+    # to that caller only. If the handler itself fails (a deadlock, a lost
+    # connection), the batch is retried one item at a time, so only the
+    # items that still fail see the error.
+
+    def __init__(self, name: str, handler, batch_size: int = 64, max_wait: float = 0.005):
+        self.name       = name
+        self.handler    = handler
+        self.batch_size = max(1, batch_size)
+        self.max_wait   = max_wait
+
+        self._queue   = queue.Queue()
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    def submit(self, item) -> Future:
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._process(batch)
+
+    def _next_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch    = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch):
+        items   = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+        try:
+            results = self.handler(items)
+        except Exception as e:
+            if len(items) == 1:
+                futures[0].set_exception(e)
+                return
+            results = [self._handle_one(item) for item in items]
+
+        for future, result in zip(futures, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _handle_one(self, item):
+        try:
+            return self.handler([item])[0]
+        except Exception as e:
+            return e
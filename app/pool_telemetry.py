@@ -0,0 +1,75 @@
+import os
+import time
+
+from sqlalchemy.exc  import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from metrics import registry, Counter, Gauge, Histogram
+
+
+POOL_LABELS = ("engine", "pid")
+
+checkout_seconds = registry.register(Histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool.",
+    POOL_LABELS
+))
+
+checkout_timeouts = registry.register(Counter(
+    "db_pool_checkout_timeouts_total",
+    "Checkouts that gave up after pool_timeout.",
+    POOL_LABELS
+))
+
+_pools = {}
+
+def pool_stats() -> dict:
+    stats = {}
+    for label, pool in _pools.items():
+        capacity    = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        stats[label] = {
+            "size"       : pool.size(),
+            "checked_out": checked_out,
+            "checked_in" : pool.checkedin(),
+            "overflow"   : max(pool.overflow(), 0),
+            "saturation" : checked_out / capacity if capacity else 0.0,
+        }
+    return stats
+
+def _pool_gauge(field: str, documentation: str) -> Gauge:
+    collect = lambda: {(label, str(os.getpid())): values[field] for label, values in pool_stats().items()}
+    return registry.register(Gauge(f"db_pool_{field}", documentation, POOL_LABELS, collect=collect))
+
+_pool_gauge("size",        "Configured pool_size of this worker's pool.")
+_pool_gauge("checked_out", "Connections currently checked out in this worker.")
+_pool_gauge("checked_in",  "Idle connections held by this worker's pool.")
+_pool_gauge("overflow",    "Connections opened beyond pool_size.")
+_pool_gauge("saturation",  "Checked out connections over pool_size + max_overflow.")
+
+
+class _InstrumentedPoolMixin:
+    engine_label = "sync"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _pools[self.engine_label] = self
+
+    def _do_get(self):
+        labels  = (self.engine_label, str(os.getpid()))
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            checkout_timeouts.inc(labels)
+            raise
+        finally:
+            checkout_seconds.observe(time.perf_counter() - started, labels)
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    engine_label = "sync"
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    engine_label = "async"
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import tempfile
+import threading
+
+from concurrent.futures import ProcessPoolExecutor
+
+import segno
+
+
+MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def render_qr_file(content: str, kind: str, scale: int, border: int, path: str) -> str:
+    # Runs in the render processes. Written under a temporary name and moved
+    # into place, so a reader never sees a partial file.
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix="." + kind)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            # A fixed mask skips scoring all eight candidates, which is about
+            # half of the encoding time; any mask is valid for scanners.
+            segno.make(content, error="m", mask=0).save(out, kind=kind, scale=scale, border=border)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return path
+
+def render_qr_files(jobs) -> int:
+    for job in jobs:
+        render_qr_file(*job)
+    return len(jobs)
+
+
+class QRImageCache:
+    # Renders QR images in a dedicated process pool into a directory keyed by
+    # a hash of the content and render options. The same ticket always maps
+    # to the same file, so it is rendered once and then served from disk by
+    # every worker; concurrent requests for a file being rendered share the
+    # same job.
+
+    def __init__(self, directory: str, workers: int = 2, scale: int = 8, border: int = 2):
+        self.directory = directory
+        self.workers   = workers
+        self.scale     = scale
+        self.border    = border
+
+        self._executor = None
+        self._lock     = threading.RLock()
+        self._pending  = {}
+
+    def path_for(self, content: str, kind: str) -> str:
+        digest = hashlib.blake2b(f"{kind}:{self.scale}:{self.border}:{content}".encode(), digest_size=20).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.{kind}")
+
+    async def get(self, content: str, kind: str) -> str:
+        path = self.path_for(content, kind)
+        if os.path.exists(path):
+            return path
+        return await asyncio.wrap_future(self._submit(content, kind, path))
+
+    def schedule(self, content: str, kind: str = "png"):
+        # Fire and forget, e.g. right after an order is confirmed, so the
+        # image is usually on disk before the app asks for it.
+        path = self.path_for(content, kind)
+        if not os.path.exists(path):
+            self._submit(content, kind, path)
+
+    def prerender(self, contents, kind: str = "png", chunk_size: int = 256) -> int:
+        # Bulk rendering, e.g. every ticket of a match once sales close.
+        jobs = [
+            (content, kind, self.scale, self.border, path)
+            for content in contents
+            for path in (self.path_for(content, kind),)
+            if not os.path.exists(path)
+        ]
+        chunks = [jobs[i:i + chunk_size] for i in range(0, len(jobs), chunk_size)]
+        with self._lock:
+            executor = self._get_executor()
+        return sum(executor.map(render_qr_files, chunks))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _submit(self, content: str, kind: str, path: str):
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                future = self._get_executor().submit(render_qr_file, content, kind, self.scale, self.border, path)
+                self._pending[path] = future
+                future.add_done_callback(lambda _: self._forget(path))
+            return future
+
+    def _forget(self, path: str):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
@@ -0,0 +1,19 @@
+import orjson
+
+from fastapi.responses import JSONResponse
+from pydantic          import BaseModel
+
+
+class FastJSONResponse(JSONResponse):
+    # The app's default response class, rendered with orjson. It is wrapped
+    # in Default() there, so routes with a response_model keep FastAPI's
+    # direct pydantic serialization. Handlers that build their body from data
+    # they already trust (rows shaped by a fixed query, models they just
+    # constructed) return it directly: FastAPI then skips validating it
+    # against response_model a second time, and sync handlers also skip the
+    # threadpool hop that validation takes.
+
+    def render(self, content) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,255 @@
+import bisect
+import re
+import unicodedata
+
+from collections import namedtuple
+
+from sqlalchemy import String, Text, bindparam, cast, func, literal, literal_column, null, select, text, union_all
+
+
+SEARCH_CONFIG = literal_column("'portuguese'::regconfig")
+SEARCH_VECTOR = "search_vector"
+HIGHLIGHT     = ("<mark>", "</mark>")
+MAX_TERMS     = 8
+
+SearchSource = namedtuple("SearchSource", ["kind", "table"])
+SearchHit    = namedtuple("SearchHit", ["kind", "id", "title", "title_highlight", "snippet", "published_at"])
+
+# Every searchable table has `id`, `title` and `published_at`; `content`,
+# when present, is the body.
+
+def search_terms(query: str) -> list:
+    return re.findall(r"\w+", query or "")[:MAX_TERMS]
+
+# Lowercases and strips accents one character for one, so offsets in the
+# folded text are offsets in the original.
+FOLD = {
+    code: base
+    for code in range(0x250)
+    for base in (unicodedata.normalize("NFKD", chr(code))[:1].lower(),)
+    if len(base) == 1 and base != chr(code)
+}
+
+def fold(value: str) -> str:
+    return value.translate(FOLD)
+
+def term_pattern(terms, prefix: bool):
+    # Same rule as the SQLite MATCH: whole words, the last one as a prefix.
+    words = [re.escape(fold(term)) for term in terms]
+    if prefix:
+        words[-1] += r"\w*"
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b")
+
+def highlight(value: str, pattern) -> str:
+    parts, end = [], 0
+    for match in pattern.finditer(fold(value)):
+        parts += (value[end:match.start()], HIGHLIGHT[0], value[match.start():match.end()], HIGHLIGHT[1])
+        end = match.end()
+    parts.append(value[end:])
+    return "".join(parts)
+
+def snippet(value: str, pattern, words: int = 24) -> str:
+    # About `words` words of `value` starting a little before the first match.
+    tokens = [token.start() for token in re.finditer(r"\w+", value)]
+    first  = pattern.search(fold(value))
+    index  = bisect.bisect_left(tokens, first.start()) if first else 0
+    start  = max(0, min(index - 4, len(tokens) - words))
+    if start + words >= len(tokens):
+        fragment = value[tokens[start]:] if tokens else value
+    else:
+        fragment = value[tokens[start]:tokens[start + words]].rstrip()
+    return ("…" if start > 0 else "") + highlight(fragment, pattern) + ("…" if start + words < len(tokens) else "")
+
+def body_column(table):
+    return table.c.get("content")
+
+def search_document(table):
+    vector = func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(table.c.title, literal_column("''"))), literal_column("'A'"))
+    body   = body_column(table)
+    if body is not None:
+        vector = vector.op("||")(
+            func.setweight(func.to_tsvector(SEARCH_CONFIG, func.coalesce(body, literal_column("''"))), literal_column("'B'"))
+        )
+    return vector
+
+
+class PostgresSearch:
+    # tsvector/GIN search with Portuguese stemming. The vector is a stored
+    # generated column, so ranking reads it instead of re-parsing each match.
+    # Titles weigh more than bodies in ts_rank_cd; the last term matches as a
+    # prefix so the endpoint also serves autocomplete. Headlines are computed
+    # for the final page only, since ts_headline re-parses the document.
+
+    def __init__(self, sources):
+        self.sources = sources
+
+    def search(self, db, query: str, kinds=None, limit: int = 20, prefix: bool = False) -> list:
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        tsquery = " & ".join(terms) + (":*" if prefix else "")
+        ts_query = func.to_tsquery(SEARCH_CONFIG, bindparam("tsquery", tsquery))
+
+        candidates = []
+        for source in self.sources:
+            if kinds and source.kind not in kinds:
+                continue
+            table    = source.table
+            document = literal_column(f"{table.name}.{SEARCH_VECTOR}")
+            rank     = func.ts_rank_cd(document, ts_query)
+            body     = body_column(table)
+            candidates.append(
+                select(
+                    literal(source.kind, String).label("kind"),
+                    table.c.id,
+                    table.c.title,
+                    (body if body is not None else cast(null(), Text)).label("body"),
+                    table.c.published_at,
+                    rank.label("rank")
+                )
+                .where(document.op("@@")(ts_query))
+                .order_by(rank.desc())
+                .limit(limit)
+                .subquery()
+            )
+        if not candidates:
+            return []
+
+        hits = union_all(*[select(candidate) for candidate in candidates]).subquery()
+        rows = db.execute(
+            select(
+                hits.c.kind,
+                hits.c.id,
+                hits.c.title,
+                func.ts_headline(SEARCH_CONFIG, hits.c.title, ts_query, text(
+                    f"'HighlightAll=true, StartSel={HIGHLIGHT[0]}, StopSel={HIGHLIGHT[1]}'"
+                )),
+                func.ts_headline(SEARCH_CONFIG, hits.c.body, ts_query, text(
+                    f"'MaxFragments=1, MaxWords=24, MinWords=12, StartSel={HIGHLIGHT[0]}, StopSel={HIGHLIGHT[1]}'"
+                )),
+                hits.c.published_at
+            )
+            .order_by(hits.c.rank.desc(), hits.c.published_at.desc())
+            .limit(limit)
+        )
+        return [SearchHit(*row) for row in rows]
+
+    def create(self, connection):
+        for source in self.sources:
+            table      = source.table.name
+            expression = search_document(source.table).compile(
+                dialect=connection.dialect, compile_kwargs={"include_table": False, "literal_binds": True}
+            )
+            connection.exec_driver_sql(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_VECTOR} tsvector "
+                f"GENERATED ALWAYS AS ({expression}) STORED"
+            )
+            connection.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS ix_{table}_search ON {table} USING gin ({SEARCH_VECTOR})")
+
+
+class SQLiteSearch:
+    # Fallback for SQLite runs: one FTS5 table over all sources, kept in sync
+    # by triggers. unicode61 folds case and accents but does not stem. Rows
+    # are keyed by source rowid * len(sources) + source position, so the type
+    # filter never reads stored columns. bm25 (title weighted 10:1) ranks
+    # every match; a positive `window` ranks only the most recently indexed
+    # `window` matches instead, which bounds the cost of common terms on big
+    # corpora at the price of missing better but older hits. Only the final
+    # page is highlighted, in Python, from the stored text.
+    TABLE = "search_index"
+
+    def __init__(self, sources, window: int = 0):
+        self.sources = sources
+        self.window  = window
+
+    def search(self, db, query: str, kinds=None, limit: int = 20, prefix: bool = False) -> list:
+        terms = search_terms(query)
+        if not terms:
+            return []
+
+        positions = [position for position, source in enumerate(self.sources) if not kinds or source.kind in kinds]
+        if not positions:
+            return []
+
+        rows = db.execute(
+            text(f"""
+                SELECT item.kind, item.item_id, item.title, item.body, item.published_at
+                FROM (
+                    SELECT id, score FROM (
+                        SELECT rowid AS id, bm25({self.TABLE}, 10.0, 1.0) AS score
+                        FROM {self.TABLE}
+                        WHERE {self.TABLE} MATCH :match AND rowid % :sources IN :positions
+                        ORDER BY rowid DESC
+                        LIMIT :window
+                    )
+                    ORDER BY score
+                    LIMIT :limit
+                ) AS top
+                JOIN {self.TABLE} AS item ON item.rowid = top.id
+                ORDER BY top.score, item.published_at DESC
+            """).bindparams(bindparam("positions", expanding=True)),
+            {
+                "match":     " ".join(f'"{term}"' for term in terms) + ("*" if prefix else ""),
+                "sources":   len(self.sources),
+                "positions": positions,
+                "window":    self.window if self.window > 0 else -1,
+                "limit":     limit
+            }
+        )
+        pattern = term_pattern(terms, prefix)
+        return [
+            SearchHit(kind, item_id, title, highlight(title or "", pattern), body and snippet(body, pattern), published_at)
+            for kind, item_id, title, body, published_at in rows
+        ]
+
+    def create(self, connection):
+        # Creates and backfills the index the first time; afterwards the
+        # triggers keep it current. Index rows are keyed by the source rowid,
+        # so a VACUUM of the source tables needs a rebuild (drop the table).
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = ?", (self.TABLE,)
+        ).first()
+        if exists:
+            return
+
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {self.TABLE} USING fts5("
+            "title, body, kind UNINDEXED, item_id UNINDEXED, published_at UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        for source in self.sources:
+            for statement in self._trigger_statements(source):
+                connection.exec_driver_sql(statement)
+            connection.exec_driver_sql(self._insert_statement(source, "", f"FROM {source.table.name}"))
+
+    def _row_key(self, source, row: str) -> str:
+        return f"{row}rowid * {len(self.sources)} + {self.sources.index(source)}"
+
+    def _insert_statement(self, source, row: str, tail: str = "") -> str:
+        body = f"{row}content" if body_column(source.table) is not None else "NULL"
+        return (
+            f"INSERT INTO {self.TABLE} (rowid, title, body, kind, item_id, published_at) "
+            f"SELECT {self._row_key(source, row)}, {row}title, {body}, '{source.kind}', {row}id, {row}published_at {tail}"
+        )
+
+    def _trigger_statements(self, source):
+        table   = source.table.name
+        columns = "title, content, published_at" if body_column(source.table) is not None else "title, published_at"
+        delete  = f"DELETE FROM {self.TABLE} WHERE rowid = {self._row_key(source, 'old.')}"
+        return (
+            f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"{self._insert_statement(source, 'new.')}; END",
+            f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"{delete}; {self._insert_statement(source, 'new.')}; END",
+            f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"{delete}; END",
+        )
+
+
+def create_search_backend(dialect_name: str, sources, window: int = 0):
+    if dialect_name == "postgresql":
+        return PostgresSearch(sources)
+    if dialect_name == "sqlite":
+        return SQLiteSearch(sources, window)
+    return None
@@ -0,0 +1,231 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import time
+
+from collections        import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses        import dataclass
+from typing             import Optional
+
+try:
+    from cryptography.exceptions                           import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from cryptography.hazmat.primitives.serialization      import Encoding, PublicFormat
+except ImportError:
+    Ed25519PrivateKey = None
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class PasswordHasherBusy(RuntimeError):
+    pass
+
+
+class InvalidTicket(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: Optional[str] = None
+    email: Optional[str] = None
+    tubarao_id: Optional[str] = None
+    full_name: Optional[str] = None
+    cpf: Optional[str] = None
+    birth_date: Optional[str] = None
+    gender: Optional[str] = None
+    phone_number: Optional[str] = None
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(message: bytes, secret: str) -> bytes:
+    return hmac.new(secret.encode(), message, hashlib.sha256).digest()
+
+
+_TOKEN_HEADER = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+def encode_access_token(claims: dict, secret: str, ttl: int) -> str:
+    now     = int(time.time())
+    payload = dict(claims, iat=now, exp=now + ttl)
+    signing_input = _TOKEN_HEADER + "." + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return signing_input + "." + _b64encode(_sign(signing_input.encode(), secret))
+
+def decode_access_token(token: str, secret: str) -> dict:
+    try:
+        header, payload, signature = token.split(".")
+        expected = _sign(f"{header}.{payload}".encode(), secret)
+        if not hmac.compare_digest(expected, _b64decode(signature)):
+            raise InvalidToken("Invalid token signature")
+        if json.loads(_b64decode(header)).get("alg") != "HS256":
+            raise InvalidToken("Unsupported token algorithm")
+        claims = json.loads(_b64decode(payload))
+    except InvalidToken:
+        raise
+    except (ValueError, TypeError) as e:
+        raise InvalidToken("Malformed token") from e
+
+    if claims.get("exp", 0) < time.time():
+        raise InvalidToken("Token expired")
+    return claims
+
+
+SCRYPT_PREFIX = "scrypt"
+
+def hash_password(password: str, n: int, r: int, p: int) -> str:
+    salt   = os.urandom(16)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r, dklen=32)
+    return f"{SCRYPT_PREFIX}${n}${r}${p}${_b64encode(salt)}${_b64encode(digest)}"
+
+def verify_and_upgrade(password: str, stored: str, n: int, r: int, p: int):
+    # Returns (valid, new_hash). new_hash is set when the stored value is a
+    # legacy plain-text password or was hashed with older parameters.
+    if not stored:
+        return False, None
+
+    if not stored.startswith(SCRYPT_PREFIX + "$"):
+        if not hmac.compare_digest(stored.encode(), password.encode()):
+            return False, None
+        return True, hash_password(password, n, r, p)
+
+    _, stored_n, stored_r, stored_p, salt, digest = stored.split("$")
+    stored_n, stored_r, stored_p = int(stored_n), int(stored_r), int(stored_p)
+    candidate = hashlib.scrypt(
+        password.encode(), salt=_b64decode(salt), n=stored_n, r=stored_r, p=stored_p,
+        maxmem=256 * stored_n * stored_r, dklen=32
+    )
+    if not hmac.compare_digest(candidate, _b64decode(digest)):
+        return False, None
+    if (stored_n, stored_r, stored_p) != (n, r, p):
+        return True, hash_password(password, n, r, p)
+    return True, None
+
+
+class PasswordHasher:
+    # Runs scrypt in a small dedicated process pool so a login storm uses at
+    # most `workers` cores and never blocks the event loop or the request
+    # threadpool. At most `max_pending` verifications wait for the pool;
+    # beyond that verify() fails fast with PasswordHasherBusy. The workers
+    # run at a lower priority (`nice`), so when the host has no spare core
+    # the scheduler still gives the web process the CPU first: logins slow
+    # down instead of every other request.
+
+    def __init__(self, workers: int, max_pending: int, n: int, r: int = 8, p: int = 1, nice: int = 10):
+        self.workers     = workers
+        self.max_pending = max_pending
+        self.nice        = nice
+        self.n           = n
+        self.r           = r
+        self.p           = p
+
+        self._executor = None
+        self._pending  = 0
+
+    def hash(self, password: str) -> str:
+        return hash_password(password, self.n, self.r, self.p)
+
+    async def verify(self, password: str, stored: str):
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusy("Too many logins in progress")
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), verify_and_upgrade, password, stored, self.n, self.r, self.p
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=os.nice if self.nice > 0 else None,
+                initargs=(self.nice,) if self.nice > 0 else ()
+            )
+        return self._executor
+
+
+TicketClaims = namedtuple("TicketClaims", ["order_id", "match_id", "category_id", "user_id", "quantity", "expires_at"])
+
+def derive_key(secret: str, purpose: str) -> str:
+    return hmac.new(secret.encode(), purpose.encode(), hashlib.sha256).hexdigest()
+
+
+class TicketSigner:
+    # Ticket codes are "<payload>.<signature>", the payload being the claims
+    # as a compact JSON array, so a gate can validate a scan with no database
+    # access. HMAC keeps codes short but gate devices must hold the secret;
+    # with an Ed25519 key they only need the public key.
+
+    HMAC_SIGNATURE_SIZE = 16
+
+    def __init__(self, secret: Optional[str] = None, ed25519_private_key: Optional[str] = None):
+        if ed25519_private_key:
+            if Ed25519PrivateKey is None:
+                raise RuntimeError("Chave Ed25519 configurada, mas o pacote 'cryptography' não está instalado.")
+            self.algorithm    = "Ed25519"
+            self._private_key = Ed25519PrivateKey.from_private_bytes(_b64decode(ed25519_private_key))
+            self._public_key  = self._private_key.public_key()
+        else:
+            if not secret:
+                raise ValueError("TicketSigner needs a secret or an Ed25519 private key")
+            self.algorithm = "HS256"
+            self._secret   = secret.encode()
+
+    def public_key(self) -> Optional[str]:
+        if self.algorithm != "Ed25519":
+            return None
+        return _b64encode(self._public_key.public_bytes(Encoding.Raw, PublicFormat.Raw))
+
+    def sign(self, claims: TicketClaims) -> str:
+        payload = _b64encode(json.dumps(list(claims), separators=(",", ":")).encode())
+        return payload + "." + _b64encode(self._signature(payload.encode()))
+
+    def verify(self, code: str, now: Optional[float] = None) -> TicketClaims:
+        try:
+            payload, signature = code.split(".")
+            if not self._signature_matches(payload.encode(), _b64decode(signature)):
+                raise InvalidTicket("Invalid ticket signature")
+            claims = TicketClaims(*json.loads(_b64decode(payload)))
+        except InvalidTicket:
+            raise
+        except (ValueError, TypeError) as e:
+            raise InvalidTicket("Malformed ticket code") from e
+
+        if claims.expires_at < (time.time() if now is None else now):
+            raise InvalidTicket("Ticket expired")
+        return claims
+
+    def _signature(self, payload: bytes) -> bytes:
+        if self.algorithm == "Ed25519":
+            return self._private_key.sign(payload)
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()[:self.HMAC_SIGNATURE_SIZE]
+
+    def _signature_matches(self, payload: bytes, signature: bytes) -> bool:
+        if self.algorithm == "Ed25519":
+            try:
+                self._public_key.verify(signature, payload)
+                return True
+            except InvalidSignature:
+                return False
+        return hmac.compare_digest(self._signature(payload), signature)
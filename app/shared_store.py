@@ -0,0 +1,168 @@
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class MemoryStore:
+    # Local stand-in for the shared store: same operations as RedisStore, but
+    # the state lives in this process only, so each gunicorn worker keeps its
+    # own copy.
+
+    def __init__(self):
+        self._lock    = threading.Lock()
+        self._hashes  = {}
+        self._buckets = {}
+
+    def hincrby(self, name: str, field: str, amount: int = 1) -> int:
+        with self._lock:
+            values = self._hashes.setdefault(name, {})
+            values[field] = values.get(field, 0) + amount
+            return values[field]
+
+    def hsetnx(self, name: str, field: str, value: int) -> bool:
+        with self._lock:
+            values = self._hashes.setdefault(name, {})
+            if field in values:
+                return False
+            values[field] = value
+            return True
+
+    def hget(self, name: str, field: str):
+        with self._lock:
+            return self._hashes.get(name, {}).get(field)
+
+    def hmget(self, name: str, fields) -> list:
+        with self._lock:
+            values = self._hashes.get(name, {})
+            return [values.get(field) for field in fields]
+
+    def hpopall(self, name: str) -> dict:
+        with self._lock:
+            return self._hashes.pop(name, {})
+
+    def take_slot(self, key: str, interval_ms: float, burst: int, member=None, hold_ms: float = 0):
+        now = time.time() * 1000
+        with self._lock:
+            values = self._hashes.setdefault(key, {})
+            held   = values.get(f"member:{member}") if member is not None else None
+            if held is not None and held[0] + hold_ms > now:
+                return held
+            slot   = max(now - burst * interval_ms, values.get("last_slot_ms", 0)) + interval_ms
+            values["last_slot_ms"] = slot
+            values["issued"]       = values.get("issued", 0) + 1
+            if member is not None:
+                values[f"member:{member}"] = (slot, values["issued"])
+            return slot, values["issued"]
+
+    def take_token(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (cost - tokens) / rate
+
+
+class RedisStore:
+    # Refills the bucket from the Redis clock and takes `cost` tokens in one
+    # round trip. Returns 0 when granted, otherwise milliseconds until enough
+    # tokens are back.
+    TAKE_TOKEN_SCRIPT = """
+    local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    local clock  = redis.call('TIME')
+    local now    = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - updated) * rate)
+    local wait = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        wait = math.ceil((cost - tokens) / rate * 1000)
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+    return wait
+    """
+
+    # Hands out the next admission slot of a queue: one `interval_ms` after
+    # the previous slot, but never earlier than `burst` intervals before now,
+    # so an idle queue does not bank admissions. Also counts the joins. A
+    # member (ARGV[3], empty for none) whose slot is less than `hold_ms`
+    # (ARGV[4]) old gets that slot back instead of a new one. The hash
+    # expires once its last slot could no longer matter.
+    TAKE_SLOT_SCRIPT = """
+    local interval, burst, member, hold = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3], tonumber(ARGV[4])
+    local clock = redis.call('TIME')
+    local now   = tonumber(clock[1]) * 1000 + tonumber(clock[2]) / 1000
+    if member ~= '' then
+        local held = redis.call('HGET', KEYS[1], 'member:' .. member)
+        if held then
+            local held_slot, held_issued = string.match(held, '([^:]+):([^:]+)')
+            if tonumber(held_slot) + hold > now then
+                return {held_slot, tonumber(held_issued)}
+            end
+        end
+    end
+    local last  = tonumber(redis.call('HGET', KEYS[1], 'last_slot_ms')) or 0
+    local slot  = math.max(now - burst * interval, last) + interval
+    redis.call('HSET', KEYS[1], 'last_slot_ms', string.format('%.3f', slot))
+    local issued = redis.call('HINCRBY', KEYS[1], 'issued', 1)
+    if member ~= '' then
+        redis.call('HSET', KEYS[1], 'member:' .. member, string.format('%.3f', slot) .. ':' .. issued)
+    end
+    redis.call('PEXPIRE', KEYS[1], math.ceil(slot - now + math.max(hold, burst * interval)) + 1000)
+    return {string.format('%.3f', slot), issued}
+    """
+
+    def __init__(self, url: str):
+        self.client      = redis.Redis.from_url(url, decode_responses=True)
+        self._take_token = self.client.register_script(self.TAKE_TOKEN_SCRIPT)
+        self._take_slot  = self.client.register_script(self.TAKE_SLOT_SCRIPT)
+
+    def hincrby(self, name: str, field: str, amount: int = 1) -> int:
+        return self.client.hincrby(name, field, amount)
+
+    def hsetnx(self, name: str, field: str, value: int) -> bool:
+        return bool(self.client.hsetnx(name, field, value))
+
+    def hget(self, name: str, field: str):
+        value = self.client.hget(name, field)
+        return int(value) if value is not None else None
+
+    def hmget(self, name: str, fields) -> list:
+        return [int(value) if value is not None else None for value in self.client.hmget(name, list(fields))]
+
+    def hpopall(self, name: str) -> dict:
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(name)
+        pipe.delete(name)
+        values, _ = pipe.execute()
+        return {field: int(value) for field, value in values.items()}
+
+    def take_slot(self, key: str, interval_ms: float, burst: int, member=None, hold_ms: float = 0):
+        slot, issued = self._take_slot(keys=[key], args=[interval_ms, burst, "" if member is None else member, hold_ms])
+        return float(slot), int(issued)
+
+    def take_token(self, key: str, rate: float, burst: int, cost: int = 1) -> float:
+        return self._take_token(keys=[key], args=[rate, burst, cost]) / 1000.0
+
+
+def create_shared_store(url: str = None):
+    if not url or url.startswith("memory://"):
+        return MemoryStore()
+
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if redis is None:
+            raise RuntimeError("SHARED_STORE_URL aponta para o Redis, mas o pacote 'redis' não está instalado.")
+        return RedisStore(url)
+
+    raise ValueError(f"SHARED_STORE_URL não suportada: {url}")
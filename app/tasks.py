@@ -0,0 +1,36 @@
+import threading
+
+
+class PeriodicTask:
+    def __init__(self, name: str, interval: float, func):
+        self.name     = name
+        self.interval = interval
+        self.func     = func
+        self._stop    = threading.Event()
+        self._thread  = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, run_last: bool = True):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        if run_last:
+            self._run_once()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._run_once()
+
+    def _run_once(self):
+        try:
+            self.func()
+        except Exception as e:
+            print(f"Tarefa periódica '{self.name}' falhou: {e}")
@@ -0,0 +1,101 @@
+import math
+import time
+
+from collections import namedtuple
+
+from security import InvalidToken, decode_access_token, encode_access_token
+
+
+QueueStatus = namedtuple("QueueStatus", ["match_id", "position", "ahead", "admitted", "eta", "expires_at"])
+
+
+class QueueRejected(Exception):
+    def __init__(self, message: str, retry_after: float = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class WaitingRoom:
+    # One queue per match. Joining takes the next admission slot from the
+    # shared store in one atomic step: one 1/rate interval after the previous
+    # slot, and never more than `burst` intervals in the past, so a queue
+    # that sat idle admits at most `burst` fans at once however early its
+    # first join was. The slot travels in the signed queue token, so polling
+    # and checking a pass need no store or database access, and every worker
+    # agrees on who is admitted.
+    #
+    # A fan joining again while their pass is still good gets the same slot
+    # back, so rejoining never jumps the queue nor loses the place. Buying
+    # spends one of the pass's `uses`, counted in the store; a purchase that
+    # fails gives it back with refund().
+
+    def __init__(self, store, secret: str, rate: float, burst: int, window: float, uses: int = 1, name: str = "waitingroom"):
+        if rate <= 0:
+            raise ValueError("Waiting room admission rate must be positive")
+        self.store  = store
+        self.secret = secret
+        self.rate   = rate
+        self.burst  = max(0, burst)
+        self.window = window
+        self.uses   = max(1, uses)
+        self.name   = name
+
+    def join(self, match_id: int, user_id: int):
+        slot_ms, position = self.store.take_slot(
+            f"{self.name}:{match_id}", 1000.0 / self.rate, self.burst,
+            member  = user_id,
+            hold_ms = self.window * 1000.0
+        )
+
+        claims = {"typ": "queue", "uid": user_id, "match": match_id, "pos": position, "at": int(slot_ms)}
+        ttl    = math.ceil(slot_ms / 1000.0 + self.window - time.time())
+        token  = encode_access_token(claims, self.secret, max(1, ttl))
+        return token, self._status(claims)
+
+    def status(self, token: str, user_id: int) -> QueueStatus:
+        return self._status(self._decode(token, user_id))
+
+    def check(self, token: str, user_id: int, match_id: int) -> dict:
+        if not token:
+            raise QueueRejected("Queue pass required")
+        claims = self._decode(token, user_id)
+        if claims["match"] != match_id:
+            raise QueueRejected("Queue pass is for another match")
+        status = self._status(claims)
+        if not status.admitted:
+            raise QueueRejected("Not admitted yet", retry_after=status.eta)
+        return claims
+
+    def use(self, token: str, user_id: int, match_id: int) -> tuple:
+        # Checks the pass and spends one of its uses; returns what refund()
+        # needs to give it back.
+        claims = self.check(token, user_id, match_id)
+        used   = (f"{self.name}:{match_id}:uses", f"{user_id}:{claims['at']}")
+        if self.store.hincrby(*used, 1) > self.uses:
+            self.refund(used)
+            raise QueueRejected("Queue pass already used")
+        return used
+
+    def refund(self, used: tuple):
+        self.store.hincrby(*used, -1)
+
+    def _decode(self, token: str, user_id: int) -> dict:
+        try:
+            claims = decode_access_token(token, self.secret)
+        except InvalidToken as e:
+            raise QueueRejected("Invalid or expired queue pass") from e
+        if claims.get("typ") != "queue" or claims.get("uid") != user_id or "at" not in claims:
+            raise QueueRejected("Invalid or expired queue pass")
+        return claims
+
+    def _status(self, claims: dict) -> QueueStatus:
+        now         = time.time()
+        admitted_at = claims["at"] / 1000.0
+        return QueueStatus(
+            match_id   = claims["match"],
+            position   = claims["pos"],
+            ahead      = max(0, math.floor((admitted_at - now) * self.rate)),
+            admitted   = admitted_at <= now,
+            eta        = max(0.0, admitted_at - now),
+            expires_at = int(admitted_at + self.window)
+        )
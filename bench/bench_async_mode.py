@@ -0,0 +1,58 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from datetime import datetime, timedelta
+
+from harness import auth_headers, configure, run_load, with_lifespan
+
+# Throughput of the hot read endpoints at 1k concurrent connections, with
+# DATABASE_MODE=sync (def routes on the threadpool) and async (AsyncSession
+# routes on the event loop). Each mode runs in its own process, because the
+# routers are picked at import.
+#
+#   python bench/bench_async_mode.py [total] [concurrency]
+
+PATHS = ("/api/v1/matches", "/api/v1/news/n{index}", "/api/v1/dashboard")
+
+
+def seed(main):
+    db = main.SessionLocal()
+    db.add(main.Competition(id=1, name="Série B", country="BR"))
+    now = datetime.utcnow()
+    for match_id in range(1, 21):
+        db.add(main.Match(id=match_id, status="SALE_OPEN", location="Estádio", home_team="Ferroviário", away_team=f"Rival {match_id}",
+                          is_home_game=True, match_datetime=now + timedelta(days=match_id), competition_id=1))
+        for category in range(4):
+            db.add(main.TicketCategory(id=f"m{match_id}c{category}", match_id=match_id, name=f"Setor {category}", available_quantity=1000, price=5000))
+    for index in range(50):
+        db.add(main.News(id=f"n{index}", category="geral", title=f"Notícia {index}", published_at=now - timedelta(hours=index),
+                         image_url="img", author="Assessoria", content="texto " * 200, like_count=0, view_count=0))
+    db.commit()
+    db.close()
+
+def run(mode: str, total: int, concurrency: int):
+    main = configure(DATABASE_MODE=mode)
+    seed(main)
+    headers = auth_headers(main, 1)
+
+    async def request(client, index):
+        path = PATHS[index % len(PATHS)].format(index=index % 50)
+        return await client.get(path, headers=headers)
+
+    async def body(client):
+        await run_load(client, request, total=min(total, 2000), concurrency=concurrency)
+        return await run_load(client, request, total=total, concurrency=concurrency)
+
+    print(f"{mode:>5}: {asyncio.run(with_lifespan(main, body)).summary()}")
+
+
+if __name__ == "__main__":
+    total       = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    if os.getenv("BENCH_MODE"):
+        run(os.environ["BENCH_MODE"], total, concurrency)
+    else:
+        for mode in ("sync", "async"):
+            subprocess.run([sys.executable, __file__, str(total), str(concurrency)], env={**os.environ, "BENCH_MODE": mode}, check=True)
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from datetime import datetime, timedelta
+
+from harness import configure, run_load, with_lifespan
+
+# Latency of GET /api/v1/dashboard served from the snapshot cache, per mode
+# and concurrency, with the tables left alone ("warm") and with a news write
+# every 50 ms ("writes"), which makes the next requests rebuild the snapshot.
+# A last run sends the ETag back and gets 304s. The c=1 figure is the time
+# to serve one request. At c=100 the app and the load generator share one
+# event loop and, here, one CPU: the requests queue behind each other, and
+# the in-process transport does not hand the loop out fairly, so the p99
+# there measures that queue and not the route.
+#
+#   python bench/bench_dashboard.py [total]
+
+CONCURRENCY = (1, 100)
+
+
+def seed(main):
+    db = main.SessionLocal()
+    db.add(main.Competition(id=1, name="Série B", country="BR"))
+    now = datetime.utcnow()
+    db.add(main.Match(id=1, status="SALE_OPEN", location="Estádio", home_team="Ferroviário", away_team="Rival",
+                      is_home_game=True, match_datetime=now + timedelta(days=3), competition_id=1))
+    for index in range(20):
+        db.add(main.News(id=f"n{index}", category="geral", title=f"Notícia {index}", published_at=now - timedelta(hours=index),
+                         image_url="img", author="Assessoria", content="texto", like_count=0, view_count=0))
+    db.commit()
+    db.close()
+
+def run(mode: str, total: int):
+    main = configure(DATABASE_MODE=mode)
+    seed(main)
+
+    async def writer(stop: asyncio.Event):
+        def write():
+            db = main.SessionLocal()
+            try:
+                db.get(main.News, "n0").title = f"Notícia {datetime.utcnow()}"
+                db.commit()
+            finally:
+                db.close()
+        while not stop.is_set():
+            await asyncio.to_thread(write)
+            await asyncio.sleep(0.05)
+
+    async def body(client):
+        async def plain(client, index):
+            return await client.get("/api/v1/dashboard")
+
+        async def revalidate(client, index):
+            return await client.get("/api/v1/dashboard", headers={"If-None-Match": etag})
+
+        await run_load(client, plain, total=min(total, 2000), concurrency=10)
+        for concurrency in CONCURRENCY:
+            print(f"{mode:>5} c={concurrency:<4} warm  : {(await run_load(client, plain, total, concurrency)).summary()}")
+
+            stop    = asyncio.Event()
+            writing = asyncio.create_task(writer(stop))
+            result  = await run_load(client, plain, total, concurrency)
+            stop.set()
+            await writing
+            print(f"{mode:>5} c={concurrency:<4} writes: {result.summary()}")
+
+        etag = (await client.get("/api/v1/dashboard")).headers["ETag"]
+        print(f"{mode:>5} c=1    304   : {(await run_load(client, revalidate, total, 1)).summary()}")
+
+    asyncio.run(with_lifespan(main, body))
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    if os.getenv("BENCH_MODE"):
+        run(os.environ["BENCH_MODE"], total)
+    else:
+        for mode in ("sync", "async"):
+            subprocess.run([sys.executable, __file__, str(total)], env={**os.environ, "BENCH_MODE": mode}, check=True)
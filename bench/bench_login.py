@@ -0,0 +1,62 @@
+import asyncio
+import sys
+
+from datetime import datetime, timedelta
+
+from harness import configure, run_load, with_lifespan
+
+# Login throughput, and what a login storm does to the latency of another
+# endpoint. scrypt runs in the PASSWORD_HASH_WORKERS process pool, so the
+# event loop keeps serving GET /api/v1/matches while logins hash; logins
+# past PASSWORD_HASH_MAX_PENDING are answered 503 at once instead of
+# queueing. The hashing processes and the app share this host's CPUs, so
+# on a single core the probe still pays for the CPU the hashes take.
+#
+#   python bench/bench_login.py [logins] [probes]
+
+USERS             = 200
+PASSWORD          = "senha-do-socio"
+LOGIN_CONCURRENCY = 32
+PROBE_CONCURRENCY = 4
+
+
+def seed(main):
+    db = main.SessionLocal()
+    stored = main.password_hasher.hash(PASSWORD)
+    db.add_all(main.User(username=f"socio{index}", email=f"socio{index}@example.com", password=stored) for index in range(USERS))
+    db.add(main.Competition(id=1, name="Série B", country="BR"))
+    db.add(main.Match(id=1, status="SALE_OPEN", location="Estádio", home_team="Ferroviário", away_team="Rival",
+                      is_home_game=True, match_datetime=datetime.utcnow() + timedelta(days=3), competition_id=1))
+    db.commit()
+    db.close()
+
+def run(logins: int, probes: int):
+    main = configure()
+    seed(main)
+
+    async def login(client, index):
+        return await client.post("/api/v1/auth/login", json={"email": f"socio{index % USERS}@example.com", "password": PASSWORD})
+
+    async def probe(client, index):
+        return await client.get("/api/v1/matches")
+
+    async def body(client):
+        await run_load(client, probe, total=min(probes, 500), concurrency=PROBE_CONCURRENCY)
+        await run_load(client, login, total=main.PASSWORD_HASH_WORKERS * 2, concurrency=main.PASSWORD_HASH_WORKERS)
+
+        print(f"matches alone      : {(await run_load(client, probe, probes, PROBE_CONCURRENCY)).summary()}")
+        print(f"login alone        : {(await run_load(client, login, logins, LOGIN_CONCURRENCY)).summary()}")
+
+        storm = asyncio.create_task(run_load(client, login, logins, LOGIN_CONCURRENCY))
+        probed = await run_load(client, probe, probes, PROBE_CONCURRENCY)
+        print(f"matches under login: {probed.summary()}")
+        print(f"login with matches : {(await storm).summary()}")
+
+    asyncio.run(with_lifespan(main, body))
+
+
+if __name__ == "__main__":
+    run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    )
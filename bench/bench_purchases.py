@@ -0,0 +1,74 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from harness import auth_headers, configure, run_load, with_lifespan
+
+# Ticket purchases per second and database commits per second with
+# TICKET_PURCHASE_MODE=direct (one transaction per purchase) and =batched
+# (group commit). Every request buys one ticket for its own user, spread
+# over a few categories so both modes also contend on the stock shards.
+# Commits are counted on the engine, so the inventory reconciler's own
+# commits are included; it runs every INVENTORY_RECONCILE_INTERVAL seconds.
+# Direct purchases are admitted up to ADMISSION_MAX_CONCURRENCY (the pool
+# size) at a time and the rest get 503, so c=15 is the most direct mode
+# takes and c=64 shows what it sheds.
+#
+#   python bench/bench_purchases.py [total]
+
+CONCURRENCY = (1, 15, 64)
+CATEGORIES  = ("north", "south", "east", "west")
+
+
+def seed(main, total: int):
+    db = main.SessionLocal()
+    db.add(main.Competition(id=1, name="Série B", country="BR"))
+    db.add(main.Match(id=1, status="SALE_OPEN", location="Estádio", home_team="Ferroviário", away_team="Rival",
+                      is_home_game=True, match_datetime=datetime.utcnow() + timedelta(days=3), competition_id=1))
+    for category_id in CATEGORIES:
+        db.add(main.TicketCategory(id=category_id, match_id=1, name=category_id, available_quantity=total * 2, price=5000))
+    db.commit()
+    db.close()
+
+def run(mode: str, total: int):
+    main = configure(TICKET_PURCHASE_MODE=mode)
+    seed(main, total * len(CONCURRENCY))
+
+    commits = [0]
+    event.listen(main.engine, "commit", lambda connection: commits.__setitem__(0, commits[0] + 1))
+    headers = [auth_headers(main, user_id) for user_id in range(1, total * len(CONCURRENCY) + 1)]
+    users   = iter(headers)
+
+    async def buy(client, index):
+        return await client.post(
+            "/api/v1/tickets/orders",
+            json={"match_id": 1, "category_id": CATEGORIES[index % len(CATEGORIES)], "quantity": 1, "payment": {"method": "pix"}},
+            headers=next(users)
+        )
+
+    async def body(client):
+        for concurrency in CONCURRENCY:
+            before = commits[0]
+            result = await run_load(client, buy, total, concurrency)
+            done   = commits[0] - before
+            sold   = result.statuses.get(201, 0)
+            print(
+                f"{mode:>7} c={concurrency:<3}: {result.summary()}; {sold / result.elapsed:,.0f} purchases/s, "
+                f"{done} commits = {done / result.elapsed:,.0f} commits/s, {sold / max(done, 1):.1f} purchases/commit"
+            )
+
+    asyncio.run(with_lifespan(main, body))
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    if os.getenv("BENCH_MODE"):
+        run(os.environ["BENCH_MODE"], total)
+    else:
+        for mode in ("direct", "batched"):
+            subprocess.run([sys.executable, __file__, str(total)], env={**os.environ, "BENCH_MODE": mode}, check=True)
@@ -0,0 +1,112 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from harness import configure, percentile, run_load, with_lifespan
+
+# GET /api/v1/matches with 200 matches on sale, 6 ticket categories each.
+# First the query alone: the single flat query the route runs against the
+# per-match ORM loading it replaced (matches, then each match's categories
+# and competition lazily), with the statements each one sends. Then the
+# route itself, per mode and concurrency, plain and gzip-encoded. Plain
+# GETs always reach the handler: the HTTP cache only answers revalidations.
+#
+#   python bench/bench_upcoming_games.py [total]
+
+MATCHES     = 200
+CATEGORIES  = 6
+CONCURRENCY = (1, 10)
+
+
+def seed(main):
+    db  = main.SessionLocal()
+    now = datetime.utcnow()
+    for competition_id in range(1, 5):
+        db.add(main.Competition(id=competition_id, name=f"Competição {competition_id}", country="BR"))
+    for match_id in range(1, MATCHES + 1):
+        db.add(main.Match(id=match_id, status="SALE_OPEN", location="Estádio", home_team="Ferroviário", away_team=f"Rival {match_id}",
+                          is_home_game=True, match_datetime=now + timedelta(hours=match_id), competition_id=match_id % 4 + 1))
+        for category in range(CATEGORIES):
+            db.add(main.TicketCategory(id=f"m{match_id}c{category}", match_id=match_id, name=f"Setor {category}",
+                                       available_quantity=1000, price=5000))
+    db.commit()
+    db.close()
+
+def per_match_listing(main, db) -> dict:
+    # The route before it ran one query.
+    matches = db.query(main.Match).filter(main.ON_SALE_MATCH).order_by(main.Match.match_datetime).all()
+    return {"matches": [
+        {
+            "id": str(match.id),
+            "championship": match.competition.name if match.competition else "N/A",
+            "date": match.match_datetime.strftime("%Y-%m-%d"),
+            "time": match.match_datetime.strftime("%H:%M"),
+            "stadium": match.location,
+            "status": match.status,
+            "ticket_categories": [
+                {"id": category.id, "name": category.name, "available_quantity": category.available_quantity, "price": category.price / 100.0}
+                for category in match.ticket_categories
+            ]
+        }
+        for match in matches
+    ]}
+
+def time_query(main, build, runs: int) -> str:
+    statements = [0]
+    count = lambda *args: statements.__setitem__(0, statements[0] + 1)
+    event.listen(main.engine, "before_cursor_execute", count)
+    latencies = []
+    try:
+        for _ in range(runs):
+            db = main.SessionLocal()
+            try:
+                started = time.perf_counter()
+                body    = build(db)
+                latencies.append(time.perf_counter() - started)
+            finally:
+                db.close()
+    finally:
+        event.remove(main.engine, "before_cursor_execute", count)
+    assert len(body["matches"]) == MATCHES and all(len(match["ticket_categories"]) == CATEGORIES for match in body["matches"])
+    return (
+        f"{statements[0] // runs} statements; p50 {percentile(latencies, 0.50) * 1000:.2f} ms, "
+        f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms"
+    )
+
+def run(mode: str, total: int):
+    main = configure(DATABASE_MODE=mode)
+    seed(main)
+
+    if mode == "sync":
+        flat = lambda db: main.build_upcoming_games(db.execute(main.UPCOMING_GAMES_QUERY))
+        print(f"query flat      : {time_query(main, flat, 200)}")
+        print(f"query per match : {time_query(main, lambda db: per_match_listing(main, db), 200)}")
+
+    async def body(client):
+        async def plain(client, index):
+            return await client.get("/api/v1/matches", headers={"Accept-Encoding": "identity"})
+
+        async def gzipped(client, index):
+            return await client.get("/api/v1/matches", headers={"Accept-Encoding": "gzip"})
+
+        await run_load(client, plain, total=min(total, 200), concurrency=10)
+        for concurrency in CONCURRENCY:
+            print(f"{mode:>5} c={concurrency:<3} plain: {(await run_load(client, plain, total, concurrency)).summary()}")
+            print(f"{mode:>5} c={concurrency:<3} gzip : {(await run_load(client, gzipped, total, concurrency)).summary()}")
+
+    asyncio.run(with_lifespan(main, body))
+
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    if os.getenv("BENCH_MODE"):
+        run(os.environ["BENCH_MODE"], total)
+    else:
+        for mode in ("sync", "async"):
+            subprocess.run([sys.executable, __file__, str(total)], env={**os.environ, "BENCH_MODE": mode}, check=True)
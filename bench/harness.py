@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+# Load runs against the ASGI app in this process: no server, no sockets, so
+# the numbers measure the app (routing, handlers, database, event loop and
+# threadpool) and not a load generator fighting it for the same CPU over
+# TCP. Every script takes its configuration from the environment like the
+# app does; `configure` must run before `main` is imported.
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+
+def configure(**overrides):
+    database_dir = tempfile.mkdtemp(prefix="socio-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(database_dir, 'bench.db')}"
+    os.environ["QR_CACHE_DIR"] = os.path.join(database_dir, "qr_cache")
+    os.environ.setdefault("AUTH_SECRET_KEY", "bench-secret")
+    os.environ.setdefault("RATE_LIMIT_USER_RATE", "0")
+    os.environ.setdefault("RATE_LIMIT_ROUTE_RATE", "0")
+    for name, value in overrides.items():
+        os.environ[name] = str(value)
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+
+    import main
+    main.Base.metadata.create_all(bind=main.engine)
+    return main
+
+def auth_headers(main, user_id: int) -> dict:
+    return {"Authorization": "Bearer " + main.encode_access_token({"sub": str(user_id)}, main.AUTH_SECRET_KEY, 3600)}
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else 0.0
+
+class LoadResult:
+    def __init__(self, latencies, statuses, elapsed):
+        self.latencies = latencies
+        self.statuses  = statuses
+        self.elapsed   = elapsed
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> str:
+        codes = ", ".join(f"{code}: {count}" for code, count in sorted(self.statuses.items()))
+        return (
+            f"{len(self.latencies)} req in {self.elapsed:.2f} s = {self.throughput:,.0f} req/s; "
+            f"p50 {percentile(self.latencies, 0.50) * 1000:.2f} ms, p99 {percentile(self.latencies, 0.99) * 1000:.2f} ms ({codes})"
+        )
+
+
+async def run_load(client, make_request, total: int, concurrency: int) -> LoadResult:
+    # `make_request(client, index)` sends one request and returns the
+    # response; `concurrency` requests are kept in flight until `total` are
+    # done.
+    latencies, statuses = [], {}
+    counter = iter(range(total))
+
+    async def connection():
+        for index in counter:
+            started  = time.perf_counter()
+            response = await make_request(client, index)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection() for _ in range(concurrency)))
+    return LoadResult(latencies, statuses, time.perf_counter() - started)
+
+def asgi_client(main):
+    import httpx
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+async def with_lifespan(main, body):
+    # Starts the queues and periodic tasks the app starts under gunicorn.
+    async with main.app.router.lifespan_context(main.app):
+        while not main.app.state.database_ready:
+            await asyncio.sleep(0.01)
+        async with asgi_client(main) as client:
+            return await body(client)
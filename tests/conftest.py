@@ -0,0 +1,81 @@
+import os
+import sys
+import tempfile
+
+from datetime import datetime, timedelta
+
+import pytest
+
+# The app reads its configuration at import time, so the environment is set
+# before `main` is imported. DATABASE_URL is forced to a throwaway SQLite file:
+# the tests delete every row between runs and must never see the .env
+# database.
+DATABASE_DIR = tempfile.mkdtemp(prefix="socio-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR, 'test.db')}"
+os.environ["QR_CACHE_DIR"] = os.path.join(DATABASE_DIR, "qr_cache")
+os.environ.setdefault("AUTH_SECRET_KEY", "test-secret")
+os.environ.setdefault("RATE_LIMIT_USER_BURST", "1000")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import main
+
+from fastapi.testclient import TestClient
+from inventory          import TicketInventory
+
+main.Base.metadata.create_all(bind=main.engine)
+
+
+@pytest.fixture(autouse=True)
+def clean_database(monkeypatch):
+    with main.engine.begin() as connection:
+        for table in reversed(main.Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+    # The inventory remembers provisioned and sold out categories per worker.
+    monkeypatch.setattr(main, "ticket_inventory", TicketInventory(
+        shard_table    = main.TicketStockShard.__table__,
+        category_table = main.TicketCategory.__table__,
+        mirror_table   = main.TicketStockMirror.__table__,
+        shard_count    = main.TICKET_STOCK_SHARDS,
+        sold_out_ttl   = main.TICKET_SOLD_OUT_TTL
+    ))
+    main.data_versions.bump(*main.Base.metadata.tables)
+    yield
+
+
+@pytest.fixture
+def db():
+    session = main.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def auth_headers(user_id: int) -> dict:
+    return {"Authorization": "Bearer " + main.encode_access_token({"sub": str(user_id)}, main.AUTH_SECRET_KEY, 3600)}
+
+def add_match(db, match_id: int, status: str = "upcoming", days: int = 1, is_home_game: bool = True, categories=()) -> main.Match:
+    if db.get(main.Competition, 1) is None:
+        db.add(main.Competition(id=1, name="Série B", country="BR"))
+    match = main.Match(
+        id             = match_id,
+        status         = status,
+        location       = "Estádio",
+        home_team      = "Ferroviário",
+        away_team      = f"Rival {match_id}",
+        is_home_game   = is_home_game,
+        match_datetime = datetime.utcnow() + timedelta(days=days),
+        competition_id = 1
+    )
+    db.add(match)
+    for category_id, available in categories:
+        db.add(main.TicketCategory(id=category_id, match_id=match_id, name=category_id, available_quantity=available, price=5000))
+    db.commit()
+    return match
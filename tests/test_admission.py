@@ -0,0 +1,128 @@
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fastapi.testclient import TestClient
+
+import main
+
+from admission    import AdmissionControl, AdmissionRejected, ConcurrencyLimiter, RateLimiter
+from shared_store import MemoryStore
+
+from conftest import add_match, auth_headers
+
+
+def test_token_bucket_grants_the_burst_then_refills_at_the_rate():
+    limiter = RateLimiter(MemoryStore(), "test", rate=20, burst=3)
+
+    assert [limiter.acquire("fan") for _ in range(3)] == [0.0, 0.0, 0.0]
+    retry_after = limiter.acquire("fan")
+    assert 0 < retry_after <= 1 / 20
+
+    # Buckets are per key.
+    assert limiter.acquire("other fan") == 0.0
+
+    time.sleep(retry_after + 0.01)
+    assert limiter.acquire("fan") == 0.0
+
+def test_token_bucket_with_zero_rate_is_disabled():
+    limiter = RateLimiter(MemoryStore(), "test", rate=0, burst=1)
+    assert all(limiter.acquire("fan") == 0.0 for _ in range(100))
+
+def test_concurrency_limiter_caps_requests_in_progress():
+    limiter = ConcurrencyLimiter(2)
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    limiter.release()
+    assert limiter.try_acquire()
+
+    unlimited = ConcurrencyLimiter(0)
+    assert all(unlimited.try_acquire() for _ in range(100))
+
+@pytest.mark.parametrize("user_burst, route_burst, slots, status_code, reason", [
+    (0, 10, 1, 429, "user_rate"),
+    (10, 0, 1, 429, "route_rate"),
+    (10, 10, 0, 503, "concurrency"),
+])
+def test_admission_control_reports_what_refused_the_request(user_burst, route_burst, slots, status_code, reason):
+    store       = MemoryStore()
+    concurrency = ConcurrencyLimiter(1)
+    control     = AdmissionControl(
+        RateLimiter(store, "user", rate=1, burst=10),
+        RateLimiter(store, "route", rate=1, burst=10),
+        concurrency
+    )
+    # Drain whatever the case says is exhausted.
+    for _ in range(10 - user_burst):
+        control.user_limiter.acquire("route:1")
+    for _ in range(10 - route_burst):
+        control.route_limiter.acquire("route")
+    for _ in range(1 - slots):
+        concurrency.try_acquire()
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        control.enter("route", 1)
+    assert rejected.value.status_code == status_code
+    assert rejected.value.reason == reason
+    assert rejected.value.retry_after > 0
+
+
+def test_rate_limited_purchase_is_429_with_retry_after(db, client, monkeypatch):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 10)])
+    monkeypatch.setattr(main.admission_control, "user_limiter", RateLimiter(MemoryStore(), "user", rate=0.5, burst=1))
+    body = {"match_id": 1, "category_id": "north", "quantity": 1, "payment": {"method": "pix"}}
+
+    assert client.post("/api/v1/tickets/orders", json=body, headers=auth_headers(1)).status_code == 201
+    response = client.post("/api/v1/tickets/orders", json=body, headers=auth_headers(1))
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+
+def test_overloaded_worker_is_503_with_retry_after(db, client, monkeypatch):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 10)])
+    busy = ConcurrencyLimiter(1)
+    busy.try_acquire()
+    monkeypatch.setattr(main.admission_control, "concurrency", busy)
+
+    response = client.post(
+        "/api/v1/tickets/orders",
+        json={"match_id": 1, "category_id": "north", "quantity": 1, "payment": {"method": "pix"}},
+        headers=auth_headers(1)
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    busy.release()
+
+def test_batched_purchases_are_not_capped_at_the_pool_size(db, monkeypatch):
+    # Queued buyers hold no connection, so a whole batch may wait at once.
+    monkeypatch.setattr(main, "TICKET_PURCHASE_MODE", "batched")
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 1000)])
+
+    batch_sizes = []
+    handler     = main.ticket_purchase_queue.handler
+    lock        = threading.Lock()
+
+    def recording_handler(items):
+        with lock:
+            batch_sizes.append(len(items))
+        return handler(items)
+
+    monkeypatch.setattr(main.ticket_purchase_queue, "handler", recording_handler)
+    monkeypatch.setattr(main.ticket_purchase_queue, "max_wait", 0.05)
+
+    with TestClient(main.app) as client:
+        def buy(user_id):
+            return client.post(
+                "/api/v1/tickets/orders",
+                json={"match_id": 1, "category_id": "north", "quantity": 1, "payment": {"method": "pix"}},
+                headers=auth_headers(user_id)
+            ).status_code
+
+        with ThreadPoolExecutor(main.PURCHASE_BATCH_SIZE) as executor:
+            status_codes = list(executor.map(buy, range(1, 2 * main.PURCHASE_BATCH_SIZE + 1)))
+
+    assert status_codes == [201] * (2 * main.PURCHASE_BATCH_SIZE)
+    assert max(batch_sizes) > main.ADMISSION_MAX_CONCURRENCY
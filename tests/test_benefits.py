@@ -0,0 +1,48 @@
+import logging
+
+import main
+
+
+def add_partner(db, partner_id: str, **fields):
+    values = dict(
+        name="Parceiro", category="Alimentação", logo_url="logo.png", discount="10%", is_featured=False,
+        about_establishment="Sobre", how_to_use='["Mostre a carteirinha"]', description="Descrição"
+    )
+    values.update(fields)
+    db.add(main.Partner(id=partner_id, **values))
+    db.commit()
+
+
+def test_list_filters_and_detail_come_from_one_catalog(db, client):
+    add_partner(db, "p1", name="Padaria Pão Quente", is_featured=True)
+    add_partner(db, "p2", name="Academia Força", category="Saúde")
+
+    listing = client.get("/api/v1/benefits").json()
+    assert [partner["id"] for partner in listing["featured_partners"]] == ["p1"]
+    assert [partner["id"] for partner in listing["all_partners"]] == ["p1", "p2"]
+
+    assert [partner["id"] for partner in client.get("/api/v1/benefits", params={"category": "saude"}).json()["all_partners"]] == ["p2"]
+    assert [partner["id"] for partner in client.get("/api/v1/benefits", params={"q": "pao"}).json()["all_partners"]] == ["p1"]
+
+    detail = client.get("/api/v1/benefits/p2").json()
+    assert detail["how_to_use"] == ["Mostre a carteirinha"]
+    assert client.get("/api/v1/benefits/missing").status_code == 404
+
+def test_catalog_is_rebuilt_after_a_partner_write(db, client):
+    add_partner(db, "p1")
+    assert len(client.get("/api/v1/benefits").json()["all_partners"]) == 1
+
+    add_partner(db, "p2")
+    assert len(client.get("/api/v1/benefits").json()["all_partners"]) == 2
+
+def test_incomplete_partners_are_logged_not_served(db, client, caplog):
+    add_partner(db, "p1")
+    add_partner(db, "no-detail", description=None)
+    add_partner(db, "no-summary", logo_url=None)
+
+    with caplog.at_level(logging.WARNING, logger="benefits"):
+        listing = client.get("/api/v1/benefits").json()
+
+    assert [partner["id"] for partner in listing["all_partners"]] == ["no-detail", "p1"]
+    assert client.get("/api/v1/benefits/no-detail").status_code == 404
+    assert sorted(record.args[0] for record in caplog.records) == ["no-detail", "no-summary"]
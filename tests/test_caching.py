@@ -0,0 +1,43 @@
+import asyncio
+
+from caching      import DataVersions, SnapshotCache
+from shared_store import MemoryStore
+
+
+def counting_build(builds: list):
+    async def build_async() -> bytes:
+        builds.append(None)
+        await asyncio.sleep(0.01)
+        return b'{"build": %d}' % len(builds)
+    return build_async
+
+def test_concurrent_cold_misses_share_one_rebuild():
+    versions = DataVersions(MemoryStore(), local_ttl=60)
+    cache    = SnapshotCache(None, ttl=60, versions=versions, tables=("news",))
+    builds   = []
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.aget(counting_build(builds)) for _ in range(50)))
+        versions.bump("news")
+        second = await asyncio.gather(*(cache.aget(counting_build(builds)) for _ in range(50)))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert len(builds) == 2
+    assert {snapshot.body for snapshot in first} == {b'{"build": 1}'}
+    assert {snapshot.body for snapshot in second} == {b'{"build": 2}'}
+
+def test_a_cancelled_miss_does_not_cancel_the_shared_rebuild():
+    cache  = SnapshotCache(None, ttl=60)
+    builds = []
+
+    async def scenario():
+        cancelled = asyncio.ensure_future(cache.aget(counting_build(builds)))
+        waiting   = asyncio.ensure_future(cache.aget(counting_build(builds)))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        return await waiting
+
+    assert asyncio.run(scenario()).body == b'{"build": 1}'
+    assert len(builds) == 1
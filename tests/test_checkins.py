@@ -0,0 +1,106 @@
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from sqlalchemy import func, select, update
+
+import main
+
+from caching      import DataVersions
+from checkins     import CheckinEngine, CheckinRejected
+from shared_store import MemoryStore
+
+from conftest import add_match, auth_headers
+
+
+def scan(client, match_id: int, user_id: int):
+    return client.post(f"/api/v1/matches/{match_id}/checkin", headers=auth_headers(user_id))
+
+def checkin_count(db, match_id: int) -> int:
+    return db.execute(select(func.count()).select_from(main.Checkin).where(main.Checkin.match_id == match_id)).scalar()
+
+def set_status_outside_the_app(match_id: int, status: str):
+    # Straight to the database: no session, so no data version bump.
+    with main.engine.begin() as connection:
+        connection.execute(update(main.Match.__table__).where(main.Match.__table__.c.id == match_id).values(status=status))
+
+@pytest.fixture
+def worker():
+    # A second worker: its own engine state and its own memory:// versions.
+    engine = CheckinEngine(main.Checkin.__table__, main.Match.__table__, main.SessionLocal, DataVersions(MemoryStore()), max_wait=0.01)
+    engine.start()
+    yield engine
+    engine.stop()
+
+
+def test_second_scan_is_rejected(db, client):
+    add_match(db, 1, status="CHECKIN_OPEN")
+
+    first = scan(client, 1, 7)
+    assert first.status_code == 200
+    assert first.json()["qr_code_url"] == "/api/v1/matches/1/checkin/qr.png"
+
+    second = scan(client, 1, 7)
+    assert second.status_code == 400
+    assert second.json()["detail"] == "User already checked in for this match"
+    assert checkin_count(db, 1) == 1
+
+def test_unknown_match_and_closed_checkin_are_rejected(db, client):
+    add_match(db, 1, status="SALE_OPEN")
+    assert scan(client, 99, 1).status_code == 404
+    assert scan(client, 1, 1).json()["detail"] == "Check-in is not open for this match"
+
+def test_concurrent_double_scans_check_in_once(db, client):
+    add_match(db, 1, status="CHECKIN_OPEN")
+    fans = list(range(1, 41))
+
+    with ThreadPoolExecutor(32) as executor:
+        status_codes = list(executor.map(lambda user_id: scan(client, 1, user_id).status_code, fans + fans))
+
+    assert status_codes.count(200) == len(fans)
+    assert status_codes.count(400) == len(fans)
+    assert checkin_count(db, 1) == len(fans)
+
+def test_workers_racing_on_the_same_fan_check_in_once(db, client, worker):
+    add_match(db, 1, status="CHECKIN_OPEN")
+
+    def scan_on_both(user_id):
+        other = worker.check_in(1, user_id, "qr")
+        try:
+            ours = scan(client, 1, user_id).status_code == 200
+        finally:
+            try:
+                theirs = other.result() == "qr"
+            except CheckinRejected:
+                theirs = False
+        return ours + theirs
+
+    with ThreadPoolExecutor(16) as executor:
+        accepted = list(executor.map(scan_on_both, range(1, 31)))
+
+    assert accepted == [1] * 30
+    assert checkin_count(db, 1) == 30
+
+def test_checkin_opened_outside_the_app_is_seen_on_the_next_scan(db, client):
+    add_match(db, 1, status="SALE_OPEN")
+    assert scan(client, 1, 1).status_code == 400
+
+    set_status_outside_the_app(1, "CHECKIN_OPEN")
+    assert scan(client, 1, 1).status_code == 200
+
+def test_cached_state_expires_after_its_ttl(db):
+    add_match(db, 1, status="CHECKIN_OPEN")
+    engine = CheckinEngine(main.Checkin.__table__, main.Match.__table__, main.SessionLocal, DataVersions(MemoryStore()), state_ttl=0.05)
+    engine.start()
+    try:
+        assert engine.check_in(1, 1, "qr").result() == "qr"
+
+        set_status_outside_the_app(1, "finished")
+        time.sleep(0.1)
+        with pytest.raises(CheckinRejected) as rejected:
+            engine.check_in(1, 2, "qr")
+        assert rejected.value.status_code == 400
+    finally:
+        engine.stop()
@@ -0,0 +1,103 @@
+import gzip
+import json
+
+import pytest
+
+import http_caching
+import main
+
+PLAYERS = "/api/v1/players/"
+
+
+@pytest.fixture
+def squad(db):
+    # Enough rows for the list to pass the compression threshold.
+    for number in range(1, 31):
+        db.add(main.Player(name=f"Jogador {number}", position="Meio-campo", number=number, nationality="Brasil"))
+    db.commit()
+
+def get(client, path: str = PLAYERS, **headers):
+    return client.get(path, headers={"Accept-Encoding": "identity", **headers})
+
+
+def test_if_none_match_is_answered_with_304(client, squad):
+    first = get(client)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert first.headers["Cache-Control"] == "public, max-age=300"
+
+    cached = get(client, **{"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+
+    assert get(client, **{"If-None-Match": '"something else"'}).status_code == 200
+
+def test_etag_changes_after_a_write(client, squad):
+    etag = get(client).headers["ETag"]
+
+    created = client.post(PLAYERS, json={"name": "Reforço", "position": "Zagueiro", "number": 99, "nationality": "Brasil"})
+    assert created.status_code == 200
+
+    fresh = get(client, **{"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert "Reforço" in {player["name"] for player in fresh.json()}
+
+def test_etag_depends_on_the_query_and_the_accept_header(client, squad):
+    etag = get(client).headers["ETag"]
+    assert get(client, PLAYERS + "?limit=5").headers["ETag"] != etag
+    assert get(client, Accept="application/x-ndjson").headers["ETag"] != etag
+
+def test_gzip_body_gets_its_own_etag(client, squad):
+    plain = get(client)
+    zipped = client.get(PLAYERS, headers={"Accept-Encoding": "gzip"})
+
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert zipped.headers["ETag"] == plain.headers["ETag"][:-1] + '-gzip"'
+    assert zipped.json() == plain.json()
+
+    # Either validator is good for a gzip client; the 304 echoes the one it sent.
+    for etag in (zipped.headers["ETag"], plain.headers["ETag"]):
+        cached = client.get(PLAYERS, headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["ETag"] == etag
+
+    # A client that cannot read gzip must not be told its copy is current.
+    assert get(client, **{"If-None-Match": zipped.headers["ETag"]}).status_code == 200
+
+def test_small_bodies_are_sent_uncompressed(client):
+    response = client.get(PLAYERS, headers={"Accept-Encoding": "gzip"})
+    assert response.json() == []
+    assert "Content-Encoding" not in response.headers
+
+def test_streamed_ndjson_is_compressed_chunk_by_chunk(client, squad):
+    with client.stream("GET", PLAYERS, headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"}) as response:
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in response.headers
+        raw = b"".join(response.iter_raw())
+
+    assert [json.loads(line)["number"] for line in gzip.decompress(raw).splitlines()] == list(range(1, 31))
+
+@pytest.mark.parametrize("accept_encoding, with_brotli, coding", [
+    ("br, gzip", True, "br"),
+    ("br, gzip", False, "gzip"),
+    ("br", False, None),
+    ("gzip;q=0, br", True, "br"),
+    ("gzip;q=0", True, None),
+    ("*", False, "gzip"),
+    ("", True, None),
+])
+def test_coding_negotiation(monkeypatch, accept_encoding, with_brotli, coding):
+    monkeypatch.setattr(http_caching, "brotli", object() if with_brotli else None)
+    middleware = http_caching.HTTPCacheMiddleware(None, None, {})
+    assert middleware.negotiate(accept_encoding) == coding
+
+def test_brotli_body_gets_its_own_etag(client, squad):
+    pytest.importorskip("brotli")
+    response = client.get(PLAYERS, headers={"Accept-Encoding": "br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.headers["ETag"].endswith('-br"')
+    assert len(response.json()) == 30
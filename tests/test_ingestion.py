@@ -0,0 +1,80 @@
+import json
+
+from sqlalchemy     import CheckConstraint, Column, Integer, MetaData, String, Table, create_engine
+from sqlalchemy.orm import sessionmaker
+
+import main
+
+from ingestion import BulkLoader
+
+
+def player(name: str, number=None, **fields) -> dict:
+    return {"name": name, "position": "Atacante", "number": number, "nationality": "BR", **fields}
+
+def statuses(response) -> list:
+    return [(result["index"], result["status"], result["detail"]) for result in response.json()["results"]]
+
+
+def test_every_row_gets_its_own_outcome(db, client):
+    db.add(main.Player(name="Titular", position="Goleiro", number=1, nationality="BR"))
+    db.commit()
+
+    response = client.post("/api/v1/players/bulk", json=[
+        player("Novo", 9),
+        {"name": "Sem posição", "nationality": "BR"},
+        player("Camisa ocupada", 1),
+        player("Repetido A", 10),
+        player("Repetido B", 10),
+        player("Sem número"),
+    ])
+
+    assert response.status_code == 200
+    assert response.json()["created"] == 3
+    assert response.json()["failed"] == 3
+    assert statuses(response) == [
+        (0, "created", None),
+        (1, "invalid", "position: Field required"),
+        (2, "conflict", "Player number already taken"),
+        (3, "created", None),
+        (4, "conflict", "Player number already taken (repeated in this batch)"),
+        (5, "created", None),
+    ]
+    assert {row.name for row in db.query(main.Player)} == {"Titular", "Novo", "Repetido A", "Sem número"}
+
+def test_ndjson_rows_are_numbered_across_batches(client, monkeypatch):
+    monkeypatch.setattr(main, "BULK_INSERT_CHUNK_SIZE", 2)
+    lines = [json.dumps(player(f"Jogador {number}", number)) for number in range(1, 5)] + ["{not json", json.dumps(player("Outro 1", 1))]
+
+    response = client.post("/api/v1/players/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"})
+
+    assert statuses(response) == [(index, "created", None) for index in range(4)] + [
+        (4, "invalid", "Invalid JSON"),
+        (5, "conflict", "Player number already taken"),
+    ]
+
+def test_body_that_is_not_a_list_is_400(client):
+    assert client.post("/api/v1/players/bulk", json={"name": "x"}).status_code == 400
+
+def test_fallback_reports_the_key_conflict_apart_from_other_constraints():
+    # A constraint the loader does not know about fails the batch INSERT;
+    # the row-by-row retry must not blame the key for it.
+    metadata = MetaData()
+    table = Table(
+        "shirts", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("code", String, unique=True),
+        Column("size", Integer, CheckConstraint("size > 0")),
+    )
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    loader = BulkLoader(table, dict, sessionmaker(bind=engine), key="code", conflict_detail="Code already taken")
+
+    assert loader.load(0, [{"code": "a", "size": 1}])[0]["status"] == "created"
+    results = loader.load(0, [{"code": "b", "size": 1}, {"code": "a", "size": 2}, {"code": "c", "size": -1}, {"code": None, "size": 0}])
+
+    assert [(result["status"], result["detail"]) for result in results] == [
+        ("created", None),
+        ("conflict", "Code already taken"),
+        ("invalid", "Row violates a database constraint"),
+        ("invalid", "Row violates a database constraint"),
+    ]
@@ -0,0 +1,79 @@
+import time
+
+from sqlalchemy import func, select, update
+
+import main
+
+from conftest import add_match, auth_headers
+
+
+def buy(client, user_id: int, quantity: int = 1):
+    return client.post(
+        "/api/v1/tickets/orders",
+        json={"match_id": 1, "category_id": "north", "quantity": quantity, "payment": {"method": "pix"}},
+        headers=auth_headers(user_id)
+    ).status_code
+
+def shard_total(db) -> int:
+    return db.execute(
+        select(func.sum(main.TicketStockShard.available_quantity)).where(main.TicketStockShard.category_id == "north")
+    ).scalar()
+
+def listed(db) -> int:
+    db.expire_all()
+    return db.get(main.TicketCategory, "north").available_quantity
+
+def set_listed_outside_the_app(quantity: int):
+    with main.engine.begin() as connection:
+        connection.execute(update(main.TicketCategory.__table__).where(main.TicketCategory.__table__.c.id == "north").values(available_quantity=quantity))
+
+
+def test_restock_written_to_the_category_is_moved_into_the_shards(db, client):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 10)])
+    assert [buy(client, user_id) for user_id in range(1, 12)] == [201] * 10 + [400]
+    main.reconcile_inventory()
+    assert listed(db) == 0
+
+    set_listed_outside_the_app(5)
+    main.reconcile_inventory()
+    assert shard_total(db) == 5
+    assert listed(db) == 5
+
+    # Sales after the restock are not undone by the next reconcile either.
+    assert [buy(client, user_id) for user_id in range(20, 27)] == [201] * 5 + [400] * 2
+    main.reconcile_inventory()
+    assert shard_total(db) == 0
+    assert listed(db) == 0
+
+def test_stock_removed_from_the_category_never_takes_back_sold_tickets(db, client):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 10)])
+    assert buy(client, 1, quantity=3) == 201
+    main.reconcile_inventory()
+    assert listed(db) == 7
+
+    set_listed_outside_the_app(4)
+    main.reconcile_inventory()
+    assert shard_total(db) == 4
+
+    set_listed_outside_the_app(-20)
+    main.reconcile_inventory()
+    assert shard_total(db) == 0
+    assert listed(db) == 0
+
+def test_sold_out_is_asked_again_after_its_ttl(db, client, monkeypatch):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 2)])
+    assert [buy(client, user_id) for user_id in range(1, 4)] == [201, 201, 400]
+    assert main.ticket_inventory.is_sold_out("north")
+    monkeypatch.setattr(main.ticket_inventory, "sold_out_ttl", 0.05)
+
+    # Another worker releases a ticket: this one cannot know, so it goes
+    # back to the database once the flag expires.
+    with main.engine.begin() as connection:
+        connection.execute(
+            update(main.TicketStockShard.__table__)
+            .where(main.TicketStockShard.__table__.c.category_id == "north", main.TicketStockShard.__table__.c.shard == 0)
+            .values(available_quantity=1)
+        )
+    time.sleep(0.1)
+    assert not main.ticket_inventory.is_sold_out("north")
+    assert buy(client, 4) == 201
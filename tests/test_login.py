@@ -0,0 +1,41 @@
+import main
+
+
+def add_user(db, password: str) -> main.User:
+    user = main.User(username="socio", email="socio@example.com", password=password)
+    db.add(user)
+    db.commit()
+    return user
+
+def login(client, password: str):
+    return client.post("/api/v1/auth/login", json={"email": "socio@example.com", "password": password})
+
+
+def test_legacy_password_is_rehashed_on_login(db, client):
+    user = add_user(db, "segredo")
+
+    assert login(client, "errado").status_code == 400
+    response = login(client, "segredo")
+    assert response.status_code == 200
+    assert response.json()["user"]["email"] == "socio@example.com"
+
+    db.expire_all()
+    assert db.get(main.User, user.id).password.startswith("scrypt$")
+    assert login(client, "segredo").status_code == 200
+    assert login(client, "nada").status_code == 400
+
+def test_unknown_email_is_refused(client):
+    assert login(client, "segredo").status_code == 400
+
+def test_waiting_for_the_hasher_holds_no_database_slot(db, client, monkeypatch):
+    add_user(db, "segredo")
+    slots = client.app.state.database_slots
+    free  = []
+
+    async def verify(password, stored):
+        free.append(slots._value)
+        return True, None
+
+    monkeypatch.setattr(main.password_hasher, "verify", verify)
+    assert login(client, "qualquer").status_code == 200
+    assert free == [main.DB_POOL_SIZE + main.DB_MAX_OVERFLOW]
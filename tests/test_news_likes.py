@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+
+import main
+
+from conftest import auth_headers
+
+FANS = 120
+
+
+def test_concurrent_likes_keep_an_exact_count(db, client):
+    db.add(main.News(id="n1", category="geral", title="Vitória", published_at=main.datetime.utcnow(), like_count=0, view_count=0))
+    db.commit()
+
+    def toggle(user_id):
+        response = client.post("/api/v1/news/n1/like", headers=auth_headers(user_id))
+        assert response.status_code == 200
+        return response.json()
+
+    with ThreadPoolExecutor(32) as executor:
+        liked = list(executor.map(toggle, range(1, FANS + 1)))
+
+    assert all(result["user_has_liked"] for result in liked)
+    # Each response shows the count right after its own like, so together
+    # they are every value from 1 to FANS exactly once.
+    assert sorted(result["like_count"] for result in liked) == list(range(1, FANS + 1))
+    db.expire_all()
+    assert db.get(main.News, "n1").like_count == FANS
+    assert db.execute(select(func.count()).select_from(main.UserNewsLike)).scalar() == FANS
+
+    # Every fan toggles twice more at the same time: unlike, then like again
+    # for odd ids and stop at unliked for even ones.
+    def toggle_back(user_id):
+        toggle(user_id)
+        if user_id % 2:
+            toggle(user_id)
+
+    with ThreadPoolExecutor(32) as executor:
+        list(executor.map(toggle_back, range(1, FANS + 1)))
+
+    db.expire_all()
+    assert db.get(main.News, "n1").like_count == FANS // 2
+    assert set(db.execute(select(main.UserNewsLike.user_id)).scalars()) == set(range(1, FANS + 1, 2))
+
+def test_like_of_missing_news_is_404(client):
+    assert client.post("/api/v1/news/missing/like", headers=auth_headers(1)).status_code == 404
+
+def test_more_readers_than_connections_do_not_starve_the_pool(db, client):
+    # Every reader holds a connection until its response is validated on a
+    # second threadpool thread, so readers waiting on the pool itself would
+    # deadlock it until pool_timeout.
+    db.add(main.News(id="n1", category="geral", title="Vitória", published_at=main.datetime.utcnow(), author="Assessoria", content="texto", like_count=0, view_count=0))
+    db.commit()
+    readers = 10 * (main.DB_POOL_SIZE + main.DB_MAX_OVERFLOW)
+
+    with ThreadPoolExecutor(readers) as executor:
+        status_codes = list(executor.map(lambda _: client.get("/api/v1/news/n1").status_code, range(2 * readers)))
+
+    assert status_codes == [200] * (2 * readers)
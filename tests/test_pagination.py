@@ -0,0 +1,60 @@
+import json
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import add_match
+
+
+@pytest.fixture
+def schedule(db):
+    # Two matches share each kick-off time, so pages must break ties on id.
+    kick_off = datetime(2030, 1, 1, 16)
+    for match_id in range(1, 26):
+        add_match(db, match_id, status="upcoming", is_home_game=bool(match_id % 2)).match_datetime = kick_off + timedelta(days=match_id // 2)
+    db.commit()
+    return list(range(1, 26))
+
+def follow_pages(client, path: str, limit: int) -> list:
+    ids, cursor = [], None
+    while True:
+        params   = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        ids.extend(match["id"] for match in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+        assert response.headers["Link"].endswith('rel="next"')
+
+
+def test_cursor_pages_cover_every_match_once_in_order(client, schedule):
+    assert follow_pages(client, "/api/v1/games_schedule/", limit=4) == schedule
+    assert follow_pages(client, "/api/v1/home_games/", limit=3) == [match_id for match_id in schedule if match_id % 2]
+
+def test_schedule_without_limit_is_not_truncated(client, schedule):
+    response = client.get("/api/v1/games_schedule/")
+    assert [match["id"] for match in response.json()] == schedule
+    assert "X-Next-Cursor" not in response.headers
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 json",
+    "WyJ4Il0",                  # ["x"]: one value for two columns
+    "WzEsMl0",                  # [1,2]: a number where a datetime goes
+    "WyIyMDI2LTAxLTAxVDAwOjAwOjAwIiwidHJ1ZSJd",
+])
+def test_bad_cursor_is_400(client, schedule, cursor):
+    response = client.get("/api/v1/games_schedule/", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+def test_ndjson_streams_everything_from_the_cursor_on(client, schedule):
+    first = client.get("/api/v1/games_schedule/", params={"limit": 10})
+    response = client.get(
+        "/api/v1/games_schedule/",
+        params={"cursor": first.headers["X-Next-Cursor"], "limit": 1},
+        headers={"Accept": "application/x-ndjson"}
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in response.text.splitlines()] == schedule[10:]
@@ -0,0 +1,131 @@
+import re
+
+import pytest
+
+from sqlalchemy import event, select
+
+import main
+
+from conftest import add_match, auth_headers
+
+# Each hot read must be served by an index. SQLite reports a full table walk
+# as "SCAN <table>" with no "USING ... INDEX", and an ORDER BY it cannot
+# satisfy from an index as "USE TEMP B-TREE FOR ORDER BY"; either one means
+# an index was dropped or a filter no longer implies a partial index's
+# predicate.
+
+FULL_SCAN = re.compile(r"^SCAN (?!.*USING (COVERING )?INDEX)")
+
+
+def query_plan(connection, statement: str, parameters=()) -> list:
+    return [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+def assert_indexed(connection, statement: str, parameters=()):
+    plan = query_plan(connection, statement, parameters)
+    assert not [step for step in plan if FULL_SCAN.match(step)], plan
+    assert not [step for step in plan if "TEMP B-TREE" in step], plan
+
+def compiled(statement):
+    compiled_statement = statement.compile(dialect=main.engine.dialect, compile_kwargs={"render_postcompile": True})
+    return str(compiled_statement), tuple(compiled_statement.params[name] for name in compiled_statement.positiontup)
+
+
+@pytest.fixture
+def seeded(db):
+    for match_id in range(1, 6):
+        add_match(db, match_id, status=("upcoming", "live", "SALE_OPEN", "CHECKIN_OPEN", "finished")[match_id - 1], days=match_id,
+                  is_home_game=match_id % 2 == 1, categories=[(f"cat{match_id}a", 10), (f"cat{match_id}b", 10)])
+    for index in range(3):
+        db.add(main.News(id=f"n{index}", category="geral", title=f"Notícia {index}", published_at=main.datetime.utcnow(), image_url="img", like_count=0, view_count=0))
+        db.add(main.Video(id=f"v{index}", title=f"Vídeo {index}", video_thumbnail_url="t", published_at=main.datetime.utcnow()))
+        db.add(main.PressConference(id=f"p{index}", title=f"Coletiva {index}", video_thumbnail_url="t", published_at=main.datetime.utcnow()))
+    db.commit()
+
+@pytest.fixture
+def captured_selects():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not statement.lstrip().upper().startswith("SELECT 1"):
+            statements.append((statement, parameters))
+
+    event.listen(main.engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(main.engine, "before_cursor_execute", capture)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/games_schedule/",
+    "/api/v1/home_games/",
+    "/api/v1/matches",
+])
+def test_match_lists_use_their_partial_indexes(seeded, client, captured_selects, path):
+    first_page = client.get(path, params={"limit": 1} if "games" in path or "home" in path else None)
+    assert first_page.status_code == 200
+    if "x-next-cursor" in first_page.headers:
+        assert client.get(path, params={"limit": 1, "cursor": first_page.headers["x-next-cursor"]}).status_code == 200
+
+    assert captured_selects
+    with main.engine.connect() as connection:
+        for statement, parameters in captured_selects:
+            assert_indexed(connection, statement, parameters)
+
+def test_dashboard_reads_are_indexed(seeded, client, captured_selects):
+    response = client.get("/api/v1/dashboard", headers=auth_headers(1))
+    assert response.status_code == 200
+
+    tables = " ".join(statement for statement, _ in captured_selects)
+    for table in ("matches", "news", "press_conferences", "videos"):
+        assert f"FROM {table}" in tables
+    with main.engine.connect() as connection:
+        for statement, parameters in captured_selects:
+            assert_indexed(connection, statement, parameters)
+
+def test_next_match_uses_the_active_schedule_index(seeded):
+    statement, parameters = compiled(select(main.Match.id).where(main.ACTIVE_MATCH).order_by(main.Match.match_datetime, main.Match.id).limit(1))
+    with main.engine.connect() as connection:
+        plan = query_plan(connection, statement, parameters)
+    assert any("ix_matches_active_schedule" in step for step in plan), plan
+
+def test_upcoming_games_query_is_indexed(seeded):
+    statement, parameters = compiled(main.UPCOMING_GAMES_QUERY)
+    with main.engine.connect() as connection:
+        assert_indexed(connection, statement, parameters)
+        plan = query_plan(connection, statement, parameters)
+    assert any("ix_matches_on_sale" in step for step in plan), plan
+    assert any("ix_ticket_categories_match" in step for step in plan), plan
+
+@pytest.mark.parametrize("model, index", [
+    (main.News,            "ix_news_published_at"),
+    (main.PressConference, "ix_press_conferences_published_at"),
+    (main.Video,           "ix_videos_published_at"),
+])
+def test_latest_content_reads_published_at_index(seeded, model, index):
+    statement, parameters = compiled(select(model.id).order_by(model.published_at.desc()).limit(5))
+    with main.engine.connect() as connection:
+        assert_indexed(connection, statement, parameters)
+        plan = query_plan(connection, statement, parameters)
+    assert any(index in step for step in plan), plan
+
+def test_ticket_categories_by_match_are_indexed(seeded):
+    statement, parameters = compiled(
+        select(main.TicketCategory).where(main.TicketCategory.match_id == 3).order_by(main.TicketCategory.id)
+    )
+    with main.engine.connect() as connection:
+        assert_indexed(connection, statement, parameters)
+        plan = query_plan(connection, statement, parameters)
+    assert any("ix_ticket_categories_match" in step for step in plan), plan
+
+def test_featured_partners_use_partial_index(db):
+    db.add(main.Partner(id="p1", name="Loja", category="moda", logo_url="l", discount="10%", is_featured=True))
+    db.add(main.Partner(id="p2", name="Bar", category="comida", logo_url="l", discount="5%", is_featured=False))
+    db.commit()
+
+    statement, parameters = compiled(select(main.Partner.id).where(main.FEATURED_PARTNER).order_by(main.Partner.id))
+    with main.engine.connect() as connection:
+        assert_indexed(connection, statement, parameters)
+        plan = query_plan(connection, statement, parameters)
+    assert any("ix_partners_featured" in step for step in plan), plan
+    assert db.execute(select(main.Partner.id).where(main.FEATURED_PARTNER)).scalars().all() == ["p1"]
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects import postgresql
+
+import main
+
+from search import PostgresSearch, SQLiteSearch, snippet, term_pattern
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def add_news(db, news_id: str, title: str, content: str = "", days_ago: int = 0):
+    db.add(main.News(id=news_id, category="Futebol", title=title, content=content, published_at=NOW - timedelta(days=days_ago), author="Redação"))
+
+def search(client, q: str, **params) -> list:
+    response = client.get("/api/v1/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+def ids(results) -> list:
+    return [result["id"] for result in results]
+
+
+def test_title_matches_rank_above_body_matches(db, client):
+    add_news(db, "body",  "Treino de quinta", "O técnico elogiou o goleiro depois do treino.", days_ago=0)
+    add_news(db, "title", "Goleiro renova contrato", "Acordo vai até 2028.", days_ago=3)
+    add_news(db, "none",  "Venda de ingressos", "Setor norte esgotado.")
+    db.commit()
+
+    results = search(client, "goleiro")
+    assert ids(results) == ["title", "body"]
+    assert results[0]["title_highlight"] == "<mark>Goleiro</mark> renova contrato"
+    assert "<mark>goleiro</mark>" in results[1]["snippet"]
+
+def test_accents_and_case_are_folded_and_the_last_term_can_be_a_prefix(db, client):
+    add_news(db, "1", "São Paulo vence o clássico")
+    db.commit()
+
+    assert ids(search(client, "SAO paulo")) == ["1"]
+    assert search(client, "sao paulo")[0]["title_highlight"] == "<mark>São</mark> <mark>Paulo</mark> vence o clássico"
+    assert ids(search(client, "classi")) == []
+    assert ids(search(client, "classi", prefix=True)) == ["1"]
+
+def test_type_filter_and_index_triggers(db, client):
+    add_news(db, "n1", "Coletiva após a vitória")
+    db.add(main.PressConference(id="p1", title="Coletiva do técnico", published_at=NOW))
+    db.add(main.Video(id="v1", title="Melhores momentos", published_at=NOW))
+    db.commit()
+
+    assert sorted(ids(search(client, "coletiva"))) == ["n1", "p1"]
+    assert [(result["type"], result["id"]) for result in search(client, "coletiva", type="press_conferences")] == [("press_conferences", "p1")]
+
+    db.get(main.Video, "v1").title = "Coletiva em vídeo"
+    db.delete(db.get(main.News, "n1"))
+    db.commit()
+    assert sorted(ids(search(client, "coletiva"))) == ["p1", "v1"]
+
+def test_every_match_is_ranked_unless_a_window_is_set(db):
+    # The best hit is the oldest row; a window over recent rows misses it.
+    add_news(db, "old", "Artilheiro artilheiro artilheiro", days_ago=30)
+    for number in range(5):
+        add_news(db, f"new{number}", f"Notícia {number}", "Fala do artilheiro no vestiário sobre a próxima rodada.", days_ago=number)
+    db.commit()
+
+    assert SQLiteSearch(main.SEARCH_SOURCES).search(db, "artilheiro", limit=1)[0].id == "old"
+    assert SQLiteSearch(main.SEARCH_SOURCES, window=3).search(db, "artilheiro", limit=1)[0].id != "old"
+
+def test_queries_without_terms_return_nothing(db, client):
+    add_news(db, "1", "Gol no fim")
+    db.commit()
+    assert search(client, "!!! ???") == []
+    assert search(client, "gol", type="unknown") == []
+
+def test_snippet_starts_near_the_first_match():
+    text    = " ".join(f"palavra{number}" for number in range(100)) + " final"
+    pattern = term_pattern(["palavra50"], False)
+    result  = snippet(text, pattern, words=10)
+    assert result.startswith("…palavra46 ")
+    assert "<mark>palavra50</mark>" in result
+    assert result.endswith("…")
+
+
+class Recorder:
+    # Stands in for a Session or Connection: keeps the statements instead of
+    # running them, so the Postgres SQL can be checked without a server.
+    dialect = postgresql.dialect()
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement.compile(dialect=self.dialect))
+        return []
+
+    def exec_driver_sql(self, statement):
+        self.statements.append(statement)
+
+def test_postgres_search_ranks_per_source_and_highlights_the_page_only():
+    db = Recorder()
+    assert PostgresSearch(main.SEARCH_SOURCES).search(db, "gol de placa", kinds=["news", "videos"], limit=5, prefix=True) == []
+
+    compiled, = db.statements
+    sql = str(compiled)
+    assert compiled.params["tsquery"] == "gol & de & placa:*"
+    assert "WHERE news.search_vector @@ to_tsquery('portuguese'::regconfig, %(tsquery)s" in sql
+    assert "videos.search_vector @@" in sql
+    assert "press_conferences" not in sql
+    # Each source contributes its best `limit` rows; ts_headline runs on the
+    # merged page only.
+    assert sql.count("ts_headline(") == 2
+    assert sql.count("LIMIT %(param_") == 3
+
+def test_postgres_index_is_a_generated_column_with_a_gin_index():
+    connection = Recorder()
+    PostgresSearch(main.SEARCH_SOURCES[:2]).create(connection)
+
+    news_column, news_index, videos_column, videos_index = connection.statements
+    assert news_column.startswith("ALTER TABLE news ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (")
+    assert "setweight(to_tsvector('portuguese'::regconfig, coalesce(title, '')), 'A')" in news_column
+    assert "setweight(to_tsvector('portuguese'::regconfig, coalesce(content, '')), 'B')" in news_column
+    assert "content" not in videos_column
+    assert news_index == "CREATE INDEX IF NOT EXISTS ix_news_search ON news USING gin (search_vector)"
+    assert videos_index.endswith("ON videos USING gin (search_vector)")
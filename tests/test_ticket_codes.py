@@ -0,0 +1,86 @@
+import base64
+import json
+
+import pytest
+
+import main
+
+from security import InvalidTicket, TicketClaims, TicketSigner
+
+NOW    = 1_900_000_000
+CLAIMS = TicketClaims("order-1", 1, "north", 7, 2, NOW + 3600)
+
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+def rejected(signer: TicketSigner, code: str, now: float = NOW) -> str:
+    with pytest.raises(InvalidTicket) as error:
+        signer.verify(code, now)
+    return str(error.value)
+
+
+def test_signed_code_round_trips():
+    signer = TicketSigner(secret="s3cret")
+    assert signer.verify(signer.sign(CLAIMS), NOW) == CLAIMS
+
+def test_tampered_payload_is_rejected():
+    signer = TicketSigner(secret="s3cret")
+    _, signature = signer.sign(CLAIMS).split(".")
+    forged = b64(json.dumps(list(CLAIMS._replace(quantity=20)), separators=(",", ":")).encode())
+    assert rejected(signer, forged + "." + signature) == "Invalid ticket signature"
+
+@pytest.mark.parametrize("cut", [1, 8, TicketSigner.HMAC_SIGNATURE_SIZE])
+def test_truncated_signature_is_rejected(cut):
+    signer = TicketSigner(secret="s3cret")
+    payload, signature = signer.sign(CLAIMS).split(".")
+    short = b64(base64.urlsafe_b64decode(signature + "==")[:-cut])
+    assert rejected(signer, payload + "." + short) == "Invalid ticket signature"
+
+def test_expired_code_is_rejected():
+    signer = TicketSigner(secret="s3cret")
+    code   = signer.sign(CLAIMS)
+    assert signer.verify(code, CLAIMS.expires_at) == CLAIMS
+    assert rejected(signer, code, CLAIMS.expires_at + 1) == "Ticket expired"
+
+def test_code_signed_with_another_key_is_rejected():
+    code = TicketSigner(secret="other").sign(CLAIMS)
+    assert rejected(TicketSigner(secret="s3cret"), code) == "Invalid ticket signature"
+
+@pytest.mark.parametrize("code", ["", "no-dot", "a.b.c", "!!!.???"])
+def test_malformed_code_is_rejected(code):
+    assert rejected(TicketSigner(secret="s3cret"), code) in ("Malformed ticket code", "Invalid ticket signature")
+
+def test_ed25519_codes_verify_with_the_key_pair_only():
+    pytest.importorskip("cryptography")
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from cryptography.hazmat.primitives.serialization       import Encoding, NoEncryption, PrivateFormat
+
+    def new_key() -> str:
+        return b64(Ed25519PrivateKey.generate().private_bytes(Encoding.Raw, PrivateFormat.Raw, NoEncryption()))
+
+    signer = TicketSigner(ed25519_private_key=new_key())
+    code   = signer.sign(CLAIMS)
+    assert signer.algorithm == "Ed25519" and signer.public_key()
+    assert signer.verify(code, NOW) == CLAIMS
+    assert rejected(TicketSigner(ed25519_private_key=new_key()), code) == "Invalid ticket signature"
+
+
+def test_gate_rejects_a_ticket_for_another_match(client):
+    code = main.ticket_signer.sign(CLAIMS._replace(expires_at=2**40))
+
+    assert client.post("/api/v1/tickets/verify", json={"code": code, "match_id": 1}).json()["valid"]
+    other = client.post("/api/v1/tickets/verify", json={"code": code, "match_id": 2}).json()
+    assert not other["valid"]
+    assert other["reason"] == "Ticket is for another match"
+
+def test_gate_rejects_a_checkin_code(client):
+    code   = main.checkin_signer.sign(CLAIMS._replace(order_id="checkin_1", expires_at=2**40))
+    result = client.post("/api/v1/tickets/verify", json={"code": code}).json()
+    assert not result["valid"]
+    assert result["reason"] == "Invalid ticket signature"
+
+def test_batch_verify_answers_each_code(client):
+    valid = main.ticket_signer.sign(CLAIMS._replace(expires_at=2**40))
+    response = client.post("/api/v1/tickets/verify/batch", json={"codes": [valid, valid[:-2], "junk"], "match_id": 1})
+    assert [result["valid"] for result in response.json()["results"]] == [True, False, False]
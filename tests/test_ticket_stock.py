@@ -0,0 +1,68 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fastapi.testclient import TestClient
+from sqlalchemy         import func, select
+
+import main
+
+from conftest import add_match, auth_headers
+
+STOCK = {"north": 100, "south": 37}
+
+
+@pytest.mark.parametrize("mode", ["direct", "batched"])
+def test_concurrent_purchases_sell_exactly_the_stock(db, monkeypatch, mode):
+    # Far more demand than seats, spread over two categories and mixing
+    # quantities, so single-shard, multi-shard and sold out paths all race.
+    # Direct purchases hold a connection and are capped at the pool size;
+    # batched ones wait on the queue and can arrive a whole batch at a time.
+    monkeypatch.setattr(main, "TICKET_PURCHASE_MODE", mode)
+    threads = main.PURCHASE_BATCH_SIZE if mode == "batched" else main.ADMISSION_MAX_CONCURRENCY
+    add_match(db, 1, status="SALE_OPEN", categories=STOCK.items())
+
+    requests = [(user_id, "north" if user_id % 3 else "south", 1 + user_id % 4) for user_id in range(1, 241)]
+
+    with TestClient(main.app) as client:
+        def buy(request):
+            user_id, category_id, quantity = request
+            response = client.post(
+                "/api/v1/tickets/orders",
+                json={"match_id": 1, "category_id": category_id, "quantity": quantity, "payment": {"method": "pix"}},
+                headers=auth_headers(user_id)
+            )
+            return request, response.status_code
+
+        with ThreadPoolExecutor(threads) as executor:
+            outcomes = list(executor.map(buy, requests))
+
+        # Whatever the race left over is smaller than the quantities still
+        # asked for; single tickets must be able to take the rest.
+        for category_id in STOCK:
+            for user_id in range(1000, 1004):
+                outcome = buy((user_id, category_id, 1))
+                outcomes.append(outcome)
+                if outcome[1] == 400:
+                    break
+
+    assert {status_code for _, status_code in outcomes} <= {201, 400}
+
+    sold = {category_id: 0 for category_id in STOCK}
+    for (_, category_id, quantity), status_code in outcomes:
+        if status_code == 201:
+            sold[category_id] += quantity
+
+    db.expire_all()
+    ordered = dict(db.execute(
+        select(main.Order.category_id, func.sum(main.Order.quantity)).group_by(main.Order.category_id)
+    ).all())
+    remaining = dict(db.execute(
+        select(main.TicketStockShard.category_id, func.sum(main.TicketStockShard.available_quantity))
+        .group_by(main.TicketStockShard.category_id)
+    ).all())
+
+    for category_id, stock in STOCK.items():
+        assert sold[category_id] == stock
+        assert ordered[category_id] == stock
+        assert remaining[category_id] == 0
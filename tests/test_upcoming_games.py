@@ -0,0 +1,34 @@
+from instrumentation import request_queries
+
+from conftest import add_match
+
+
+def query_totals(method: str, route: str):
+    # Statements counted by the instrumentation's engine hooks for one
+    # route: (total statements, requests served).
+    totals = {name: value for name, _, labels, value in request_queries.samples() if labels == (method, route)}
+    return totals.get(request_queries.name + "_sum", 0), totals.get(request_queries.name + "_count", 0)
+
+def queries_for(client, path: str) -> int:
+    before_sum, before_count = query_totals("GET", path)
+    response = client.get(path)
+    assert response.status_code == 200
+    after_sum, after_count = query_totals("GET", path)
+    assert after_count == before_count + 1
+    return after_sum - before_sum
+
+
+def test_upcoming_games_is_one_query_whatever_the_number_of_matches(db, client):
+    add_match(db, 1, status="SALE_OPEN", categories=[("m1-a", 10), ("m1-b", 10)])
+    assert queries_for(client, "/api/v1/matches") == 1
+
+    for match_id in range(2, 12):
+        add_match(db, match_id, status="SALE_OPEN" if match_id % 2 else "CHECKIN_OPEN", days=match_id,
+                  categories=[(f"m{match_id}-{name}", 10) for name in "abc"])
+    add_match(db, 12, status="upcoming", days=12)
+
+    assert queries_for(client, "/api/v1/matches") == 1
+
+    games = client.get("/api/v1/matches").json()
+    assert len(games["matches"]) == 11
+    assert sum(len(game["ticket_categories"]) for game in games["matches"]) == 32
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+import main
+
+from security     import encode_access_token
+from shared_store import MemoryStore
+from waiting_room import QueueRejected, WaitingRoom
+
+from conftest import add_match, auth_headers
+
+SECRET = "queue-secret"
+
+
+def new_room(**options) -> WaitingRoom:
+    return WaitingRoom(MemoryStore(), SECRET, **{"rate": 10, "burst": 0, "window": 60, **options})
+
+def refused(room: WaitingRoom, token: str, user_id: int = 1, match_id: int = 1) -> str:
+    with pytest.raises(QueueRejected) as error:
+        room.check(token, user_id, match_id)
+    return str(error.value)
+
+
+def test_fans_are_admitted_in_join_order():
+    room     = new_room()
+    statuses = [room.join(1, user_id)[1] for user_id in range(1, 6)]
+
+    assert [status.position for status in statuses] == [1, 2, 3, 4, 5]
+    # One slot per 1/rate seconds, each after the previous one.
+    assert [status.ahead for status in statuses] == sorted(status.ahead for status in statuses)
+    etas = [status.eta for status in statuses]
+    assert all(0.09 < later - earlier < 0.11 for earlier, later in zip(etas, etas[1:]))
+
+    # Another match has its own queue.
+    assert room.join(2, 1)[1].position == 1
+
+def test_burst_admits_an_idle_queue_at_once_and_no_more():
+    room = new_room(burst=3)
+    assert [room.join(1, user_id)[1].admitted for user_id in range(1, 6)] == [True, True, True, False, False]
+
+def test_joining_again_keeps_the_place():
+    room = new_room()
+    _, first = room.join(1, 1)
+    room.join(1, 2)
+    _, again = room.join(1, 1)
+
+    # Same slot: the admission time is what expires_at is counted from.
+    assert (again.position, again.expires_at) == (first.position, first.expires_at)
+    assert room.join(1, 3)[1].position == 3
+
+def test_joining_after_the_pass_expired_goes_to_the_back():
+    room = new_room(rate=100, window=0.05)
+    _, first = room.join(1, 1)
+    time.sleep(0.1)
+    assert room.join(1, 1)[1].position == first.position + 1
+
+def test_pass_is_checked_for_fan_match_and_turn():
+    room     = new_room()
+    token, _ = room.join(1, 1)
+
+    assert refused(room, token, user_id=2) == "Invalid or expired queue pass"
+    assert refused(room, token, match_id=2) == "Queue pass is for another match"
+    assert refused(room, token) == "Not admitted yet"
+    time.sleep(0.11)
+    assert room.check(token, 1, 1)["uid"] == 1
+
+def test_forged_and_expired_passes_are_refused():
+    room   = new_room(burst=10)
+    claims = {"typ": "queue", "uid": 1, "match": 1, "pos": 1, "at": int(time.time() * 1000)}
+
+    assert room.check(encode_access_token(claims, SECRET, 60), 1, 1)
+    assert refused(room, encode_access_token(claims, "another secret", 60)) == "Invalid or expired queue pass"
+    assert refused(room, encode_access_token(claims, SECRET, -1)) == "Invalid or expired queue pass"
+    assert refused(room, encode_access_token({**claims, "typ": "access"}, SECRET, 60)) == "Invalid or expired queue pass"
+    assert refused(room, "") == "Queue pass required"
+
+def test_each_use_of_a_pass_is_spent_once():
+    room     = new_room(burst=10, uses=2)
+    token, _ = room.join(1, 1)
+
+    first = room.use(token, 1, 1)
+    room.use(token, 1, 1)
+    with pytest.raises(QueueRejected, match="already used"):
+        room.use(token, 1, 1)
+
+    room.refund(first)
+    room.use(token, 1, 1)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(main, "WAITING_ROOM_ENABLED", True)
+    monkeypatch.setattr(main, "waiting_room", WaitingRoom(MemoryStore(), SECRET, rate=10, burst=10, window=60))
+
+def buy(client, user_id: int, token: str, quantity: int = 1):
+    return client.post(
+        "/api/v1/tickets/orders",
+        json={"match_id": 1, "category_id": "north", "quantity": quantity, "payment": {"method": "pix"}},
+        headers={**auth_headers(user_id), "X-Queue-Token": token}
+    )
+
+def join(client, user_id: int) -> str:
+    response = client.post("/api/v1/matches/1/queue", headers=auth_headers(user_id))
+    assert response.status_code == 201
+    return response.json()["queue_token"]
+
+def test_a_pass_buys_once_and_a_refused_purchase_does_not_spend_it(db, client, queue):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 2)])
+    first, second = join(client, 1), join(client, 2)
+    rejoined = client.get("/api/v1/matches/1/queue", headers={**auth_headers(1), "X-Queue-Token": join(client, 1)})
+    assert rejoined.json()["position"] == 1
+
+    assert buy(client, 1, first).status_code == 201
+    again = buy(client, 1, first)
+    assert again.status_code == 403
+    assert again.json()["detail"] == "Queue pass already used"
+
+    assert buy(client, 2, second, quantity=5).status_code == 400
+    assert buy(client, 2, second).status_code == 201
+
+def test_purchase_without_a_pass_or_before_the_turn_is_refused(db, client, queue, monkeypatch):
+    add_match(db, 1, status="SALE_OPEN", categories=[("north", 2)])
+    assert buy(client, 1, "").status_code == 403
+
+    monkeypatch.setattr(main, "waiting_room", WaitingRoom(MemoryStore(), SECRET, rate=0.5, burst=0, window=60))
+    response = buy(client, 1, join(client, 1))
+    assert response.status_code == 429
+    assert response.json()["detail"] == "Not admitted yet"
+    assert response.headers["Retry-After"] == "2"